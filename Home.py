@@ -1,16 +1,25 @@
-import os
+from startup_profile import mark, report  # isort: skip
+
 from datetime import datetime as dtime
 from datetime import time, timedelta
 
-import pandas as pd
-import plotly.graph_objects as go
 import pytz
 import streamlit as st
-import toml
 
-from agile_home_dashboard import fetch_data, get_current_cost, load_css
+import metrics
+from agile_home_dashboard import (
+    get_current_cost,
+    instrumented,
+    load_css,
+    shared_prices,
+)
+from price_curve import price_curve, to_seconds
+from price_plots import price_figure
+from regions import DEFAULT_REGION, REGIONS, region_label
 from utils import cp, fit_kettle_efficiency, kettle_energy
 
+mark("imports")
+
 st.set_page_config(
     page_title="Agile Daily Overview",
     layout="wide",
@@ -19,10 +28,14 @@ st.set_page_config(
 
 # Get kettle efficiency
 kettle_efficiency = fit_kettle_efficiency()
+mark("kettle model")
 
 
-# Load the TOML file
+# Load the TOML file once per process
+@st.cache_resource
 def load_config(file_path=".streamlit/config.toml"):
+    import toml
+
     return toml.load(file_path)
 
 
@@ -37,91 +50,47 @@ st.session_state.primary_color = colors["primaryColor"]
 
 
 load_css()
+mark("config")
 
-# Website to find the correct url for different tarrifs
-# is: https://energy-stats.uk/octopus-tracker-southern-england/
-url = "https://api.octopus.energy/v1/products/AGILE-24-10-01/electricity-tariffs/E-1R-AGILE-24-10-01-H/standard-unit-rates/"
-url_tracker_e = "https://api.octopus.energy/v1/products/SILVER-24-10-01/electricity-tariffs/E-1R-SILVER-24-10-01-H/standard-unit-rates/"
-url_tracker_g = "https://api.octopus.energy/v1/products/SILVER-24-10-01/gas-tariffs/G-1R-SILVER-24-10-01-H/standard-unit-rates/"
-
-st.session_state.df = None
-
-
-def get_color(value):
-    if value < 0:
-        return "#e7e1ff"
-
-    thresholds = [5, 7, 10, 15, 20, 25, 30]
-    colors = [
-        "#fdbbc1",
-        "#ff9a9f",
-        "#666c90",
-        "#aa7515",
-        "#f7c8a2",
-        "#1a2ee8",
-        "#332d58",
-        "#1e1f57",
-    ]
 
-    for i, threshold in enumerate(thresholds):
-        if value < threshold:
-            return colors[i]
+@metrics.timed("plot_info")
+def plot_info(df, title, key=None):
+    theme = (st.session_state.bg_color, st.session_state.font)
+    st.plotly_chart(price_figure(df, title, theme, key))
 
-    return colors[-1]  # Default for value >= 30
 
-
-def plot_info(df, title):
-    fig = go.Figure()
-    colors = [get_color(v) for v in df["value_inc_vat"]]
-
-    fig.add_trace(
-        go.Bar(
-            x=df["valid_from"],
-            y=df["value_inc_vat"],
-            marker=dict(color=colors),
-            name="Price [p/kWh]",
-        )
-    )
-    fig.update_layout(
-        plot_bgcolor=st.session_state.bg_color,
-        font=dict(color=st.session_state.font, size=14),
-        title=dict(text=title, font=dict(color=st.session_state.font)),
-        xaxis=dict(
-            title="Time",
-            title_font=dict(color=st.session_state.font),
-            tickfont=dict(color=st.session_state.font),
-        ),
-        yaxis=dict(
-            title="Price [p/kWh]",
-            title_font=dict(color=st.session_state.font),
-            tickfont=dict(color=st.session_state.font),
-        ),
-    )
-    st.plotly_chart(fig)
-
-
-def plot_data():
+def plot_data(df, forecast=None):
     col1, col2 = st.columns([0.15, 0.85], vertical_alignment="center")
 
     with col1:
-        day_to_plot = st.radio("Select day:", options=["Today", "Tomorrow"], index=0)
+        day_to_plot = st.radio(
+            "Select day:", options=["Today", "Tomorrow", "Both"], index=0
+        )
 
     with col2:
-        if st.session_state.df is None:
+        if df is None:
             st.write(f"No data available for {day_to_plot.lower()}.")
         else:
-            target_date = dtime.now(pytz.timezone("Europe/London")).date()
-            if day_to_plot == "Tomorrow":
-                target_date += pd.Timedelta(days=1)
+            today = dtime.now(pytz.timezone("Europe/London")).date()
+            dates = {
+                "Today": [today],
+                "Tomorrow": [today + timedelta(days=1)],
+                "Both": [today, today + timedelta(days=1)],
+            }[day_to_plot]
 
-            df_filtered = st.session_state.df[
-                st.session_state.df["valid_from"].dt.date == target_date
-            ]
+            # Unpublished prices are shown as estimates until they arrive
+            title = "Agile Pricing"
+            if forecast is not None and day_to_plot != "Today":
+                df, title = forecast, "Agile Pricing (estimated)"
+
+            df_filtered = df[df["valid_from"].dt.date.isin(dates)]
 
             if df_filtered.empty:
                 st.write(f"No data available for {day_to_plot.lower()}.")
             else:
-                plot_info(df_filtered, "Agile Pricing")
+                version = df.attrs.get("version")
+                key = None if version is None else (version, tuple(dates))
+                plot_info(df_filtered, title, key)
 
 
 # """
@@ -146,26 +115,31 @@ def get_optimal_coffee_time(df, current_time):
         for t in (time(7, 30), time(9, 30))
     )
 
-    df_coffee = df[(df["valid_to"] <= target_end) & (df["valid_from"] >= target_start)]
+    curve = price_curve(df)
+    window = curve.between(target_start, target_end)
+    in_window = curve.ends[window] <= to_seconds(target_end)
 
-    if df_coffee.empty:
+    if not in_window.any():
         return None
 
+    df_coffee = df.iloc[curve.rows[window][in_window]].copy()
+
     df_coffee["cost"] = round(energy / (3600) * df_coffee["value_inc_vat"] / 100, 4)
     return df_coffee.loc[df_coffee["cost"].idxmin()] if df_coffee is not None else None
 
 
-def display_current_costs(current_time):
-    cost_now, cost_next, current_row, next_row = get_current_cost(
-        st.session_state.df, current_time
-    )
+def display_current_costs(prices, current_time):
+    df = prices.agile
+    cost_now, cost_next, current_row, next_row = get_current_cost(df, current_time)
     tracker_now, tracker_next, current_row_e, next_row_e = get_current_cost(
-        st.session_state.df_tracker_e, current_time
+        prices.tracker_e, current_time
     )
 
-    coffee_best = get_optimal_coffee_time(
-        st.session_state.df, dtime.now(pytz.timezone("Europe/London"))
-    )
+    coffee_best = get_optimal_coffee_time(df, dtime.now(pytz.timezone("Europe/London")))
+    if coffee_best is None and prices.forecast is not None:
+        coffee_best = get_optimal_coffee_time(
+            prices.forecast, dtime.now(pytz.timezone("Europe/London"))
+        )
     col1, col2, col3, col4 = st.columns(4, gap="small")
 
     w = "95%"
@@ -187,9 +161,7 @@ def display_current_costs(current_time):
 
     with col2:
         if current_time.hour < 16:
-            only_today = st.session_state.df[
-                (st.session_state.df["valid_from"].dt.date == current_time.date())
-            ]
+            only_today = df[(df["valid_from"].dt.date == current_time.date())]
             off_peak = (only_today["valid_from"].dt.hour < 16) | (
                 only_today["valid_from"].dt.hour >= 19
             )
@@ -212,11 +184,8 @@ def display_current_costs(current_time):
             )
 
         else:
-            only_tom = st.session_state.df[
-                (
-                    st.session_state.df["valid_from"].dt.date
-                    == current_time.date() + timedelta(days=1)
-                )
+            only_tom = df[
+                (df["valid_from"].dt.date == current_time.date() + timedelta(days=1))
             ]
             off_peak = (only_tom["valid_from"].dt.hour < 16) | (
                 only_tom["valid_from"].dt.hour >= 19
@@ -262,7 +231,7 @@ def display_current_costs(current_time):
                         height: {h};
                         width: {w};">
                         <strong>Best coffee time is:</strong><br>
-                        <span style="font-size: 1.3em;">{coffee_best["valid_from"].strftime("%H:%M")}</span>
+                        <span style="font-size: 1.3em;">{coffee_best["valid_from"].strftime("%H:%M")}{" (estimated)" if coffee_best.get("estimate", False) else ""}</span>
                     </div>
                 </div>
                 """,
@@ -318,47 +287,38 @@ def display_current_costs(current_time):
             )
 
 
-# Function to load a module from a file
-def load_module(module_name, filepath):
-    import importlib.util
-
-    spec = importlib.util.spec_from_file_location(module_name, filepath)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
-
-
 def clear_input():
     st.session_state.temp = st.session_state.api_key
     st.session_state.api_key = ""
 
 
+@instrumented("home")
 def main():
     if "temp" not in st.session_state:
         st.session_state.temp = ""  # Default value
 
-    if st.session_state.df is None:
-        st.session_state.df = fetch_data(url)
-        st.session_state.df_tracker_e = fetch_data(url_tracker_e)
+    regions = list(REGIONS)
+    region = st.sidebar.selectbox(
+        "Region:",
+        options=regions,
+        index=regions.index(st.session_state.get("region", DEFAULT_REGION)),
+        format_func=region_label,
+    )
+    st.session_state.region = region
+
+    # Every session shares the process-wide prices rather than holding its own
+    prices = shared_prices(region)
+    mark("fetch")
 
     st.markdown(" ")  # Add some space between the input field and the plot
-    if st.session_state.df is not None:
-        display_current_costs(dtime.now(pytz.timezone("Europe/London")))
+    if prices.agile is not None:
+        display_current_costs(prices, dtime.now(pytz.timezone("Europe/London")))
 
-    plot_data()
+    plot_data(prices.agile, prices.forecast)
+    mark("first render")
+    report()
 
 
 # Run the application
 if __name__ == "__main__":
     main()
-
-# Get a list of pages
-PAGES_DIR = "pages"
-page_files = [f for f in os.listdir(PAGES_DIR) if f.endswith(".py")]
-pages = {
-    f.replace(".py", "").replace("_", " ").title(): os.path.join(PAGES_DIR, f)
-    for f in page_files
-}
-
-# main_page = '0 Trip Visualisation'
-# load_module(main_page, pages[main_page]).app()
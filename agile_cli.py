@@ -0,0 +1,202 @@
+"""
+Finds the cheapest time to run an appliance on Agile, without the dashboard.
+
+Prints the best start time and cost as JSON, e.g.
+
+    agile-cheapest dishwasher --deadline 07:00
+    agile-cheapest custom --duration 90 --power 1.5 --top 3
+
+Prices come from the dashboard's local price store. The API is only asked for
+new prices when the store does not yet hold everything that should have been
+published, so repeated runs, e.g. from cron, usually make no request at all.
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from load_profiles import PROFILES, profile_costs
+from octopus_api import london_timezone, start_of_day
+from optimise import scan_start_times
+from price_cache import published_until
+from price_curve import price_curve, to_seconds
+from price_store import get_store, tariff_key
+from regions import DEFAULT_REGION, REGIONS, tariff_urls
+from utils import kettle_boil_time, kettle_power
+
+# Appliances with a built-in load profile
+APPLIANCES = {
+    "dishwasher": "Dishwasher",
+    "eco-dishwasher": "Eco dishwasher",
+    "washing-machine": "Washing machine",
+    "tumble-dryer": "Tumble dryer",
+    "oven": "Oven",
+}
+
+
+def load_prices(url=None, now=None, offline=False):
+    """
+    Loads rates from today onwards from the price store.
+
+    `url` defaults to the default region's Agile tariff. The store is only
+    refreshed from the API when its newest slot ends before the latest prices
+    that should be published by `now`.
+    """
+    url = url or tariff_urls()["agile"]
+    now = now or datetime.now(london_timezone)
+    store = get_store()
+    tariff = tariff_key(url)
+    period_from = start_of_day()
+
+    newest = store.bounds(tariff)[1]
+    if offline or (newest is not None and newest >= to_seconds(published_until(now))):
+        return store.load(tariff, period_from)
+    return store.refresh(url, period_from)
+
+
+def kettle_minutes(volume=550, init_temp=15):
+    """Returns the time [min] to boil `volume` mL from `init_temp` C."""
+    return kettle_boil_time(init_temp, volume)[0] / 60
+
+
+def parse_time(value, now):
+    """Parses `HH:MM` as its next occurrence after `now`, or an ISO datetime."""
+    if value is None:
+        return None
+    try:
+        clock = datetime.strptime(value, "%H:%M").time()
+    except ValueError:
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize(london_timezone)
+        return timestamp.tz_convert(london_timezone).to_pydatetime()
+
+    at = london_timezone.localize(datetime.combine(now.date(), clock))
+    if at <= now:
+        at = london_timezone.localize(
+            datetime.combine(now.date() + timedelta(days=1), clock)
+        )
+    return at
+
+
+def cheapest_start(
+    df,
+    appliance="custom",
+    duration=None,
+    power=None,
+    start=None,
+    deadline=None,
+    step=5,
+    top=3,
+):
+    """
+    Finds the cheapest start times of an appliance run.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Rates with `valid_from`, `valid_to` and `value_inc_vat`.
+    appliance : str
+        A key of `APPLIANCES` to use its load profile, `kettle`, or `custom`.
+    duration : float, optional
+        Run length [min]. Required for `custom` runs; overrides the profile
+        length when given with `power`.
+    power : float, optional
+        Constant power draw [kW], used instead of the appliance's profile.
+    start : datetime, optional
+        Earliest start time, defaults to now.
+    deadline : datetime, optional
+        Time the run must finish by, defaults to the end of the price data.
+    step : int
+        Spacing between candidate start times [min].
+    top : int
+        Number of start times to return.
+
+    Returns
+    -------
+    result : dict
+        The run's `duration_minutes`, and `best` and `alternatives` holding the
+        `start`, `end` and `cost_p` of the cheapest starts. `best` is `None`
+        if the run does not fit in the price data.
+    """
+    start = pd.Timestamp(start or datetime.now(london_timezone)).ceil("min")
+    curve = price_curve(df)
+
+    if appliance in APPLIANCES and power is None:
+        profile = PROFILES[APPLIANCES[appliance]]
+        duration = len(profile)
+        costs = profile_costs(curve, profile, start, deadline, step)
+        best = costs.dropna().nsmallest(top, "cost", keep="first")
+    else:
+        if appliance == "kettle":
+            # The kettle draws its rated power for the fitted boil time
+            power = power or kettle_power
+            duration = duration or kettle_minutes()
+        elif appliance in APPLIANCES:
+            duration = duration or len(PROFILES[APPLIANCES[appliance]])
+        elif duration is None or power is None:
+            raise ValueError("Custom runs need both a duration and a power.")
+        _, best = scan_start_times(
+            curve, duration, start, deadline, step=step, power=power, k=top
+        )
+
+    runs = [
+        {
+            "start": time.isoformat(),
+            "end": (time + timedelta(seconds=round(duration * 60))).isoformat(),
+            "cost_p": round(float(cost), 3),
+        }
+        for time, cost in zip(best["time"], best["cost"], strict=True)
+    ]
+    return {
+        "appliance": appliance,
+        "duration_minutes": round(float(duration), 2),
+        "best": runs[0] if runs else None,
+        "alternatives": runs[1:],
+        "prices_until": df["valid_to"].max().isoformat() if len(df) else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Finds the cheapest time to run an appliance on Octopus Agile."
+    )
+    parser.add_argument("appliance", choices=[*APPLIANCES, "kettle", "custom"])
+    parser.add_argument("--duration", type=float, help="run length [min]")
+    parser.add_argument("--power", type=float, help="constant power draw [kW]")
+    parser.add_argument("--start", help="earliest start, HH:MM or ISO datetime")
+    parser.add_argument("--deadline", help="latest finish, HH:MM or ISO datetime")
+    parser.add_argument("--step", type=int, default=5, help="start spacing [min]")
+    parser.add_argument("--top", type=int, default=1, help="start times to list")
+    parser.add_argument("--region", default=DEFAULT_REGION, choices=REGIONS)
+    parser.add_argument("--url", help="tariff rates URL, overrides --region")
+    parser.add_argument("--offline", action="store_true", help="only use stored prices")
+    args = parser.parse_args(argv)
+
+    now = datetime.now(london_timezone)
+    try:
+        url = args.url or tariff_urls(args.region)["agile"]
+        df = load_prices(url, now, args.offline)
+        result = cheapest_start(
+            df,
+            args.appliance,
+            args.duration,
+            args.power,
+            parse_time(args.start, now) or now,
+            parse_time(args.deadline, now),
+            args.step,
+            args.top,
+        )
+    except Exception as e:
+        print(json.dumps({"error": str(e)}))
+        return 1
+
+    print(json.dumps(result, indent=2))
+    return 0 if result["best"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,45 +1,276 @@
+import functools
+import itertools
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime as dtime
-from datetime import time, timedelta
+from datetime import timedelta
 
 import pandas as pd
 import pytz
 import requests
 import streamlit as st
 
+import metrics
+from octopus_api import start_of_day
+from price_cache import PriceCache, expiry_for
+from price_curve import price_curve
+from price_forecast import forecast_prices
+from price_store import get_store
+from region_table import RegionTable
+from regions import DEFAULT_REGION, tariff_urls
+from window_table import window_table
+
+logger = logging.getLogger(__name__)
+
 london_timezone = pytz.timezone("Europe/London")
 
-diff = dtime.combine(
-    dtime.now(london_timezone).date(),
-    time(16, 10),
-    tzinfo=london_timezone,
-) - dtime.now(london_timezone)
+# Number of past days loaded alongside today's and tomorrow's prices
+HISTORY_DAYS = 1
+
+# Maximum number of tariffs fetched at the same time
+MAX_WORKERS = 4
+
+# Number of regions whose datasets are kept between runs, the least recently
+# used being dropped first
+MAX_DATASETS = 2
+
+_cache = PriceCache()
+metrics.register("price_cache", _cache.stats)
+
+# Each loaded DataFrame is stamped with a new `attrs["version"]`, so results
+# derived from it, such as figures, can be cached by version
+_versions = itertools.count(1)
+
+# Agile rates of the regions in use, frames of which are derived on demand
+_regions = RegionTable.from_frames({})
+_regions_lock = threading.Lock()
+
+
+@metrics.timed("load_rates")
+def _load_rates(url, period_from=None, period_to=None):
+    def load():
+        start = period_from
+        if start is None:
+            start = start_of_day(days_ago=HISTORY_DAYS)
+        df = get_store().refresh(url, start, period_to)
+        df.attrs["version"] = next(_versions)
+        return df
 
+    return _cache.get(
+        (url, period_from, period_to),
+        load,
+        functools.partial(expiry_for, period_to=period_to),
+    )
+
+
+def _report_fetch_error(e):
+    if isinstance(e, requests.HTTPError):
+        st.write(f"Failed to fetch data. Status code: {e.response.status_code}")
+        st.write(e.response.text)
+    else:
+        st.write(f"Error fetching data: {str(e)}")
 
-@st.cache_data(ttl=diff)
-def fetch_data(url):
+
+def fetch_data(url, period_from=None, period_to=None):
+    """
+    Fetches tariff rates through the local price store.
+
+    Only slots newer than those already stored are requested from the API, and
+    stored rates are served when the API is unavailable. Without an explicit
+    window, rates from the start of yesterday onwards are returned so that
+    today's and tomorrow's prices are always complete.
+
+    Results are cached until the next Agile publish; once stale they are served
+    while a background thread fetches the new prices. Windows ending in the
+    past are kept until evicted, as their published rates cannot change.
+    """
     try:
-        response = requests.get(url)
+        return _load_rates(url, period_from, period_to)
+    except Exception as e:
+        _report_fetch_error(e)
+        return None
 
-        if response.status_code == 200:
-            data = response.json()
-            results = data.get("results", [])
-            df = pd.DataFrame(results)
 
-            df["valid_from"] = pd.to_datetime(df["valid_from"], utc=True)
-            df["valid_to"] = pd.to_datetime(df["valid_to"], utc=True)
+def fetch_all(urls, period_from=None, period_to=None, max_workers=MAX_WORKERS):
+    """
+    Fetches several tariffs concurrently.
 
-            # Convert to London time zone
-            df["valid_from"] = df["valid_from"].dt.tz_convert(london_timezone)
-            df["valid_to"] = df["valid_to"].dt.tz_convert(london_timezone)
+    Parameters
+    ----------
+    urls : dict
+        Mapping of names to tariff `standard-unit-rates/` URLs. Names sharing
+        a URL are fetched once.
+    max_workers : int
+        Maximum number of concurrent requests.
 
-            return df.sort_values(by="valid_from")
-        else:
-            st.write(f"Failed to fetch data. Status code: {response.status_code}")
-            st.write(response.text)
-            return None
+    Returns
+    -------
+    data : dict
+        Mapping of the same names to DataFrames, or `None` for failed fetches.
+    """
+    unique_urls = list(dict.fromkeys(urls.values()))
+    results = {}
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(unique_urls)))
+    ) as pool:
+        futures = {
+            u: pool.submit(_load_rates, u, period_from, period_to) for u in unique_urls
+        }
+        for u, future in futures.items():
+            try:
+                results[u] = future.result()
+            except Exception as e:
+                _report_fetch_error(e)
+                results[u] = None
+
+    return {name: results[u] for name, u in urls.items()}
+
+
+def _load_region(region, url):
+    def load():
+        global _regions
+        df = get_store().refresh(url, start_of_day(days_ago=HISTORY_DAYS))
+        with _regions_lock:
+            _regions = _regions.replace(region, df, next(_versions))
+        # The rates live in the table; only the last slot is kept, for expiry
+        return df[["valid_to"]].tail(1)
+
+    _cache.get(("region", region, url), load)
+    return _regions
+
+
+def fetch_region(region, url=None):
+    """
+    Fetches a region's Agile rates into the shared region table.
+
+    Regions are loaded when first asked for and refreshed like `fetch_data`
+    rates. The table holds them compactly, and the returned frame is derived
+    from it and shared while in use. Stored rates are served when a refresh
+    fails.
+
+    Parameters
+    ----------
+    region : str
+        Region code.
+    url : str, optional
+        Agile `standard-unit-rates/` URL, defaults to the region's.
+
+    Returns
+    -------
+    df : pandas.DataFrame or None
+        The region's rates in `fetch_data` form, `None` if unavailable.
+    """
+    try:
+        table = _load_region(region, url or tariff_urls(region)["agile"])
     except Exception as e:
-        st.write(f"Error fetching data: {str(e)}")
+        _report_fetch_error(e)
+        table = _regions
+    return table.frame(region) if region in table else None
+
+
+@dataclass(frozen=True)
+class PriceData:
+    """
+    One region's prices, shared read-only by every session in the process.
+
+    Sessions look the dataset up on each run instead of keeping the frames in
+    their session state, so a refresh replaces the only reference to the old
+    prices. The frames must not be modified in place; filter or copy them.
+
+    Attributes
+    ----------
+    version : tuple
+        The `attrs["version"]` of each frame, changing whenever one reloads.
+    region : str
+        Region code.
+    agile, tracker_e, tracker_g : pandas.DataFrame or None
+        Agile and Tracker electricity and gas rates, `None` if unavailable.
+    forecast : pandas.DataFrame or None
+        Agile rates extended with estimates up to 23:00 tomorrow, flagged by
+        a boolean `estimate` column, while tomorrow is not yet published.
+    """
+
+    version: tuple
+    region: str
+    agile: pd.DataFrame | None
+    tracker_e: pd.DataFrame | None
+    tracker_g: pd.DataFrame | None
+    forecast: pd.DataFrame | None = None
+
+
+_datasets = OrderedDict()
+_datasets_lock = threading.Lock()
+
+
+def _version(df):
+    return None if df is None else df.attrs.get("version", id(df))
+
+
+def _forecast(urls, agile, tracker):
+    """Returns Agile rates with tomorrow's estimates, or `None` if not needed."""
+    if agile is None or tracker is None:
         return None
+    try:
+        return forecast_prices(urls["agile"], urls["tracker_e"], agile, tracker)
+    except Exception as e:
+        logger.warning("Could not estimate Agile prices: %s", e)
+        return None
+
+
+@metrics.timed("shared_prices")
+def shared_prices(region=DEFAULT_REGION):
+    """
+    Returns the process-wide `PriceData` of a region.
+
+    The dataset is rebuilt only when one of its tariffs has been reloaded, or
+    the day's estimates of unpublished prices change, so every session gets
+    the same object between Agile publishes. Only the `MAX_DATASETS` most
+    recently used regions are kept; the frames of others are dropped once no
+    session is using them, leaving their rates in the region table alone.
+    """
+    urls = tariff_urls(region)
+    agile = fetch_region(region, urls["agile"])
+    trackers = fetch_all(
+        {"tracker_e": urls["tracker_e"], "tracker_g": urls["tracker_g"]}
+    )
+    version = (
+        _version(agile),
+        _version(trackers["tracker_e"]),
+        _version(trackers["tracker_g"]),
+    )
+
+    forecast = _forecast(urls, agile, trackers["tracker_e"])
+
+    def current(data):
+        return (
+            data is not None and data.version == version and data.forecast is forecast
+        )
+
+    with _datasets_lock:
+        data = _datasets.get(region)
+        if not current(data):
+            data = PriceData(version, region, agile, **trackers, forecast=forecast)
+            if agile is not None:
+                # Precomputed once per dataset, for the appliance pages
+                window_table(agile)
+        _datasets[region] = data
+        _datasets.move_to_end(region)
+        while len(_datasets) > MAX_DATASETS:
+            _datasets.popitem(last=False)
+    return data
+
+
+def session_prices():
+    """Returns the shared `PriceData` of the current session's region."""
+    return shared_prices(st.session_state.get("region", DEFAULT_REGION))
+
+
+def cache_stats():
+    """Returns hit/miss/refresh counts for the rate cache."""
+    return _cache.stats()
 
 
 def get_current_time(toggle, df):
@@ -87,24 +318,71 @@ def get_current_time(toggle, df):
             return None
 
 
+@metrics.timed("get_current_cost")
 def get_current_cost(df, current_time):
-    current_cost_row = df[
-        (df["valid_from"] <= current_time) & (df["valid_to"] > current_time)
-    ]
-    current_price = current_cost_row.iloc[0]["value_inc_vat"]
-    if current_cost_row.empty:
+    curve = price_curve(df)
+    i = curve.slot(current_time)
+    if i < 0:
         return None, None, None, None
 
-    if current_cost_row.index[0] == df.index[-1]:
+    current_price = curve.prices[i]
+    current_cost_row = df.iloc[[curve.rows[i]]]
+
+    j = curve.next_slot(i)
+    if j < 0:
         next_cost_row = current_cost_row
         next_price = 0
     else:
-        next_cost_row = df.iloc[df.index.get_loc(current_cost_row.index[0]) + 1]
-        next_price = next_cost_row["value_inc_vat"]
+        next_cost_row = df.iloc[curve.rows[j]]
+        next_price = curve.prices[j]
 
     return current_price, next_price, current_cost_row, next_cost_row
 
 
+def display_metrics():
+    """Shows per-stage latency percentiles of this process in the sidebar."""
+    stages = metrics.summary()
+    if not stages:
+        return
+    rows = {
+        name: {
+            "Calls": stage["count"],
+            **{f"p{q * 100:g} [ms]": stage[q] * 1000 for q in metrics.QUANTILES},
+        }
+        for name, stage in stages.items()
+    }
+    with st.sidebar.expander("Performance", expanded=False):
+        st.dataframe(pd.DataFrame.from_dict(rows, orient="index").round(2))
+        counts = metrics.counters()
+        if counts:
+            st.caption(", ".join(f"{k}: {v}" for k, v in counts.items()))
+
+
+def instrumented(page):
+    """
+    Decorates a page's `main` to be timed as stage `page_<page>`.
+
+    With metrics enabled by `AGILE_METRICS=1`, each run then shows the
+    performance panel and updates the Prometheus file. Otherwise `main` is
+    returned unchanged.
+    """
+
+    def decorate(main):
+        if not metrics.ENABLED:
+            return main
+        timed_main = metrics.timed(f"page_{page}")(main)
+
+        @functools.wraps(main)
+        def run():
+            timed_main()
+            display_metrics()
+            metrics.write_prometheus()
+
+        return run
+
+    return decorate
+
+
 def load_css():
     st.markdown(
         f"""
@@ -0,0 +1,93 @@
+"""
+Backtests the day-ahead Agile price estimator and times its predictions.
+
+Each day is estimated by a model refitted on the days before it and scored
+against the published prices, alongside a baseline repeating the previous
+day. Run from the repository root with:
+
+    python -m benchmarks.backtest_forecast [--fixture rates.json | --store]
+
+Without a source, a year of generated prices is used. `--store` loads the
+region's history through the local price store, from the API or the stand-in
+set by `OCTOPUS_API_BASE`.
+"""
+
+import argparse
+import time
+
+from benchmarks.generators import dashboard_prices, tracker_prices
+from benchmarks.octopus_stub import load_fixture
+from octopus_api import start_of_day
+from price_forecast import (
+    TRAIN_DAYS,
+    PriceModel,
+    backtest,
+    estimate_prices,
+    forecast_until,
+    monthly_scores,
+)
+from price_store import get_store
+from regions import (
+    AGILE_PRODUCT,
+    DEFAULT_REGION,
+    REGIONS,
+    TRACKER_PRODUCT,
+    tariff_code,
+    tariff_urls,
+)
+
+
+def load_history(args):
+    """Returns Agile and Tracker electricity rates from the chosen source."""
+    if args.fixture:
+        rates = load_fixture(args.fixture)
+        agile = rates[tariff_code(AGILE_PRODUCT, args.region)]
+        tracker = rates[tariff_code(TRACKER_PRODUCT, args.region)]
+        return agile, tracker
+    if args.store:
+        urls = tariff_urls(args.region)
+        start = start_of_day(days_ago=args.days)
+        store = get_store()
+        return store.refresh(urls["agile"], start), store.refresh(
+            urls["tracker_e"], start
+        )
+    agile = dashboard_prices(args.days * 48)
+    return agile, tracker_prices(agile)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--fixture", help="rates recorded by benchmarks.octopus_stub")
+    source.add_argument("--store", action="store_true", help="use the price store")
+    parser.add_argument("--region", default=DEFAULT_REGION, choices=REGIONS)
+    parser.add_argument("--days", type=int, default=365, help="days of history")
+    parser.add_argument("--train-days", type=int, default=TRAIN_DAYS)
+    parser.add_argument("--repeats", type=int, default=100)
+    args = parser.parse_args()
+
+    agile, tracker = load_history(args)
+    scores = backtest(agile, tracker, train_days=args.train_days)
+    if scores.empty:
+        print(f"Too little history to backtest with {args.train_days} training days.")
+        return
+    print("Error [p/kWh] per month, model vs previous day's prices:")
+    print(monthly_scores(scores).to_string())
+    overall = scores.mean()
+    print(
+        f"\nOverall MAE {overall['mae']:.2f} vs {overall['persistence_mae']:.2f} "
+        f"over {len(scores)} days"
+    )
+
+    # Time one request's estimate, as served before the afternoon publish
+    model = PriceModel.fit(agile, tracker)
+    until = forecast_until(agile["valid_to"].max())
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        estimate_prices(agile, tracker, model, until)
+    elapsed = (time.perf_counter() - start) / args.repeats
+    print(f"Estimate to {until:%Y-%m-%d %H:%M}: {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
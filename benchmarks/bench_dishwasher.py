@@ -0,0 +1,104 @@
+"""
+Benchmarks the vectorized dishwasher start-time scan against the original loop.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_dishwasher
+"""
+
+import argparse
+import time
+from datetime import timedelta
+
+import pandas as pd
+
+from benchmarks.generators import agile_prices
+from optimise import scan_start_times
+from price_curve import PriceCurve
+
+DISHWASHER_TIME = 227  # minutes
+
+
+def legacy_current_price(df, current_time):
+    """The original mask-based current price lookup."""
+    row = df[(df["valid_from"] <= current_time) & (df["valid_to"] > current_time)]
+    return row.iloc[0]["value_inc_vat"]
+
+
+def legacy_total_cost(dishwasher_time, df, current_time):
+    """The original per-half-hour dishwasher cost loop."""
+    total_cost = 0
+    remaining_time = dishwasher_time
+    while remaining_time > 0:
+        current_price = legacy_current_price(df, current_time)
+        time_slice = min(remaining_time, 30 - current_time.minute % 30)
+        total_cost += current_price * time_slice
+        remaining_time -= time_slice
+        current_time += timedelta(minutes=time_slice)
+    return total_cost
+
+
+def legacy_scan(df, current_time, dishwasher_time):
+    """The original `pages/Dishwasher.main` start-time loop."""
+    dish_costs = pd.DataFrame(columns=["time", "cost"])
+    remaining_time = current_time
+    while remaining_time + timedelta(minutes=dishwasher_time) <= df["valid_to"].max():
+        cost = legacy_total_cost(dishwasher_time, df, remaining_time)
+        dish_costs = pd.concat(
+            [dish_costs, pd.DataFrame({"time": [remaining_time], "cost": [cost]})]
+        )
+        remaining_time += timedelta(minutes=30)
+    return dish_costs.reset_index(drop=True)
+
+
+def timed(func, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[48, 96, 10_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--legacy-limit",
+        type=int,
+        default=1_000,
+        help="largest input the original loop is run on (10,000 slots takes tens of minutes)",
+    )
+    args = parser.parse_args()
+
+    for n_slots in args.sizes:
+        df = agile_prices("2024-10-01", n_slots)
+        curve = PriceCurve.from_frame(df)
+        start = df["valid_from"].iloc[0] + timedelta(minutes=7)
+
+        line = f"{n_slots:>6} slots:"
+        for step in (30, 5):
+            elapsed, (costs, _) = timed(
+                lambda curve=curve, start=start, step=step: scan_start_times(
+                    curve, DISHWASHER_TIME, start, step=step
+                ),
+                args.repeats,
+            )
+            line += (
+                f" vectorized/{step}min {elapsed * 1000:9.2f} ms ({len(costs)} starts),"
+            )
+
+        if n_slots <= args.legacy_limit:
+            elapsed, legacy = timed(
+                lambda df=df, start=start: legacy_scan(df, start, DISHWASHER_TIME), 1
+            )
+            vectorized, _ = scan_start_times(curve, DISHWASHER_TIME, start)
+            difference = legacy["cost"].to_numpy() - vectorized["cost"].to_numpy() * 60
+            assert abs(difference).max() < 1e-6
+            line += f" original loop {elapsed * 1000:11.2f} ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmarks the paginated rate fetcher against a local stand-in API.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_fetch
+"""
+
+import argparse
+import time
+
+import requests
+
+from benchmarks.generators import agile_prices, to_records
+from benchmarks.octopus_stub import OctopusStub
+from octopus_api import fetch_rates, parse_rates
+
+
+def bench_fetch(stub, page_size, repeats):
+    """Times full paginated fetches, returning (pages/sec, seconds per fetch)."""
+    best = float("inf")
+    pages = 0
+    for _ in range(repeats):
+        before = stub.requests
+        start = time.perf_counter()
+        fetch_rates(stub.url(), page_size=page_size)
+        best = min(best, time.perf_counter() - start)
+        pages = stub.requests - before
+    return pages / best, best
+
+
+def bench_unpooled(stub, page_size):
+    """Times the same fetch opening a fresh connection for every page."""
+    start = time.perf_counter()
+    url, params = stub.url(), {"page_size": page_size}
+    while url:
+        data = requests.get(url, params=params, timeout=30).json()
+        url, params = data["next"], None
+    return time.perf_counter() - start
+
+
+def bench_parse(records, repeats):
+    """Times the JSON records to DataFrame parse, per 1,000 slots."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        parse_rates(records)
+        best = min(best, time.perf_counter() - start)
+    return best / len(records) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rates = agile_prices("2024-10-01", args.days * 48)
+    with OctopusStub(rates) as stub:
+        print(f"{len(rates)} slots served by {stub.base_url}")
+        for page_size in (100, 1500):
+            pages_per_sec, elapsed = bench_fetch(stub, page_size, args.repeats)
+            unpooled = bench_unpooled(stub, page_size)
+            print(
+                f"page_size={page_size:>4}: {pages_per_sec:8.1f} pages/sec, "
+                f"{elapsed * 1000:7.1f} ms per fetch "
+                f"(unpooled: {unpooled * 1000:7.1f} ms)"
+            )
+
+    parse_ms = bench_parse(to_records(rates), args.repeats) * 1000
+    print(f"parse: {parse_ms:.3f} ms per 1,000 slots")
+
+
+if __name__ == "__main__":
+    main()
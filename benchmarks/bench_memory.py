@@ -0,0 +1,120 @@
+"""
+Measures resident memory as the number of open dashboard sessions grows.
+
+Each session runs the Home page with Streamlit's `AppTest` and is kept open.
+Sessions either share the process-wide prices (`shared`) or also keep their own
+copies of the frames in session state (`copied`), as the pages used to. Every
+mode runs in a fresh process against a local stand-in API. Run from the
+repository root with:
+
+    python -m benchmarks.bench_memory --sessions 1 50 200
+"""
+
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.octopus_stub import OctopusStub, generated_rates
+
+MODES = ("shared", "copied")
+
+HOME = Path(__file__).resolve().parent.parent / "Home.py"
+
+
+def resident_mb():
+    """Returns the resident set size of this process [MB]."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # Peak rather than current size where /proc is not available
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+
+def worker(mode, levels, history_days):
+    """Opens sessions up to each of `levels`, printing the RSS at each as JSON."""
+    import streamlit
+    from streamlit.testing.v1 import AppTest
+
+    import agile_home_dashboard
+
+    streamlit.logger.set_log_level("error")
+    agile_home_dashboard.HISTORY_DAYS = history_days
+
+    sessions = []
+    for level in sorted(levels):
+        while len(sessions) < level:
+            at = AppTest.from_file(str(HOME), default_timeout=60)
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+            if mode == "copied":
+                prices = agile_home_dashboard.shared_prices()
+                for name in ("agile", "tracker_e", "tracker_g"):
+                    df = getattr(prices, name)
+                    at.session_state[name] = None if df is None else df.copy()
+            sessions.append(at)
+        gc.collect()
+        print(json.dumps({"sessions": level, "rss_mb": resident_mb()}), flush=True)
+
+
+def run_mode(mode, levels, history_days, env):
+    """Runs `worker` in a fresh process, returning the RSS [MB] per level."""
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.bench_memory",
+        "--worker",
+        mode,
+        "--history-days",
+        str(history_days),
+        "--sessions",
+        *map(str, levels),
+    ]
+    output = subprocess.run(
+        command, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    results = [json.loads(line) for line in output.splitlines() if line[:1] == "{"]
+    return {r["sessions"]: r["rss_mb"] for r in results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 50, 200])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument(
+        "--history-days", type=int, default=1, help="past days loaded per tariff"
+    )
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.sessions, args.history_days)
+        return
+
+    rates = generated_rates(days=args.history_days + 2)
+    with tempfile.TemporaryDirectory() as tmp, OctopusStub(rates) as stub:
+        env = dict(os.environ, OCTOPUS_API_BASE=stub.base_url, AGILE_DATA_DIR=str(tmp))
+        # Fill the price store first, so every mode starts from the same state
+        run_mode("shared", [1], args.history_days, env)
+        print(f"{args.history_days} past days of prices per tariff")
+        for mode in args.modes:
+            rss = run_mode(mode, args.sessions, args.history_days, env)
+            first = rss[min(rss)]
+            for sessions, mb in rss.items():
+                per_session = (mb - first) / max(sessions - min(rss), 1)
+                print(
+                    f"  {mode:>6}, {sessions:>4} sessions: {mb:7.1f} MB resident, "
+                    f"{per_session * 1024:6.0f} kB per extra session"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Load tests the recommendation service against a local stand-in API.
+
+Clients poll `/cheapest/dishwasher` over keep-alive connections, either
+unconditionally or with `If-None-Match`. Run from the repository root with:
+
+    python -m benchmarks.bench_service
+"""
+
+import argparse
+import http.client
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from benchmarks.octopus_stub import OctopusStub, generated_rates
+from price_store import PriceStore, set_store
+from recommendation_service import RecommendationService, make_server
+
+
+def poll(address, path, seconds, conditional, counts):
+    """Polls `path` until `seconds` have passed, counting responses by status."""
+    connection = http.client.HTTPConnection(*address, timeout=30)
+    etag = None
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        headers = {"If-None-Match": etag} if conditional and etag else {}
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        etag = response.getheader("ETag", etag)
+        counts.append(response.status)
+    connection.close()
+
+
+def handle_time(service, path, repeats=2000):
+    """Returns the in-process time [us] to answer a repeat poll."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        service.handle(path, "")
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def run(address, path, clients, seconds, conditional):
+    """Returns requests/sec and the fraction of `304` responses."""
+    results = [[] for _ in range(clients)]
+    threads = [
+        threading.Thread(
+            target=poll, args=(address, path, seconds, conditional, results[i])
+        )
+        for i in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    statuses = [status for counts in results for status in counts]
+    return len(statuses) / elapsed, statuses.count(304) / max(len(statuses), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--latency", type=float, default=0.05, help="API delay [s]")
+    args = parser.parse_args()
+
+    rates = generated_rates(days=30)
+    with (
+        tempfile.TemporaryDirectory() as tmp,
+        OctopusStub(rates, latency=args.latency) as stub,
+    ):
+        set_store(PriceStore(Path(tmp) / "prices.sqlite"))
+        service = RecommendationService(stub.url())
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        address = server.server_address[:2]
+        path = "/cheapest/dishwasher"
+
+        # First request loads prices from the stand-in API and builds the response
+        start = time.perf_counter()
+        requests.get(f"http://{address[0]}:{address[1]}{path}", timeout=30)
+        print(f"First response: {(time.perf_counter() - start) * 1000:.1f} ms")
+        print(f"Repeat poll, in process: {handle_time(service, path):.1f} us")
+
+        for conditional in (False, True):
+            label = "If-None-Match" if conditional else "unconditional"
+            for clients in args.clients:
+                before = stub.requests
+                rate, not_modified = run(
+                    address, path, clients, args.seconds, conditional
+                )
+                print(
+                    f"{label:>13}, {clients:>3} clients: {rate:8.0f} requests/sec, "
+                    f"{not_modified:6.1%} not modified, "
+                    f"{stub.requests - before} API requests"
+                )
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Measures how many concurrent dashboard sessions one instance can serve.
+
+Each simulated session loads the Home page tariffs, Agile and Tracker for one
+region, and prices the current slot against a local stand-in API with
+configurable latency and errors. Run from the repository root with:
+
+    python -m benchmarks.bench_sessions --latency 0.05
+"""
+
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import streamlit.logger
+
+import agile_home_dashboard
+from benchmarks.octopus_stub import OctopusStub, generated_rates
+from octopus_api import london_timezone, start_of_day
+from price_store import PriceStore, get_store, set_store
+from region_table import RegionTable
+from regions import (
+    AGILE_PRODUCT,
+    DEFAULT_REGION,
+    TRACKER_PRODUCT,
+    tariff_code,
+)
+
+
+def session(urls, uncached):
+    """Runs one session's data loading, returning its duration [s]."""
+    start = time.perf_counter()
+    if uncached:
+        period_from = start_of_day(days_ago=agile_home_dashboard.HISTORY_DAYS)
+        data = {}
+        for name, url in urls.items():
+            try:
+                data[name] = get_store().refresh(url, period_from)
+            except Exception:
+                data[name] = None
+        table = RegionTable.from_frames({DEFAULT_REGION: data["agile"]})
+        agile = table.frame(DEFAULT_REGION) if DEFAULT_REGION in table else None
+    else:
+        agile = agile_home_dashboard.fetch_region(DEFAULT_REGION, urls["agile"])
+        agile_home_dashboard.fetch_all(
+            {name: url for name, url in urls.items() if name != "agile"}
+        )
+    if agile is not None:
+        agile_home_dashboard.get_current_cost(agile, datetime.now(london_timezone))
+    return time.perf_counter() - start
+
+
+def run_level(urls, sessions, concurrency, uncached):
+    """Runs `sessions` sessions on `concurrency` threads."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        times = list(executor.map(lambda _: session(urls, uncached), range(sessions)))
+    elapsed = time.perf_counter() - start
+    return sessions / elapsed, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32, 128])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--uncached", action="store_true", help="refresh the store every session"
+    )
+    args = parser.parse_args()
+
+    streamlit.logger.set_log_level("error")
+    logging.getLogger("price_store").setLevel(logging.ERROR)
+    rates = generated_rates(args.days)
+    with (
+        tempfile.TemporaryDirectory() as tmp,
+        OctopusStub(rates, latency=args.latency, error_rate=args.error_rate) as stub,
+    ):
+        set_store(PriceStore(Path(tmp) / "prices.sqlite"))
+        urls = {
+            "agile": stub.url(AGILE_PRODUCT, tariff_code(AGILE_PRODUCT, DEFAULT_REGION))
+        }
+        for name, fuel in (("tracker_e", "E"), ("tracker_g", "G")):
+            tariff = tariff_code(TRACKER_PRODUCT, DEFAULT_REGION, fuel)
+            urls[name] = stub.url(TRACKER_PRODUCT, tariff)
+
+        print(f"{args.sessions} sessions, {args.latency * 1000:.0f} ms API latency")
+        for concurrency in args.concurrency:
+            before = stub.requests
+            rate, times = run_level(urls, args.sessions, concurrency, args.uncached)
+            p95 = statistics.quantiles(times, n=20)[-1]
+            print(
+                f"  {concurrency:>4} concurrent: {rate:8.1f} sessions/s, "
+                f"median {statistics.median(times) * 1000:7.1f} ms, "
+                f"p95 {p95 * 1000:7.1f} ms, "
+                f"{stub.requests - before} API requests"
+            )
+
+
+if __name__ == "__main__":
+    main()
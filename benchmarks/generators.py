@@ -0,0 +1,135 @@
+from datetime import datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+from octopus_api import london_timezone
+
+SLOT = pd.Timedelta(minutes=30)
+
+# Benchmark sizes, from one day to several years of half-hourly slots
+SIZES = {"1d": 48, "1w": 336, "1m": 1_488, "1y": 17_520, "3y": 52_608}
+
+
+def agile_prices(start, n_slots, seed=0, negative_days=0.0, missing=0.0):
+    """
+    Generates a deterministic Agile-shaped price series.
+
+    Prices follow a London-time daily shape with an overnight trough and a
+    16:00-19:00 peak, plus day-to-day drift and slot-level noise. Slots are
+    contiguous in UTC, so series spanning March or October include the clock
+    change days with 46 and 50 slots.
+
+    Parameters
+    ----------
+    start : str or datetime
+        First slot start, taken as UTC if naive.
+    n_slots : int
+        Number of half-hour slots.
+    seed : int
+        Random seed.
+    negative_days : float
+        Fraction of days whose overnight prices dip below zero.
+    missing : float
+        Fraction of slots dropped at random.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        `valid_from`, `valid_to` (UTC) and `value_inc_vat`/`value_exc_vat`.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start)
+    start = (
+        start.tz_localize("UTC") if start.tzinfo is None else start.tz_convert("UTC")
+    )
+    valid_from = pd.date_range(start, periods=n_slots, freq=SLOT)
+    local = valid_from.tz_convert(london_timezone)
+    hour = local.hour + local.minute / 60
+    day = (local.normalize() - local.normalize()[0]).days
+
+    n_days = day.max() + 1 if n_slots else 0
+    daily = 18 + 6 * np.sin((hour - 9) / 24 * 2 * np.pi)
+    peak = np.where((hour >= 16) & (hour < 19), 12.0, 0.0)
+    drift = rng.normal(0, 3, n_days)[day]
+    noise = rng.normal(0, 1.5, n_slots)
+
+    windy = (rng.random(n_days) < negative_days)[day]
+    dip = np.where(windy & (hour < 6), -20.0, 0.0)
+
+    value_inc_vat = np.round(np.minimum(daily + peak + drift + noise + dip, 100), 2)
+    df = pd.DataFrame(
+        {
+            "value_exc_vat": np.round(value_inc_vat / 1.05, 2),
+            "value_inc_vat": value_inc_vat,
+            "valid_from": valid_from,
+            "valid_to": valid_from + SLOT,
+        }
+    )
+    if missing:
+        df = df[rng.random(n_slots) >= missing].reset_index(drop=True)
+    return df
+
+
+def dashboard_prices(n_slots, end=None, seed=0, negative_days=0.05, missing=0.0):
+    """
+    Generates prices shaped like `fetch_data` output, ending at `end`.
+
+    Times are in London time and the series ends at 23:00 tomorrow by default,
+    so today's and tomorrow's prices are always present.
+    """
+    if end is None:
+        tomorrow = datetime.now(london_timezone).date() + timedelta(days=1)
+        end = london_timezone.localize(datetime.combine(tomorrow, time(23)))
+    start = pd.Timestamp(end) - n_slots * SLOT
+    df = agile_prices(start, n_slots, seed, negative_days, missing)
+    df["valid_from"] = df["valid_from"].dt.tz_convert(london_timezone)
+    df["valid_to"] = df["valid_to"].dt.tz_convert(london_timezone)
+    return df
+
+
+def tracker_prices(agile, seed=0):
+    """
+    Generates Tracker-shaped daily rates following a generated Agile series.
+
+    Each London day gets one rate near that day's mean Agile price, valid from
+    midnight to midnight, as the Tracker tariff publishes them.
+    """
+    rng = np.random.default_rng(seed)
+    local = agile["valid_from"].dt.tz_convert(london_timezone)
+    means = agile.groupby(local.dt.tz_localize(None).dt.normalize())[
+        "value_inc_vat"
+    ].mean()
+    days = means.index.tz_localize(london_timezone)
+    value_inc_vat = np.round(1.1 * means.to_numpy() + rng.normal(0, 1, len(means)), 2)
+    return pd.DataFrame(
+        {
+            "value_exc_vat": np.round(value_inc_vat / 1.05, 2),
+            "value_inc_vat": value_inc_vat,
+            "valid_from": days,
+            "valid_to": (means.index + pd.Timedelta(days=1)).tz_localize(
+                london_timezone
+            ),
+        }
+    )
+
+
+def to_records(df):
+    """Converts a generated price series into API-style result records."""
+    fmt = "%Y-%m-%dT%H:%M:%SZ"
+    return [
+        {
+            "value_exc_vat": exc,
+            "value_inc_vat": inc,
+            "valid_from": start,
+            "valid_to": end,
+            "payment_method": None,
+        }
+        for exc, inc, start, end in zip(
+            df["value_exc_vat"].tolist(),
+            df["value_inc_vat"].tolist(),
+            df["valid_from"].dt.tz_convert("UTC").dt.strftime(fmt),
+            df["valid_to"].dt.tz_convert("UTC").dt.strftime(fmt),
+            strict=True,
+        )
+    ]
@@ -0,0 +1,305 @@
+"""
+Local stand-in for the Octopus `standard-unit-rates` endpoints.
+
+Serve generated prices, or a recorded fixture, from the repository root with:
+
+    python -m benchmarks.octopus_stub --port 8000 [--fixture rates.json]
+
+and point the dashboard at it with:
+
+    OCTOPUS_API_BASE=http://127.0.0.1:8000/v1 streamlit run Home.py
+
+Record a fixture from the real API with `--record rates.json`.
+"""
+
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import pandas as pd
+
+from benchmarks.generators import dashboard_prices, to_records
+from octopus_api import DEFAULT_API_BASE, iter_pages, parse_rates, rates_url
+from regions import AGILE_PRODUCT, REGIONS, TRACKER_PRODUCT, tariff_code
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1500
+
+# Tariffs fetched by the Home page in every region, keyed by tariff code
+TARIFFS = {
+    tariff_code(product, region, fuel): product
+    for region in REGIONS
+    for product, fuel in (
+        (AGILE_PRODUCT, "E"),
+        (TRACKER_PRODUCT, "E"),
+        (TRACKER_PRODUCT, "G"),
+    )
+}
+
+
+class _Rates:
+    """Rates of one tariff, newest first, as served by the API."""
+
+    def __init__(self, df):
+        df = df.sort_values("valid_from", ascending=False, ignore_index=True)
+        self.valid_from = df["valid_from"].to_numpy(dtype="datetime64[ns]")
+        self.valid_to = df["valid_to"].to_numpy(dtype="datetime64[ns]")
+        self.records = to_records(df)
+
+    def select(self, period_from=None, period_to=None):
+        """Returns the indices of records overlapping the requested window."""
+        lower = pd.Timestamp(period_from or "1970-01-01T00:00:00Z").tz_convert(None)
+        upper = pd.Timestamp(period_to or "2200-01-01T00:00:00Z").tz_convert(None)
+        mask = (self.valid_to > lower.to_datetime64()) & (
+            self.valid_from < upper.to_datetime64()
+        )
+        return mask.nonzero()[0]
+
+
+class OctopusStub:
+    """
+    Local stand-in for the Octopus `standard-unit-rates` endpoints.
+
+    Rates are served newest first with `count`/`next`/`previous` pagination and
+    `period_from`/`period_to` filtering, mirroring the real API.
+
+    Parameters
+    ----------
+    rates : pandas.DataFrame or dict
+        Rates with `valid_from`/`valid_to` and price columns, as produced by
+        `benchmarks.generators.agile_prices`. A DataFrame is served for every
+        tariff, a dict maps tariff codes to their rates.
+    latency : float
+        Delay added to every response [s].
+    jitter : float
+        Maximum random delay added on top of `latency` [s].
+    error_rate : float
+        Fraction of requests answered with `error_status` instead of rates.
+    error_status : int
+        HTTP status of injected errors.
+    seed : int
+        Seed for the jitter and error injection.
+    """
+
+    def __init__(
+        self,
+        rates,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        error_status=503,
+        seed=0,
+    ):
+        if isinstance(rates, pd.DataFrame):
+            self.tariffs = {None: _Rates(rates)}
+        else:
+            self.tariffs = {tariff: _Rates(df) for tariff, df in rates.items()}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @classmethod
+    def from_fixture(cls, path, **kwargs):
+        """Serves the rates recorded in a fixture file by `record_fixture`."""
+        return cls(load_fixture(path), **kwargs)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def url(self, product="AGILE-24-10-01", tariff="E-1R-AGILE-24-10-01-H"):
+        return rates_url(product, tariff, self.base_url)
+
+    def rates(self, path):
+        """Returns the rates served at `path`, or None for an unknown tariff."""
+        if None in self.tariffs:
+            return self.tariffs[None]
+        parts = path.rstrip("/").split("/")
+        return self.tariffs.get(parts[-2])
+
+    def page(self, path, query):
+        rates = self.rates(path)
+        params = {key: values[0] for key, values in parse_qs(query).items()}
+        page_size = min(int(params.get("page_size", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        page = int(params.get("page", 1))
+        selected = rates.select(params.get("period_from"), params.get("period_to"))
+
+        start = (page - 1) * page_size
+        results = [rates.records[i] for i in selected[start : start + page_size]]
+
+        def link(number):
+            if number < 1 or (number - 1) * page_size >= len(selected):
+                return None
+            host, port = self.server.server_address[:2]
+            return f"http://{host}:{port}{path}?{urlencode({**params, 'page': number})}"
+
+        return {
+            "count": len(selected),
+            "next": link(page + 1),
+            "previous": link(page - 1),
+            "results": results,
+        }
+
+    def _draw(self):
+        """Returns the delay [s] and whether to fail the next request."""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+            self.errors += fail
+        return delay, fail
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                delay, fail = stub._draw()
+                if delay:
+                    time.sleep(delay)
+
+                parts = urlsplit(self.path)
+                if not parts.path.endswith("/standard-unit-rates/"):
+                    self.send_error(404)
+                    return
+                if stub.rates(parts.path) is None:
+                    self.send_error(404, "Unknown tariff")
+                    return
+                if fail:
+                    self.send_error(stub.error_status, "Injected error")
+                    return
+
+                body = json.dumps(stub.page(parts.path, parts.query)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=1)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def record_fixture(path, tariffs=TARIFFS, period_from=None, period_to=None):
+    """
+    Records raw API rate records for each tariff into a JSON fixture.
+
+    Parameters
+    ----------
+    path : str or Path
+        Fixture file to write.
+    tariffs : dict
+        Product codes keyed by tariff code.
+    period_from, period_to : datetime or str, optional
+        Time window to record.
+    """
+    fixture = {}
+    for tariff, product in tariffs.items():
+        url = rates_url(product, tariff, DEFAULT_API_BASE)
+        fixture[tariff] = [
+            record
+            for page in iter_pages(url, period_from, period_to)
+            for record in page
+        ]
+    Path(path).write_text(json.dumps(fixture))
+    return fixture
+
+
+def load_fixture(path):
+    """Reads a fixture written by `record_fixture` into rates per tariff."""
+    fixture = json.loads(Path(path).read_text())
+    return {tariff: parse_rates(records) for tariff, records in fixture.items()}
+
+
+def generated_rates(days, seed=0):
+    """Generates `days` of rates ending tomorrow for every tariff in `TARIFFS`."""
+    return {
+        tariff: dashboard_prices(days * 48, seed=seed + i)
+        for i, tariff in enumerate(TARIFFS)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--fixture", help="serve rates recorded in this file")
+    parser.add_argument("--days", type=int, default=30, help="days to generate")
+    parser.add_argument("--latency", type=float, default=0.0, help="delay [s]")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra delay [s]")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--record", help="record the real API into this file")
+    args = parser.parse_args()
+
+    if args.record:
+        period_from = pd.Timestamp.now("UTC").floor("D") - timedelta(days=args.days)
+        fixture = record_fixture(args.record, period_from=period_from)
+        for tariff, records in fixture.items():
+            print(f"{tariff}: {len(records)} rates")
+        return
+
+    rates = load_fixture(args.fixture) if args.fixture else generated_rates(args.days)
+    stub = OctopusStub(
+        rates,
+        args.host,
+        args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    )
+    print(f"Serving on {stub.base_url}, set OCTOPUS_API_BASE to use it")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+        print(f"{stub.requests} requests, {stub.errors} injected errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Times the dashboard's hot paths on synthetic tariffs of increasing size.
+
+Run from the repository root with:
+
+    python -m benchmarks.run --output results.json [--compare baseline.json]
+
+Results are written as JSON so runs from different commits can be compared.
+"""
+
+import argparse
+import importlib.util
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import streamlit.logger
+
+from benchmarks.generators import SIZES, dashboard_prices, to_records
+from consumption import bills, join_prices
+from octopus_api import london_timezone, parse_rates, start_of_day
+from price_curve import PriceCurve, price_curve
+from price_plots import build_price_figure, price_colors
+from tariff_compare import compare_tariffs
+from window_table import WindowTable, window_table
+
+ROOT = Path(__file__).parent.parent
+
+THEME = ("#FCFCFC", "#261132")
+
+# Household consumption profiles costed at once by `compare_tariffs` [kWh]
+PROFILES = np.random.default_rng(0).random((1000, 48)) / 3
+
+
+def load_script(name, path):
+    """Imports a Streamlit script as a module, without running its `main`."""
+    spec = importlib.util.spec_from_file_location(name, ROOT / path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_scripts():
+    """Imports Home and the appliance pages with the session state they expect."""
+    streamlit.logger.set_log_level("error")
+    for key, value in {
+        "textBoxColor": "#2A69A1",
+        "primary_color": "#B5146A",
+        "bg_color": "#FCFCFC",
+        "font": "#261132",
+        "marker": "#7DBDF5",
+    }.items():
+        st.session_state[key] = value
+
+    return {
+        "home": load_script("Home", "Home.py"),
+        "kettle": load_script("Kettle", "pages/Kettle.py"),
+    }
+
+
+def measure(func, min_time=0.2, max_runs=1000):
+    """
+    Calls `func` repeatedly, returning per-call times [s].
+
+    Runs until `min_time` has elapsed or `max_runs` calls have been made, after
+    one untimed warm-up call.
+    """
+    func()
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < max_runs and (len(times) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def cases(scripts, df, now):
+    """Returns the benchmarked calls for one price series."""
+    records = to_records(df)
+    readings = pd.DataFrame(
+        {"interval_start": df["valid_from"].dt.tz_convert("UTC"), "consumption": 0.25}
+    )
+    home, kettle = scripts["home"], scripts["kettle"]
+    return {
+        "parse_rates": lambda: parse_rates(records),
+        "price_curve": lambda: PriceCurve.from_frame(df),
+        "get_current_cost": lambda: home.get_current_cost(df, now),
+        "cheapest_window": lambda: window_table(df).cheapest(227, now, step=30),
+        "window_table": lambda: WindowTable(price_curve(df), start_of_day()),
+        "compare_tariffs": lambda: compare_tariffs(df, df, df, PROFILES, gas=30.0),
+        "bills": lambda: bills(join_prices(readings, df)),
+        "get_cheapest_time": lambda: kettle.get_cheapest_time(df, 12.0),
+        "get_optimal_coffee_time": lambda: home.get_optimal_coffee_time(df, now),
+        "price_colors": lambda: price_colors(df["value_inc_vat"].to_numpy()),
+        "build_price_figure": lambda: build_price_figure(df, "Prices", THEME),
+    }
+
+
+def metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(london_timezone).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+    }
+
+
+def compare(results, baseline_path):
+    baseline = {
+        (r["benchmark"], r["size"]): r["median_ms"]
+        for r in json.loads(Path(baseline_path).read_text())["results"]
+    }
+    print(f"\nCompared with {baseline_path}:")
+    for r in results:
+        before = baseline.get((r["benchmark"], r["size"]))
+        if before:
+            print(
+                f"  {r['benchmark']:<24} {r['size']:>3} "
+                f"{before:10.3f} -> {r['median_ms']:10.3f} ms "
+                f"({before / r['median_ms']:6.2f}x)"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=SIZES)
+    parser.add_argument("--only", nargs="+", help="benchmarks to run")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare with")
+    parser.add_argument("--min-time", type=float, default=0.2)
+    args = parser.parse_args()
+
+    scripts = load_scripts()
+    now = datetime.now(london_timezone)
+    results = []
+    for size in args.sizes:
+        df = dashboard_prices(SIZES[size], negative_days=0.05, missing=0.001)
+        for name, func in cases(scripts, df, now).items():
+            if args.only and name not in args.only:
+                continue
+            times = measure(func, args.min_time)
+            results.append(
+                {
+                    "benchmark": name,
+                    "size": size,
+                    "n_slots": len(df),
+                    "median_ms": statistics.median(times) * 1000,
+                    "min_ms": min(times) * 1000,
+                    "runs": len(times),
+                }
+            )
+            print(
+                f"{name:<24} {size:>3} ({len(df):>6} slots) "
+                f"{results[-1]['median_ms']:10.3f} ms median, {len(times)} runs"
+            )
+
+    Path(args.output).write_text(
+        json.dumps({"meta": metadata(), "results": results}, indent=2)
+    )
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from octopus_api import API_BASE, iter_pages, london_timezone
+
+# CSV rows parsed at a time
+CHUNK_SIZE = 50_000
+
+# Readings requested per API page, the endpoint's maximum
+CONSUMPTION_PAGE_SIZE = 25_000
+
+# CSV export headers, lower-cased, mapped to API field names
+_CSV_COLUMNS = {
+    "consumption (kwh)": "consumption",
+    "consumption": "consumption",
+    "start": "interval_start",
+    "interval_start": "interval_start",
+}
+
+
+def consumption_url(mpan, serial, fuel="electricity", base=None):
+    """Returns the consumption endpoint of a meter, by MPAN or MPRN and serial."""
+    base = (base or API_BASE).rstrip("/")
+    return f"{base}/{fuel}-meter-points/{mpan}/meters/{serial}/consumption/"
+
+
+def _parse(records):
+    """
+    Parses consumption records, leaving start times without a UTC offset as
+    naive London times.
+    """
+    df = pd.DataFrame(records)
+    df = df.rename(columns=lambda c: _CSV_COLUMNS.get(c.strip().lower(), c))
+    if df.empty:
+        return pd.DataFrame(
+            {
+                "interval_start": pd.Series(dtype="datetime64[ns, UTC]"),
+                "consumption": pd.Series(dtype="float64"),
+            }
+        )
+
+    text = df["interval_start"].str.strip()
+    if text.str.contains(r"(?:Z|[+-]\d\d:?\d\d)$").all():
+        starts = pd.to_datetime(text, utc=True, format="ISO8601")
+    else:
+        starts = pd.to_datetime(text, format="ISO8601")
+    return pd.DataFrame(
+        {
+            "interval_start": starts.dt.as_unit("ns"),
+            "consumption": pd.to_numeric(df["consumption"]).astype("float64"),
+        }
+    )
+
+
+def _localize(df):
+    """
+    Converts naive London start times to UTC.
+
+    The repeated hour of an autumn clock change is told apart by the order of
+    the readings, so they must be in the order they were recorded.
+    """
+    starts = df["interval_start"]
+    if starts.dt.tz is not None:
+        return df
+    return df.assign(
+        interval_start=starts.dt.tz_localize(london_timezone, ambiguous="infer")
+        .dt.tz_convert("UTC")
+        .dt.as_unit("ns")
+    )
+
+
+def parse_consumption(records):
+    """
+    Converts consumption records to a compact DataFrame.
+
+    Parameters
+    ----------
+    records : list of dict or pandas.DataFrame
+        API results, or CSV export rows, with a reading and its start time.
+        Times without a UTC offset are taken as London time.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        `interval_start` as UTC times and `consumption` [kWh].
+    """
+    return _localize(_parse(records))
+
+
+def iter_api_consumption(url, api_key, period_from=None, period_to=None, session=None):
+    """
+    Yields parsed readings from the consumption endpoint, a page at a time.
+
+    Each page is parsed into a compact frame before the next is requested, so a
+    multi-year history is never held as raw JSON.
+    """
+    for page in iter_pages(
+        url,
+        period_from,
+        period_to,
+        page_size=CONSUMPTION_PAGE_SIZE,
+        session=session,
+        auth=(api_key, ""),
+    ):
+        yield parse_consumption(page)
+
+
+def iter_json_consumption(files):
+    """Yields parsed readings from saved consumption endpoint pages, one per file."""
+    for file in files:
+        if hasattr(file, "read"):
+            page = json.load(file)
+        else:
+            with open(file) as f:
+                page = json.load(f)
+        yield parse_consumption(page.get("results", []))
+
+
+def iter_csv_consumption(path, chunksize=CHUNK_SIZE):
+    """
+    Yields parsed readings from a CSV export, `chunksize` rows at a time.
+
+    Exports without UTC offsets are in London time. As a clock change can fall
+    across chunks, their compact readings are localized together once the
+    whole file is read.
+    """
+    local = []
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype=str):
+        df = _parse(chunk)
+        if df["interval_start"].dt.tz is None:
+            local.append(df)
+        else:
+            yield df
+    if local:
+        yield _localize(pd.concat(local, ignore_index=True))
+
+
+def load_consumption(chunks):
+    """
+    Combines parsed reading chunks into one series sorted by start time.
+
+    Readings repeated across chunks or pages keep their last value.
+    """
+    df = pd.concat([parse_consumption([]), *chunks], ignore_index=True)
+    return (
+        df.drop_duplicates("interval_start", keep="last")
+        .sort_values("interval_start")
+        .reset_index(drop=True)
+    )
+
+
+def join_prices(consumption, prices):
+    """
+    Prices each reading at the rate of the slot it starts in.
+
+    Readings are matched to the latest `valid_from` at or before their start
+    with an as-of join on UTC times, so the repeated and skipped hours of clock
+    changes line up. Readings outside every slot get a NaN price.
+
+    Parameters
+    ----------
+    consumption : pandas.DataFrame
+        Readings from `load_consumption`.
+    prices : pandas.DataFrame
+        Rates in `fetch_data` form.
+
+    Returns
+    -------
+    joined : pandas.DataFrame
+        The readings with their `price` [p/kWh] and `cost` [p].
+    """
+    rates = pd.DataFrame(
+        {
+            "valid_from": prices["valid_from"].dt.tz_convert("UTC").dt.as_unit("ns"),
+            "valid_to": prices["valid_to"].dt.tz_convert("UTC").dt.as_unit("ns"),
+            "price": prices["value_inc_vat"].to_numpy(),
+        }
+    ).sort_values("valid_from")
+    joined = pd.merge_asof(
+        consumption.assign(
+            interval_start=consumption["interval_start"].dt.as_unit("ns")
+        ),
+        rates,
+        left_on="interval_start",
+        right_on="valid_from",
+        direction="backward",
+    )
+    outside = ~(joined["interval_start"] < joined["valid_to"])
+    joined.loc[outside, "price"] = np.nan
+    joined["cost"] = joined["consumption"] * joined["price"]
+    return joined.drop(columns=["valid_from", "valid_to"])
+
+
+def bills(joined):
+    """
+    Totals priced readings per London day and month.
+
+    Returns
+    -------
+    bills : dict
+        `daily` and `monthly` DataFrames of `consumption` [kWh], `cost` [p],
+        average `unit_rate` [p/kWh] and the number of `unpriced` readings,
+        whose use is left out of the cost.
+    """
+    local = joined["interval_start"].dt.tz_convert(london_timezone).dt.tz_localize(None)
+    consumption = joined["consumption"].to_numpy()
+    unpriced = joined["price"].isna().to_numpy()
+    cost = np.nan_to_num(joined["cost"].to_numpy())
+
+    def total(keys):
+        codes, groups = pd.factorize(keys, sort=True)
+
+        def sum_by(values):
+            return np.bincount(codes, weights=values, minlength=len(groups))
+
+        priced = sum_by(np.where(unpriced, 0.0, consumption))
+        return pd.DataFrame(
+            {
+                "consumption": sum_by(consumption),
+                "cost": sum_by(cost),
+                "unpriced": sum_by(unpriced).astype(int),
+                "unit_rate": sum_by(cost) / np.where(priced > 0, priced, np.nan),
+            },
+            index=groups.rename(keys.name),
+        )
+
+    return {
+        "daily": total(local.dt.normalize().rename("day")),
+        "monthly": total(local.dt.to_period("M").rename("month")),
+    }
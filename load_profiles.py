@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from optimise import to_datetimes
+from price_curve import to_seconds
+
+# Profiles at least this long are convolved with an FFT rather than directly
+FFT_THRESHOLD = 64
+
+
+def profile_from_segments(segments):
+    """
+    Builds a minute-resolution power profile from (minutes, kW) segments.
+
+    e.g. `[(20, 2.0), (60, 0.15)]` draws 2 kW for 20 minutes then 0.15 kW for an hour.
+    """
+    return np.concatenate([np.full(int(m), float(kw)) for m, kw in segments])
+
+
+# Typical appliance cycles, with most energy drawn in heating bursts [kW]
+PROFILES = {
+    "Dishwasher": profile_from_segments(
+        [(10, 0.1), (20, 2.0), (60, 0.15), (15, 2.0), (20, 0.1), (100, 0.05)]
+    ),
+    "Eco dishwasher": profile_from_segments(
+        [(15, 0.1), (30, 1.2), (90, 0.1), (15, 1.5), (30, 0.1), (47, 0.05)]
+    ),
+    "Washing machine": profile_from_segments(
+        [(5, 0.1), (20, 2.0), (65, 0.2), (10, 0.5), (15, 0.6)]
+    ),
+    "Tumble dryer": profile_from_segments([(150, 2.5), (15, 0.3)]),
+    "Oven": profile_from_segments([(15, 2.5), (45, 1.2)]),
+}
+
+
+def load_profile_csv(path):
+    """
+    Loads a power profile from a CSV file.
+
+    The file needs a `power_kw` column holding one value per minute. If it also
+    has a `minute` column, rows are placed at those minutes and each value is
+    held until the next listed minute.
+
+    Returns
+    -------
+    profile : numpy.ndarray
+        Power draw [kW] for each minute of the cycle.
+
+    Raises
+    ------
+    ValueError
+        If the file has no `power_kw` column or no rows.
+    """
+    # Uploaded files are named by their `name`
+    name = getattr(path, "name", path)
+    df = pd.read_csv(path, skipinitialspace=True)
+    if "power_kw" not in df:
+        raise ValueError(f"{name} has no 'power_kw' column.")
+    if df.empty:
+        raise ValueError(f"{name} has no power readings.")
+
+    if "minute" not in df:
+        return df["power_kw"].to_numpy(dtype=float)
+
+    df = df.sort_values("minute")
+    minutes = df["minute"].to_numpy(dtype=int)
+    held = np.searchsorted(minutes, np.arange(minutes[-1] + 1), side="right") - 1
+    return df["power_kw"].to_numpy(dtype=float)[held]
+
+
+def _sliding_dot(values, kernel):
+    """Returns the dot product of `kernel` with every full window of `values`."""
+    if len(kernel) < FFT_THRESHOLD:
+        return np.correlate(values, kernel, mode="valid")
+
+    n = len(values) + len(kernel) - 1
+    size = 1 << (n - 1).bit_length()
+    spectrum = np.fft.rfft(values, size) * np.fft.rfft(kernel[::-1], size)
+    full = np.fft.irfft(spectrum, size)[:n]
+    return full[len(kernel) - 1 : len(values)]
+
+
+def profile_costs(curve, profile, start, end=None, step=1):
+    """
+    Costs a load profile at every possible start time.
+
+    The price curve is sampled once per minute from `start` and correlated with
+    the profile, so every start minute is costed in a single convolution.
+
+    Parameters
+    ----------
+    curve : PriceCurve
+        Prices to run against.
+    profile : numpy.ndarray
+        Power draw [kW] for each minute of the cycle.
+    start : datetime
+        Earliest start time.
+    end : datetime, optional
+        Time the cycle must finish by, defaults to the end of the price data.
+    step : int
+        Spacing between returned start times [min].
+
+    Returns
+    -------
+    costs : pandas.DataFrame
+        `time` and `cost` [p] of each start time, NaN where the cycle would run
+        through a gap in the prices.
+
+    Raises
+    ------
+    ValueError
+        If the profile is empty.
+    """
+    if not len(profile):
+        raise ValueError("The load profile is empty.")
+
+    first = to_seconds(start) // 60 * 60
+    if end is not None:
+        finish = to_seconds(end)
+    else:
+        finish = curve.ends[-1] if len(curve) else first
+
+    minutes = np.arange(first, finish, 60, dtype=np.int64)
+    if len(minutes) < len(profile):
+        return pd.DataFrame({"time": to_datetimes([]), "cost": []})
+
+    prices = curve.price_at(minutes)
+    missing = np.isnan(prices)
+    costs = _sliding_dot(np.where(missing, 0.0, prices), profile) / 60
+
+    # Starts whose cycle overlaps a missing minute
+    gaps = np.concatenate(([0], np.cumsum(missing)))
+    costs[gaps[len(profile) :] - gaps[: -len(profile)] > 0] = np.nan
+
+    starts = minutes[: len(costs)][::step]
+    return pd.DataFrame({"time": to_datetimes(starts), "cost": costs[::step]})
@@ -0,0 +1,229 @@
+import functools
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+
+ENABLED = os.environ.get("AGILE_METRICS") == "1"
+
+# Latest samples kept per stage for percentiles
+WINDOW = 1024
+
+# Percentiles reported for each stage
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Minimum time between writes of the Prometheus file [s]
+WRITE_INTERVAL = 15.0
+
+_stages = {}
+_counts = Counter()
+_collectors = {}
+_lock = threading.Lock()
+_last_write = 0.0
+
+
+class Stage:
+    """Durations of one instrumented stage: recent samples and running totals."""
+
+    def __init__(self):
+        self.samples = deque(maxlen=WINDOW)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds):
+        with _lock:
+            self.samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+
+def _stage(name):
+    stage = _stages.get(name)
+    if stage is None:
+        with _lock:
+            stage = _stages.setdefault(name, Stage())
+    return stage
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stage.record(time.perf_counter() - self.start)
+
+
+_disabled = nullcontext()
+
+
+def timer(name):
+    """
+    Returns a context manager timing its block as stage `name`.
+
+    When metrics are disabled a shared no-op context is returned.
+    """
+    if not ENABLED:
+        return _disabled
+    return _Timer(_stage(name))
+
+
+def timed(name):
+    """
+    Decorates a function to time each call as stage `name`.
+
+    When metrics are disabled the function is returned undecorated, so calls
+    cost nothing extra.
+    """
+
+    def decorate(func):
+        if not ENABLED:
+            return func
+        stage = _stage(name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stage.record(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
+
+
+def count(name, n=1):
+    """Adds `n` to counter `name`."""
+    if ENABLED:
+        with _lock:
+            _counts[name] += n
+
+
+def register(name, collect):
+    """
+    Exports the counts returned by `collect()` as counters prefixed by `name`.
+
+    e.g. `register("price_cache", cache.stats)` exports `price_cache_hits`.
+    """
+    _collectors[name] = collect
+
+
+def counters():
+    """Returns every counter, including those of registered collectors."""
+    with _lock:
+        values = dict(_counts)
+    for prefix, collect in list(_collectors.items()):
+        for name, value in collect().items():
+            values[f"{prefix}_{name}"] = value
+    return dict(sorted(values.items()))
+
+
+def summary():
+    """
+    Returns the latency of each stage.
+
+    Returns
+    -------
+    stages : dict
+        Per stage, the call `count`, `total` time [s] and the `QUANTILES` of
+        the latest `WINDOW` durations [s], keyed by quantile.
+    """
+    with _lock:
+        snapshot = {
+            name: (np.array(stage.samples), stage.count, stage.total)
+            for name, stage in _stages.items()
+        }
+    stages = {}
+    for name, (samples, calls, total) in sorted(snapshot.items()):
+        if not calls:
+            continue
+        quantiles = np.quantile(samples, QUANTILES)
+        stages[name] = {
+            "count": calls,
+            "total": total,
+            **dict(zip(QUANTILES, quantiles.tolist(), strict=True)),
+        }
+    return stages
+
+
+def prometheus_text():
+    """Formats the stages and counters in the Prometheus text exposition format."""
+    lines = [
+        "# HELP agile_stage_seconds Time spent in each instrumented stage.",
+        "# TYPE agile_stage_seconds summary",
+    ]
+    for name, stage in summary().items():
+        for q in QUANTILES:
+            lines.append(
+                f'agile_stage_seconds{{stage="{name}",quantile="{q}"}} {stage[q]:.6g}'
+            )
+        lines.append(f'agile_stage_seconds_sum{{stage="{name}"}} {stage["total"]:.6g}')
+        lines.append(f'agile_stage_seconds_count{{stage="{name}"}} {stage["count"]}')
+
+    lines += [
+        "# HELP agile_events_total Number of instrumented events.",
+        "# TYPE agile_events_total counter",
+    ]
+    for name, value in counters().items():
+        lines.append(f'agile_events_total{{event="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def metrics_path():
+    """
+    Returns the Prometheus file, `AGILE_METRICS_FILE` or `metrics.prom` in the
+    data directory.
+    """
+    path = os.environ.get("AGILE_METRICS_FILE")
+    if path:
+        return Path(path)
+    from price_store import DATA_DIR
+
+    return DATA_DIR / "metrics.prom"
+
+
+def write_prometheus(path=None, force=False):
+    """
+    Writes the metrics for a node exporter textfile collector or scraper.
+
+    Writes are skipped within `WRITE_INTERVAL` of the previous one unless
+    `force`d. The file is replaced atomically, so a scrape never reads a
+    partial file.
+    """
+    global _last_write
+    if not ENABLED:
+        return
+    now = time.monotonic()
+    if not force and now - _last_write < WRITE_INTERVAL:
+        return
+    _last_write = now
+
+    path = Path(path or metrics_path())
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f".{path.name}.{os.getpid()}")
+        partial.write_text(prometheus_text())
+        os.replace(partial, path)
+    except OSError:
+        pass
+
+
+def reset():
+    """Clears the samples of every stage and every counter."""
+    with _lock:
+        for stage in _stages.values():
+            stage.samples.clear()
+            stage.count = 0
+            stage.total = 0.0
+        _counts.clear()
@@ -0,0 +1,170 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytz
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+london_timezone = pytz.timezone("Europe/London")
+
+# The API accepts up to 1500 results per page, which covers a month of
+# half-hourly slots in a single round trip.
+PAGE_SIZE = 1500
+TIMEOUT = 30
+
+# Point `OCTOPUS_API_BASE` at a stand-in server, e.g. `benchmarks.octopus_stub`,
+# to run the dashboard without the real API.
+DEFAULT_API_BASE = "https://api.octopus.energy/v1"
+API_BASE = os.environ.get("OCTOPUS_API_BASE", DEFAULT_API_BASE).rstrip("/")
+
+RATE_COLUMNS = ["value_exc_vat", "value_inc_vat", "valid_from", "valid_to"]
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Returns the shared HTTP session used for all API calls.
+
+    The session keeps connections alive between requests and advertises gzip
+    support, so repeated fetches and paginated requests reuse one TLS connection.
+    Concurrent first calls, e.g. from `fetch_all` workers, create only one.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(
+                    {
+                        "Accept": "application/json",
+                        "Accept-Encoding": "gzip, deflate",
+                        "Connection": "keep-alive",
+                    }
+                )
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def rates_url(product, tariff, base=None):
+    """
+    Returns the `standard-unit-rates/` URL of a tariff.
+
+    Gas tariff codes start with `G-`, electricity ones with `E-`. The URL is
+    built on `base`, defaulting to `API_BASE`.
+    """
+    fuel = "gas" if tariff.startswith("G-") else "electricity"
+    base = (base or API_BASE).rstrip("/")
+    return f"{base}/products/{product}/{fuel}-tariffs/{tariff}/standard-unit-rates/"
+
+
+def _format_period(value):
+    """Formats a period bound in the ISO 8601 UTC form expected by the API."""
+    if isinstance(value, str):
+        return value
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(london_timezone)
+    return timestamp.tz_convert("UTC").strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def iter_pages(
+    url, period_from=None, period_to=None, page_size=PAGE_SIZE, session=None, auth=None
+):
+    """
+    Yields the `results` list of each page of a paginated API endpoint.
+
+    Parameters
+    ----------
+    url : str
+        Endpoint URL, e.g. a tariff's `standard-unit-rates/` URL.
+    period_from, period_to : datetime or str, optional
+        Time window to request. Naive datetimes are taken as London time.
+    page_size : int
+        Number of results requested per page.
+    session : requests.Session, optional
+        Session to use, defaults to the shared keep-alive session.
+    auth : tuple, optional
+        Credentials for endpoints that need an API key, e.g. `(api_key, "")`.
+    """
+    session = session or get_session()
+    params = {"page_size": page_size}
+    if period_from is not None:
+        params["period_from"] = _format_period(period_from)
+    if period_to is not None:
+        params["period_to"] = _format_period(period_to)
+
+    while url:
+        with metrics.timer("api_request"):
+            response = session.get(url, params=params, timeout=TIMEOUT, auth=auth)
+        metrics.count("api_requests")
+        response.raise_for_status()
+        with metrics.timer("api_json"):
+            data = response.json()
+        yield data.get("results", [])
+
+        # The `next` link already carries the query string
+        url = data.get("next")
+        params = None
+
+
+@metrics.timed("parse_rates")
+def parse_rates(results):
+    """
+    Converts raw API rate records into a DataFrame sorted by `valid_from`
+
+    Times are parsed as UTC and converted to London time.
+    """
+    df = pd.DataFrame.from_records(results)
+    for column in RATE_COLUMNS:
+        if column not in df:
+            df[column] = pd.Series(dtype="float64" if "value" in column else "object")
+
+    for column in ("valid_from", "valid_to"):
+        df[column] = pd.to_datetime(
+            df[column], utc=True, format="ISO8601"
+        ).dt.tz_convert(london_timezone)
+
+    return df.sort_values(by="valid_from", ignore_index=True)
+
+
+def fetch_rates(
+    url, period_from=None, period_to=None, page_size=PAGE_SIZE, session=None
+):
+    """
+    Fetches every rate in a time window, following the API's pagination.
+
+    Parameters
+    ----------
+    url : str
+        Endpoint URL, e.g. a tariff's `standard-unit-rates/` URL.
+    period_from, period_to : datetime or str, optional
+        Time window to request. Without a window the API returns the full history.
+    page_size : int
+        Number of results requested per page.
+    session : requests.Session, optional
+        Session to use, defaults to the shared keep-alive session.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        Rates sorted by `valid_from`, with London-time `valid_from`/`valid_to`.
+    """
+    results = []
+    for page in iter_pages(url, period_from, period_to, page_size, session):
+        results.extend(page)
+    return parse_rates(results)
+
+
+def start_of_day(days_ago=0):
+    """Returns London midnight `days_ago` days before today."""
+    day = datetime.now(london_timezone).date() - timedelta(days=days_ago)
+    return london_timezone.localize(datetime.combine(day, datetime.min.time()))
@@ -0,0 +1,138 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from octopus_api import london_timezone
+from price_curve import to_seconds
+
+
+def _seconds(duration):
+    """Converts a timedelta, or a number of minutes, to whole seconds."""
+    if isinstance(duration, timedelta | pd.Timedelta):
+        return round(duration.total_seconds())
+    return round(duration * 60)
+
+
+def to_datetimes(seconds):
+    """Converts epoch seconds to a London-time DatetimeIndex."""
+    return pd.to_datetime(seconds, unit="s", utc=True).tz_convert(london_timezone)
+
+
+def scan_start_times(
+    curve, duration, start, end=None, step=timedelta(minutes=30), power=1.0, k=3
+):
+    """
+    Costs every candidate start time of a fixed-length run at once.
+
+    Candidates are spaced `step` apart from `start`, up to the last start that
+    still finishes within the price data (or by `end`), and are all costed in
+    one vectorized pass over the curve's prefix sums.
+
+    Parameters
+    ----------
+    curve : PriceCurve
+        Prices to run against.
+    duration : timedelta or float
+        Run length, as a timedelta or in minutes.
+    start : datetime
+        Earliest start time.
+    end : datetime, optional
+        Time the run must finish by, defaults to the end of the price data.
+    step : timedelta or float
+        Spacing between candidate starts, as a timedelta or in minutes.
+    power : float
+        Power draw [kW].
+    k : int
+        Number of cheapest starts to return.
+
+    Returns
+    -------
+    costs : pandas.DataFrame
+        `time` and `cost` [p] of every candidate start.
+    best : pandas.DataFrame
+        The `k` cheapest rows of `costs`, cheapest first.
+    """
+    run = _seconds(duration)
+    first = to_seconds(start)
+    if end is not None:
+        finish = to_seconds(end)
+    else:
+        finish = curve.ends[-1] if len(curve) else first
+
+    starts = np.arange(first, finish - run + 1, _seconds(step), dtype=np.int64)
+    costs = pd.DataFrame(
+        {"time": to_datetimes(starts), "cost": curve.cost(starts, starts + run, power)}
+    )
+    best = costs.dropna().nsmallest(k, "cost", keep="first")
+    return costs, best
+
+
+def optimise_wash_dry(
+    curve,
+    wash_time,
+    dry_time,
+    start,
+    wash_power,
+    dry_power,
+    gap=0,
+    end=None,
+    step=timedelta(minutes=5),
+):
+    """
+    Finds the wash start time that minimises the combined wash and dry cost.
+
+    The dry phase starts `gap` after the wash finishes. Durations are used
+    exactly rather than rounded to whole price slots, and both phases of every
+    candidate start are costed with sliding windows over the curve's prefix sums.
+
+    Parameters
+    ----------
+    curve : PriceCurve
+        Prices to run against.
+    wash_time, dry_time, gap : timedelta or float
+        Phase lengths and the pause between them, as timedeltas or in minutes.
+    start : datetime
+        Earliest wash start time.
+    wash_power, dry_power : float
+        Power draw of each phase [kW].
+    end : datetime, optional
+        Time the dry must finish by, defaults to the end of the price data.
+    step : timedelta or float
+        Spacing between candidate starts, as a timedelta or in minutes.
+
+    Returns
+    -------
+    costs : pandas.DataFrame
+        `time`, `wash_cost`, `dry_cost` and total `cost` [p] of every candidate.
+    best : pandas.Series or None
+        The cheapest candidate, with its `dry_start` and `dry_end` times, or
+        `None` if the cycle does not fit in the price data.
+    """
+    wash, dry, pause = _seconds(wash_time), _seconds(dry_time), _seconds(gap)
+    first = to_seconds(start)
+    if end is not None:
+        finish = to_seconds(end)
+    else:
+        finish = curve.ends[-1] if len(curve) else first
+
+    starts = np.arange(first, finish - (wash + pause + dry) + 1, _seconds(step))
+    dry_starts = starts + wash + pause
+    wash_cost = curve.cost(starts, starts + wash, wash_power)
+    dry_cost = curve.cost(dry_starts, dry_starts + dry, dry_power)
+
+    costs = pd.DataFrame(
+        {
+            "time": to_datetimes(starts),
+            "wash_cost": wash_cost,
+            "dry_cost": dry_cost,
+            "cost": wash_cost + dry_cost,
+        }
+    )
+    if costs["cost"].isna().all():
+        return costs, None
+
+    best = costs.loc[costs["cost"].idxmin()].copy()
+    best["dry_start"] = best["time"] + pd.Timedelta(seconds=wash + pause)
+    best["dry_end"] = best["dry_start"] + pd.Timedelta(seconds=dry)
+    return costs, best
@@ -0,0 +1,150 @@
+import io
+from datetime import datetime as dtime
+from datetime import timedelta
+
+import plotly.graph_objects as go
+import streamlit as st
+
+from agile_home_dashboard import fetch_data, instrumented, load_css
+from consumption import (
+    bills,
+    consumption_url,
+    iter_api_consumption,
+    iter_csv_consumption,
+    iter_json_consumption,
+    join_prices,
+    load_consumption,
+)
+from octopus_api import london_timezone
+from regions import DEFAULT_REGION, tariff_urls
+
+load_css()
+
+
+# Parsed readings are kept for an hour, for a few files or meters
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def load_files(files):
+    """Parses `(name, contents)` of exports and saved pages, cached on both."""
+    csvs = [io.BytesIO(data) for name, data in files if name.endswith(".csv")]
+    pages = [io.BytesIO(data) for name, data in files if name.endswith(".json")]
+    chunks = [chunk for f in csvs for chunk in iter_csv_consumption(f)]
+    return load_consumption([*chunks, *iter_json_consumption(pages)])
+
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner="Downloading readings...")
+def download_readings(mpan, serial, api_key, period_from):
+    """Downloads a meter's readings, cached on the meter, key and period."""
+    return load_consumption(
+        iter_api_consumption(consumption_url(mpan, serial), api_key, period_from)
+    )
+
+
+def read_uploads():
+    """Loads readings from uploaded CSV exports or saved consumption pages."""
+    files = st.file_uploader(
+        "Consumption CSV exports or saved API pages:",
+        type=["csv", "json"],
+        accept_multiple_files=True,
+    )
+    if not files:
+        return None
+    return load_files(tuple((f.name, f.getvalue()) for f in files))
+
+
+def read_api():
+    """Loads readings from the consumption endpoint once its details are given."""
+    col1, col2, col3, col4 = st.columns(4)
+    mpan = col1.text_input("MPAN:")
+    serial = col2.text_input("Meter serial number:")
+    api_key = col3.text_input("API key:", type="password")
+    days = col4.number_input("Days of history:", value=365, min_value=1, step=30)
+    if not (mpan and serial and api_key):
+        return None
+
+    today = dtime.now(london_timezone).date()
+    period_from = london_timezone.localize(
+        dtime.combine(today - timedelta(days=days), dtime.min.time())
+    )
+    return download_readings(mpan.strip(), serial.strip(), api_key.strip(), period_from)
+
+
+def display_totals(joined):
+    priced = joined["price"].notna()
+    cost = joined["cost"].sum()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total cost", f"£{cost / 100:.2f}")
+    col2.metric("Electricity used", f"{joined['consumption'].sum():.0f} kWh")
+    col3.metric(
+        "Average unit rate",
+        f"{cost / joined['consumption'][priced].sum():.2f} p/kWh"
+        if priced.any()
+        else "-",
+    )
+
+
+def plot_daily(daily):
+    fig = go.Figure(
+        go.Bar(
+            x=daily.index,
+            y=daily["cost"] / 100,
+            marker_color=st.session_state.marker,
+            name="Cost",
+        )
+    )
+    fig.update_layout(
+        plot_bgcolor=st.session_state.bg_color,
+        font=dict(color=st.session_state.font, size=14),
+        title=dict(text="Daily Cost", font=dict(color=st.session_state.font)),
+        yaxis=dict(title="Cost [£]"),
+        hovermode="x unified",
+    )
+    st.plotly_chart(fig)
+
+
+@instrumented("bills")
+def main():
+    st.title("Electricity Bills on Agile")
+
+    source = st.radio(
+        "Readings from:", options=["File", "Octopus API"], index=0, horizontal=True
+    )
+    readings = read_uploads() if source == "File" else read_api()
+    if readings is None:
+        return
+    if readings.empty:
+        st.warning("No readings found.")
+        return
+
+    url = tariff_urls(st.session_state.get("region", DEFAULT_REGION))["agile"]
+    with st.spinner("Loading prices..."):
+        prices = fetch_data(
+            url,
+            readings["interval_start"].iloc[0],
+            readings["interval_start"].iloc[-1] + timedelta(minutes=30),
+        )
+    if prices is None or prices.empty:
+        st.warning("No prices available for these readings.")
+        return
+
+    joined = join_prices(readings, prices)
+    totals = bills(joined)
+    display_totals(joined)
+
+    monthly = totals["monthly"].assign(cost=totals["monthly"]["cost"] / 100)
+    st.dataframe(
+        monthly.rename(
+            columns={
+                "consumption": "Use [kWh]",
+                "cost": "Cost [£]",
+                "unpriced": "Unpriced readings",
+                "unit_rate": "Unit rate [p/kWh]",
+            }
+        ).round(2)
+    )
+    plot_daily(totals["daily"])
+    st.caption("Agile unit rates only; standing charges are not included.")
+
+
+# Run the application
+if __name__ == "__main__":
+    main()
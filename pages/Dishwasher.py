@@ -1,53 +1,20 @@
-from datetime import timedelta
-
 import pandas as pd
 import streamlit as st
 
-from agile_home_dashboard import get_current_cost, get_current_time, load_css
+from agile_home_dashboard import (
+    get_current_time,
+    instrumented,
+    load_css,
+    session_prices,
+)
+from load_profiles import PROFILES, load_profile_csv, profile_costs
+from optimise import scan_start_times
+from price_curve import price_curve
+from window_table import window_table
 
 load_css()
 
 
-def calculate_total_cost(dishwasher_time, df, current_time):
-    """
-    Calculate the total electricity cost for running a dishwasher.
-
-    This function computes the cost by breaking the dishwasher runtime into
-    half-hour segments and applying the appropriate electricity price for each segment.
-
-    Parameters:
-    -----------
-    df : pandas.DataFrame
-        DataFrame containing electricity price data.
-    current_time : datetime
-        The starting time for the calculation.
-    dishwasher_time : int or float
-        The total runtime of the dishwasher in minutes.
-
-    Returns:
-    --------
-    float
-        The total cost of electricity for running the dishwasher.
-        Cost is calculated as (price * time_in_minutes).
-    """
-    total_cost = 0
-    remaining_time = dishwasher_time
-
-    while remaining_time > 0:
-        current_price = get_current_cost(df, current_time)[0]
-        time_to_next_half_hour = 30 - current_time.minute % 30
-        time_slice = min(remaining_time, time_to_next_half_hour)
-
-        # Compute costs, decrement remaining time
-        total_cost += current_price * time_slice  # / 6000
-        remaining_time -= time_slice
-
-        # Shift current time
-        current_time += timedelta(minutes=time_slice)
-
-    return total_cost
-
-
 def display_washer_timing(end_time, end_at):
     st.markdown(
         """
@@ -70,40 +37,82 @@ def display_washer_timing(end_time, end_at):
     )
 
 
+@instrumented("dishwasher")
 def main():
     st.title("Dishwasher Pricing on Octopus Agile")
 
-    if st.session_state.df is not None:
+    df = session_prices().agile
+    if df is not None:
         toggle = st.toggle("Select time manually", False)
-        current_time = get_current_time(toggle, st.session_state.df)
-        remaining_time = current_time
-        dishwasher_time = st.text_input("Enter time (HH:MM):", value="03:47")
-
-        try:
-            hours, minutes = map(int, dishwasher_time.split(":"))
-            dishwasher_time = hours * 60 + minutes
-        except ValueError:
-            st.error("Invalid time format. Please use HH:MM format.")
-
-        dish_costs = pd.DataFrame(columns=["time", "cost"])
-
-        while (
-            remaining_time + timedelta(minutes=dishwasher_time)
-            <= st.session_state.df["valid_to"].max()
+        current_time = get_current_time(toggle, df)
+        profile_name = st.selectbox(
+            "Power profile:",
+            options=["Constant power", "Dishwasher", "Eco dishwasher", "Upload CSV"],
+        )
+
+        if profile_name == "Constant power":
+            dishwasher_time = st.text_input("Enter time (HH:MM):", value="03:47")
+
+            try:
+                hours, minutes = map(int, dishwasher_time.split(":"))
+                dishwasher_time = hours * 60 + minutes
+            except ValueError:
+                st.error("Invalid time format. Please use HH:MM format.")
+                return
+        elif profile_name == "Upload CSV":
+            profile_file = st.file_uploader(
+                "Profile CSV with a `power_kw` value per minute:", type="csv"
+            )
+            if profile_file is None:
+                return
+            try:
+                profile = load_profile_csv(profile_file)
+            except ValueError as e:
+                st.error(str(e))
+                return
+        else:
+            profile = PROFILES[profile_name]
+
+        granularity = st.select_slider(
+            "Start time granularity [min]:", options=[5, 10, 15, 30], value=30
+        )
+
+        table = window_table(df)
+        if profile_name == "Constant power" and table.covers(
+            dishwasher_time, current_time
         ):
-            cost = calculate_total_cost(
-                dishwasher_time, st.session_state.df, remaining_time
+            # Looked up in the table precomputed for these prices
+            dish_costs = table.costs_from(dishwasher_time, current_time, granularity)
+            best = table.cheapest(dishwasher_time, current_time, step=granularity)
+            best_starts = pd.DataFrame([best] if best else [], columns=["time", "cost"])
+        elif profile_name == "Constant power":
+            dish_costs, best_starts = scan_start_times(
+                price_curve(df),
+                dishwasher_time,
+                current_time,
+                step=granularity,
             )
-            dish_costs = pd.concat(
-                [dish_costs, pd.DataFrame({"time": [remaining_time], "cost": [cost]})]
+        else:
+            dish_costs = profile_costs(
+                price_curve(df),
+                profile,
+                current_time,
+                step=granularity,
             )
-            remaining_time += timedelta(minutes=30)
+            best_starts = dish_costs.dropna().nsmallest(3, "cost")
+            st.write(
+                f"Cycle length: {len(profile) // 60}h {len(profile) % 60:02d}m, "
+                f"using {profile.sum() / 60:.2f} kWh"
+            )
+
+        if best_starts.empty:
+            st.warning("Not enough data available for the selected dishwasher time.")
+            return
 
-        dish_costs.reset_index(drop=True, inplace=True)
-        min_cost_loc = dish_costs["cost"].idxmin()
-        delay = dish_costs.loc[min_cost_loc]["time"] - current_time
+        delay = best_starts.iloc[0]["time"] - current_time
 
         st.write(f"Delay the dishwasher: {delay.total_seconds() / 3600} hours")
+        st.line_chart(dish_costs, x="time", y="cost")
     else:
         st.error("API key not found.")
 
@@ -0,0 +1,192 @@
+from datetime import datetime as dtime
+from datetime import timedelta
+
+import plotly.graph_objects as go
+import streamlit as st
+
+from agile_home_dashboard import fetch_data, instrumented, load_css
+from octopus_api import london_timezone
+from price_history import downsample, history_aggregates
+from regions import DEFAULT_REGION, tariff_urls
+
+load_css()
+
+RANGES = {"1 month": 30, "3 months": 91, "1 year": 365}
+
+
+def select_range():
+    """Returns the first and last day of the selected history range."""
+    today = dtime.now(london_timezone).date()
+    choice = st.radio("Range:", options=[*RANGES, "Custom"], index=1, horizontal=True)
+    if choice != "Custom":
+        return today - timedelta(days=RANGES[choice]), today
+
+    selected = st.date_input(
+        "Dates:",
+        value=(today - timedelta(days=30), today),
+        max_value=today + timedelta(days=1),
+    )
+    if len(selected) != 2:
+        st.stop()
+    return selected
+
+
+def load_history(first_day, last_day):
+    """Loads rates for whole London days, backfilling the store in bulk."""
+
+    def midnight(day):
+        return london_timezone.localize(dtime.combine(day, dtime.min.time()))
+
+    url = tariff_urls(st.session_state.get("region", DEFAULT_REGION))["agile"]
+    return fetch_data(url, midnight(first_day), midnight(last_day + timedelta(1)))
+
+
+def style(fig, title, y_title="Price [p/kWh]"):
+    fig.update_layout(
+        plot_bgcolor=st.session_state.bg_color,
+        font=dict(color=st.session_state.font, size=14),
+        title=dict(text=title, font=dict(color=st.session_state.font)),
+        xaxis=dict(tickfont=dict(color=st.session_state.font)),
+        yaxis=dict(
+            title=y_title,
+            title_font=dict(color=st.session_state.font),
+            tickfont=dict(color=st.session_state.font),
+        ),
+        hovermode="x unified",
+        legend=dict(orientation="h", y=-0.15),
+    )
+    st.plotly_chart(fig)
+
+
+def display_summary(summary):
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Mean", f"{summary['mean']:.2f} p")
+    col2.metric("Lowest", f"{summary['min']:.2f} p")
+    col3.metric("Highest", f"{summary['max']:.2f} p")
+    col4.metric("Negative slots", f"{summary['negative']:.1%}")
+    col5.metric("Peak spread", f"{summary['spread']:.2f} p")
+
+
+def plot_daily(daily, weekly):
+    fig = go.Figure()
+    fig.add_trace(
+        go.Scatter(x=daily.index, y=daily["max"], line=dict(width=0), name="Daily max")
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=daily.index,
+            y=daily["min"],
+            line=dict(width=0),
+            fill="tonexty",
+            fillcolor="rgba(125, 189, 245, 0.35)",
+            name="Daily min",
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=daily.index,
+            y=daily["mean"],
+            line=dict(color=st.session_state.marker),
+            name="Daily mean",
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=weekly.index,
+            y=weekly["mean"],
+            line=dict(color=st.session_state.primary_color, shape="hv"),
+            name="Weekly mean",
+        )
+    )
+    style(fig, "Daily and Weekly Prices")
+
+
+def plot_spread(daily):
+    fig = go.Figure()
+    for column, name, color in (
+        ("peak", "Peak mean", st.session_state.primary_color),
+        ("off_peak", "Off-peak mean", st.session_state.marker),
+    ):
+        fig.add_trace(
+            go.Scatter(
+                x=daily.index, y=daily[column], name=name, line=dict(color=color)
+            )
+        )
+    fig.add_trace(
+        go.Scatter(
+            x=daily.index,
+            y=daily["spread"],
+            name="Spread",
+            line=dict(color=st.session_state.font, dash="dot"),
+        )
+    )
+    style(fig, "Peak and Off-peak Prices (16:00-19:00)")
+
+
+def plot_hourly(hourly):
+    fig = go.Figure()
+    hours = hourly.index
+    for low, high, opacity in ((0.1, 0.9, 0.2), (0.25, 0.75, 0.4)):
+        fig.add_trace(
+            go.Scatter(x=hours, y=hourly[high], line=dict(width=0), showlegend=False)
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=hours,
+                y=hourly[low],
+                line=dict(width=0),
+                fill="tonexty",
+                fillcolor=f"rgba(125, 189, 245, {opacity})",
+                name=f"{low:.0%}-{high:.0%}",
+            )
+        )
+    fig.add_trace(
+        go.Scatter(
+            x=hours,
+            y=hourly[0.5],
+            line=dict(color=st.session_state.primary_color),
+            name="Median",
+        )
+    )
+    fig.update_xaxes(title="Hour of day", dtick=2)
+    style(fig, "Prices by Hour of Day")
+
+
+def plot_prices(df):
+    prices = downsample(df.set_index("valid_from")["value_inc_vat"])
+    fig = go.Figure(
+        go.Scattergl(
+            x=prices.index,
+            y=prices,
+            line=dict(color=st.session_state.marker, width=1),
+            name="Price",
+        )
+    )
+    title = "Half-hourly Prices"
+    if len(prices) < len(df):
+        title += f" ({len(prices)} of {len(df)} slots shown)"
+    style(fig, title)
+
+
+@instrumented("history")
+def main():
+    st.title("Agile Price History")
+    first_day, last_day = select_range()
+
+    with st.spinner("Loading prices..."):
+        df = load_history(first_day, last_day)
+    if df is None or df.empty:
+        st.warning("No prices available for this range.")
+        return
+
+    aggregates = history_aggregates(df)
+    display_summary(aggregates["summary"])
+    plot_daily(aggregates["daily"], aggregates["weekly"])
+    plot_spread(aggregates["daily"])
+    plot_hourly(aggregates["hourly"])
+    plot_prices(df)
+
+
+# Run the application
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+import pandas as pd
+import streamlit as st
+
+from agile_home_dashboard import (
+    get_current_time,
+    instrumented,
+    load_css,
+    session_prices,
+)
+from scheduler import Job, schedule_jobs
+
+load_css()
+
+default_jobs = pd.DataFrame(
+    {
+        "Appliance": ["Dishwasher", "Washing machine", "Tumble dryer", "Oven"],
+        "Power [kW]": [2.0, 2.0, 2.5, 2.5],
+        "Run time [hr]": [3.75, 2.5, 3.0, 1.0],
+        "Earliest start [hr from now]": [0.0, 0.0, 2.5, 0.0],
+        "Finish within [hr]": [24.0, 24.0, 24.0, 12.0],
+    }
+)
+
+
+def jobs_from_table(jobs_table, current_time):
+    jobs_table = jobs_table.dropna()
+    return [
+        Job(
+            name=row["Appliance"],
+            power=row["Power [kW]"],
+            duration=timedelta(hours=row["Run time [hr]"]),
+            earliest=current_time
+            + timedelta(hours=row["Earliest start [hr from now]"]),
+            deadline=current_time + timedelta(hours=row["Finish within [hr]"]),
+        )
+        for _, row in jobs_table.iterrows()
+    ]
+
+
+@instrumented("household_scheduler")
+def main():
+    st.title("Household Scheduling on Octopus Agile")
+
+    df = session_prices().agile
+    if df is not None:
+        toggle = st.toggle("Select time manually", False)
+        current_time = get_current_time(toggle, df)
+        if current_time is not None:
+            power_cap = st.number_input(
+                "Household power limit [kW]:", value=7.0, min_value=0.1
+            )
+            jobs_table = st.data_editor(
+                default_jobs, num_rows="dynamic", hide_index=True
+            )
+
+            try:
+                schedule = schedule_jobs(
+                    df,
+                    jobs_from_table(jobs_table, current_time),
+                    power_cap,
+                )
+            except ValueError as e:
+                st.warning(str(e))
+                return
+
+            st.dataframe(
+                schedule.assign(
+                    start=schedule["start"].dt.strftime("%d-%m-%y %H:%M"),
+                    end=schedule["end"].dt.strftime("%d-%m-%y %H:%M"),
+                    cost=schedule["cost"].round(1),
+                ).rename(
+                    columns={
+                        "name": "Appliance",
+                        "start": "Start",
+                        "end": "End",
+                        "power": "Power [kW]",
+                        "cost": "Cost [p]",
+                    }
+                ),
+                hide_index=True,
+            )
+            st.write(f"Total cost: £{schedule['cost'].sum() / 100:.2f}")
+        else:
+            st.markdown("##")
+    else:
+        st.error("API key not found.")
+
+
+# Run the application
+if __name__ == "__main__":
+    main()
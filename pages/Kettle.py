@@ -1,12 +1,26 @@
 from datetime import datetime as dtime
 from datetime import timedelta
 
+import numpy as np
 import plotly.graph_objects as go
 import pytz
 import streamlit as st
 
-from agile_home_dashboard import get_current_cost, get_current_time, load_css
-from utils import cp, fit_kettle_efficiency, kettle_energy, kettle_timing
+from agile_home_dashboard import (
+    get_current_cost,
+    get_current_time,
+    instrumented,
+    load_css,
+    session_prices,
+)
+from price_curve import price_curve
+from utils import (
+    cp,
+    fit_kettle_efficiency,
+    kettle_boil_time,
+    kettle_energy,
+    kettle_timing,
+)
 
 load_css()
 
@@ -106,14 +120,14 @@ def get_cheapest_time(df, forward_time):
         hours=forward_time
     )
 
-    df_time = df[
-        (df["valid_from"] <= target_end) & (df["valid_from"] >= target_start)
-    ].copy()
+    curve = price_curve(df)
+    window = curve.between(target_start, target_end)
 
-    if df_time.empty:
+    if window.start == window.stop:
         return None
     else:
-        return df_time.loc[df_time["value_inc_vat"].idxmin()]
+        cheapest = window.start + np.argmin(curve.prices[window])
+        return df.iloc[curve.rows[cheapest]]
 
 
 # Function to plot kettle timing
@@ -173,9 +187,11 @@ st.markdown(
 )
 
 
+@instrumented("kettle")
 def main():
     st.title("Kettle Pricing on Octopus Agile")
-    if st.session_state.df is not None:
+    df = session_prices().agile
+    if df is not None:
         st.markdown(
             f"""
                 <div style="
@@ -218,9 +234,9 @@ def main():
 
         # Toggle for manual time selection
         toggle = st.toggle("Select time manually", False)
-        current_time = get_current_time(toggle, st.session_state.df)
+        current_time = get_current_time(toggle, df)
         current_price, next_price, current_cost_row, next_cost_row = get_current_cost(
-            st.session_state.df, current_time
+            df, current_time
         )
 
         (
@@ -239,6 +255,12 @@ def main():
             )
         else:
             st.write("No pricing data available for the current time.")
+
+        seconds, seconds_std = kettle_boil_time(init_temperature, mass)
+        st.write(
+            f"Boils in about {seconds // 60:.0f} min {seconds % 60:.0f} s "
+            f"(± {seconds_std:.0f} s)"
+        )
         st.write("Select the length of time in the future to optimize the kettle boil.")
         col1, col2, col3 = st.columns([2, 1, 1], vertical_alignment="center")
         with col1:
@@ -246,7 +268,7 @@ def main():
                 "Forward time [hr]:", value=1.0, step=0.5, label_visibility="collapsed"
             )
         with col2:
-            cheapest_time = get_cheapest_time(st.session_state.df, forward_time)
+            cheapest_time = get_cheapest_time(df, forward_time)
             st.markdown(
                 f"""
                     <div style="display: flex; justify-content: center;padding-bottom:15px;">
@@ -1,11 +1,31 @@
+import math
+from datetime import timedelta
+
 import streamlit as st
 
-from agile_home_dashboard import get_current_cost, get_current_time, load_css
+from agile_home_dashboard import (
+    get_current_cost,
+    get_current_time,
+    instrumented,
+    load_css,
+    session_prices,
+)
+from price_curve import price_curve
 
 load_css()
 
 
+def format_value(value, template):
+    """Formats a price or cost into `template`, or notes it has no price data."""
+    if value is None or math.isnan(value):
+        return "no price data"
+    return template.format(value)
+
+
 def display_oven_costs(current_price, next_price, cost_now, current_cost_row):
+    current_price = format_value(current_price, "{:.4f} p/kWh")
+    next_price = format_value(next_price, "{:.4f} p/kWh")
+    cost_now = format_value(cost_now, "£{:.4f}")
     col1, col2, col3 = st.columns(3)
 
     with col1:
@@ -13,7 +33,7 @@ def display_oven_costs(current_price, next_price, cost_now, current_cost_row):
             f"""
             <div style="{st.session_state.col_format}">
                 <strong style="font-size: 1.2em;">Current Energy Cost</strong><br>
-                <span style="font-size: 1.4em;">{current_price:.4f} p/kWh</span>
+                <span style="font-size: 1.4em;">{current_price}</span>
             </div>
             """,
             unsafe_allow_html=True,
@@ -24,7 +44,7 @@ def display_oven_costs(current_price, next_price, cost_now, current_cost_row):
             f"""
                 <div style="{st.session_state.col_format}">
                     <strong style="font-size: 1.2em;">Next Energy Cost</strong><br>
-                    <span style="font-size: 1.4em;">{next_price:.4f} p/kWh</span>
+                    <span style="font-size: 1.4em;">{next_price}</span>
                 </div>
                 """,
             unsafe_allow_html=True,
@@ -35,7 +55,7 @@ def display_oven_costs(current_price, next_price, cost_now, current_cost_row):
             f"""
                 <div style="{st.session_state.col_format}">
                     <strong style="font-size: 1.2em;">Total Oven Cost</strong><br>
-                    <span style="font-size: 1.4em;">£{cost_now:.4f}</span>
+                    <span style="font-size: 1.4em;">{cost_now}</span>
                 </div>
                 """,
             unsafe_allow_html=True,
@@ -63,12 +83,16 @@ st.markdown(
 )
 
 
+@instrumented("oven")
 def main():
     st.title("Oven Pricing on Octopus Agile")
 
-    if st.session_state.df is not None:
+    df = session_prices().agile
+    if df is not None:
         toggle = st.toggle("Select time manually", False)
-        current_time = get_current_time(toggle, st.session_state.df)
+        current_time = get_current_time(toggle, df)
+        if current_time is None:
+            return
 
         st.markdown(
             f"""
@@ -87,21 +111,14 @@ def main():
         )
         oven_power = 2.5  # kW
         current_price, next_price, current_cost_row, _ = get_current_cost(
-            st.session_state.df, current_time
+            df, current_time
         )
-        time_to_next_half_hour = 30 - current_time.minute % 30
-
-        if time_to_next_half_hour > bake_time:
-            cost = oven_power * current_price * (bake_time) / 6000  # £
-        else:
-            cost = (
-                oven_power
-                * (
-                    current_price * time_to_next_half_hour
-                    + next_price * (bake_time - time_to_next_half_hour)
-                )
-                / 6000
-            )  # £
+        cost = (
+            price_curve(df).cost(
+                current_time, current_time + timedelta(minutes=bake_time), oven_power
+            )
+            / 100
+        )  # £
 
         display_oven_costs(
             current_price,
@@ -0,0 +1,111 @@
+from datetime import datetime as dtime
+from datetime import timedelta
+
+import plotly.graph_objects as go
+import streamlit as st
+
+from agile_home_dashboard import fetch_all, instrumented, load_css
+from octopus_api import london_timezone
+from regions import DEFAULT_REGION, tariff_urls
+from tariff_compare import SHAPES, compare_tariffs, household_profile
+
+load_css()
+
+RANGES = {"1 month": 30, "3 months": 91, "1 year": 365}
+
+
+def load_rates(days):
+    """Loads Agile and Tracker rates for the last `days` whole London days."""
+    today = dtime.now(london_timezone).date()
+    first = london_timezone.localize(
+        dtime.combine(today - timedelta(days=days), dtime.min.time())
+    )
+    last = london_timezone.localize(dtime.combine(today, dtime.min.time()))
+    urls = tariff_urls(st.session_state.get("region", DEFAULT_REGION))
+    return fetch_all(urls, first, last)
+
+
+def display_totals(summary):
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Agile", f"£{summary['agile'] / 100:.2f}")
+    col2.metric("Tracker", f"£{summary['tracker'] / 100:.2f}")
+    col3.metric("Agile minus Tracker", f"£{summary['difference'] / 100:.2f}")
+    col4.metric("Days Agile was cheaper", f"{summary['agile_cheaper_days']:.0%}")
+
+
+def plot_difference(daily):
+    fig = go.Figure()
+    fig.add_trace(
+        go.Bar(
+            x=daily.index,
+            y=daily["difference"] / 100,
+            marker_color=st.session_state.marker,
+            name="Daily",
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=daily.index,
+            y=daily["cumulative"] / 100,
+            line=dict(color=st.session_state.primary_color, width=2),
+            name="Cumulative",
+        )
+    )
+    fig.update_layout(
+        plot_bgcolor=st.session_state.bg_color,
+        font=dict(color=st.session_state.font, size=14),
+        title=dict(
+            text="Agile minus Tracker Cost", font=dict(color=st.session_state.font)
+        ),
+        yaxis=dict(title="Difference [£]"),
+        hovermode="x unified",
+        legend=dict(orientation="h", y=-0.15),
+    )
+    st.plotly_chart(fig)
+
+
+@instrumented("tariff_comparison")
+def main():
+    st.title("Agile vs Tracker")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        days = RANGES[st.radio("Range:", options=list(RANGES), index=1)]
+    with col2:
+        electricity = st.number_input(
+            "Daily electricity use [kWh]:", value=8.0, min_value=0.0
+        )
+        shape = st.selectbox("Usage pattern:", options=list(SHAPES), index=1)
+    with col3:
+        gas = st.number_input("Daily gas use [kWh]:", value=30.0, min_value=0.0)
+        gas_on_tracker = st.toggle("Gas on Tracker with Agile", True)
+        gas_rate = None
+        if not gas_on_tracker:
+            gas_rate = st.number_input("Gas unit rate with Agile [p/kWh]:", value=6.0)
+
+    with st.spinner("Loading prices..."):
+        rates = load_rates(days)
+    if any(df is None or df.empty for df in rates.values()):
+        st.warning("Agile and Tracker prices are not available for this range.")
+        return
+
+    comparison = compare_tariffs(
+        rates["agile"],
+        rates["tracker_e"],
+        rates["tracker_g"],
+        household_profile(electricity, shape),
+        gas,
+        gas_rate,
+    )
+    if not len(comparison.days):
+        st.warning("No days with complete prices on both tariffs in this range.")
+        return
+
+    display_totals(comparison.summary().iloc[0])
+    plot_difference(comparison.daily())
+    st.caption("Unit rates only; standing charges are not included.")
+
+
+# Run the application
+if __name__ == "__main__":
+    main()
@@ -3,34 +3,28 @@ from datetime import datetime, timedelta
 import pytz
 import streamlit as st
 
-from agile_home_dashboard import get_current_time, load_css
+from agile_home_dashboard import (
+    get_current_time,
+    instrumented,
+    load_css,
+    session_prices,
+)
+from optimise import optimise_wash_dry
+from price_curve import price_curve
 
 load_css()
 
 
-def calculate_drying_cost(dry_time, power, df, current_time):
-    costs = df[["value_inc_vat", "valid_from", "valid_to"]].copy()
-    costs["drying_cost"] = costs["value_inc_vat"] * power
-
-    # Define the rolling window size
-    window_size = int(dry_time * 2)  # 1 hour = 2 intervals (30 min each)
-    costs["rolling_sum"] = costs["drying_cost"].rolling(window=window_size).sum()
-
-    # Find the minimum cost index and end time
-    min_index = costs["rolling_sum"].idxmin()
-    end_time = costs.loc[min_index, "valid_to"]
-
-    # Calculate the hours remaining from now until the optimal end time
-    time_diff = end_time - current_time
-    end_at = round(time_diff.total_seconds() / 3600, 1)
-
-    return end_time, end_at
-
-
-def display_washer_timing(end_time, end_at):
+def display_washer_timing(start_time, end_time, end_at):
     st.markdown(
         """
         <div style="text-align: center; margin-top: 20px;">
+            <div>
+                <strong>Start washing at:</strong>
+            </div>
+            <div>
+                <strong>{}</strong>
+            </div>
             <div>
                 <strong>Dryer must end by:</strong>
             </div>
@@ -44,42 +38,64 @@ def display_washer_timing(end_time, end_at):
                 <strong>{:.2f} hours</strong>
             </div>
         </div>
-        """.format(end_time.strftime("%d-%m-%y %H:%M"), end_at),
+        """.format(
+            start_time.strftime("%d-%m-%y %H:%M"),
+            end_time.strftime("%d-%m-%y %H:%M"),
+            end_at,
+        ),
         unsafe_allow_html=True,
     )
 
 
+@instrumented("washing_machine")
 def main():
     st.title("Washing Machine Pricing on Octopus Agile")
 
-    if st.session_state.df is not None:
+    prices = session_prices()
+    df = prices.agile
+    if df is not None:
         toggle = st.toggle("Select time manually", False)
-        current_time = get_current_time(toggle, st.session_state.df)
+        current_time = get_current_time(toggle, df)
         if current_time is not None:
             wash_time = st.number_input("Washing run time [hr]:", value=2.5)
             dry_time = st.number_input("Drying run time [hr]:", value=3.0)
-            power = st.number_input("Washing machine power [kW]:", value=2.0)
-
-            forward_df = st.session_state.df[
-                st.session_state.df["valid_from"]
-                > current_time + timedelta(hours=wash_time)
-            ]
+            gap = st.number_input(
+                "Gap between washing and drying [hr]:", value=0.0, min_value=0.0
+            )
+            wash_power = st.number_input("Washing power [kW]:", value=2.0)
+            dry_power = st.number_input("Drying power [kW]:", value=2.0)
 
-            if st.session_state.df["valid_from"].max().date() != datetime.now(
+            if df["valid_from"].max().date() != datetime.now(
                 pytz.timezone("Europe/London")
             ).date() + timedelta(days=1):
                 st.warning("Data for tomorrow not available yet.")
-
-            if (
-                current_time + timedelta(hours=wash_time + dry_time)
-                > st.session_state.df["valid_from"].max()
-            ):
+                if prices.forecast is not None and st.toggle(
+                    "Plan with estimated prices for tomorrow", False
+                ):
+                    df = prices.forecast
+
+            _, best = optimise_wash_dry(
+                price_curve(df),
+                timedelta(hours=wash_time),
+                timedelta(hours=dry_time),
+                current_time,
+                wash_power,
+                dry_power,
+                gap=timedelta(hours=gap),
+            )
+
+            if best is None:
                 st.warning("Not enough data available for the selected washing time.")
             else:
-                end_time, end_at = calculate_drying_cost(
-                    dry_time, power, forward_df, current_time
+                end_at = round(
+                    (best["dry_end"] - current_time).total_seconds() / 3600, 1
                 )
-                display_washer_timing(end_time, end_at)
+                display_washer_timing(best["time"], best["dry_end"], end_at)
+                if (
+                    "estimate" in df
+                    and best["dry_end"] > df.loc[~df["estimate"], "valid_to"].max()
+                ):
+                    st.caption("Timing uses estimated prices, check again after 16:00.")
 
         else:
             st.markdown("##")
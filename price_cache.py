@@ -0,0 +1,182 @@
+import logging
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone
+
+import pandas as pd
+
+from octopus_api import london_timezone
+
+logger = logging.getLogger(__name__)
+
+# Agile prices for 23:00 today to 23:00 tomorrow are published around 16:00
+PUBLISH_TIME = time(16, 10)
+PUBLISHED_UNTIL = time(23, 0)
+
+# How long to wait before asking again when a publish is late
+RETRY_INTERVAL = timedelta(minutes=10)
+
+# Expiry of rates that can no longer change
+NEVER = datetime.max.replace(tzinfo=timezone.utc)
+
+# Number of cached windows kept, the least recently used being dropped first
+MAX_ENTRIES = 64
+
+
+def _at(day, clock_time):
+    return london_timezone.localize(datetime.combine(day, clock_time))
+
+
+def next_publish(now):
+    """Returns the first Agile publish time strictly after `now`."""
+    publish = _at(now.date(), PUBLISH_TIME)
+    if now >= publish:
+        publish = _at(now.date() + timedelta(days=1), PUBLISH_TIME)
+    return publish
+
+
+def published_until(now):
+    """Returns the end of the latest prices that should be published by `now`."""
+    now = now.astimezone(london_timezone)
+    day = now.date()
+    if now >= _at(day, PUBLISH_TIME):
+        day += timedelta(days=1)
+    return _at(day, PUBLISHED_UNTIL)
+
+
+def expiry_for(df, now, period_to=None):
+    """
+    Returns when cached rates fetched at `now` should be refreshed.
+
+    Rates stay fresh until the next publish. After today's publish, rates
+    that do not yet reach tomorrow's 23:00 slot are retried shortly instead.
+    Published rates never change, so a window ending at `period_to` in the
+    past never expires once its rates reach the end of it, and is otherwise
+    retried at the next publish.
+    """
+    now = now.astimezone(london_timezone)
+    if period_to is not None and pd.Timestamp(period_to) <= now:
+        if df is not None and not df.empty and df["valid_to"].max() >= period_to:
+            return NEVER
+        return next_publish(now)
+    if now >= _at(now.date(), PUBLISH_TIME):
+        if df is None or df.empty or df["valid_to"].max() < published_until(now):
+            return now + RETRY_INTERVAL
+    return next_publish(now)
+
+
+@dataclass
+class CacheEntry:
+    value: pd.DataFrame
+    expires: datetime
+    expiry: object = None
+
+
+class PriceCache:
+    """
+    Stale-while-revalidate cache for rate DataFrames.
+
+    Each entry expires at the next Agile publish time. Expired entries keep
+    being served while a background thread reloads them, so only the very
+    first load of a key waits on the network. At most `max_entries` keys are
+    kept, dropping the least recently used.
+
+    Parameters
+    ----------
+    expiry : callable, optional
+        `expiry(value, now)` returning an entry's expiry time.
+    clock : callable, optional
+        Returns the current tz-aware time.
+    max_entries : int
+        Number of keys kept.
+    """
+
+    def __init__(self, expiry=expiry_for, clock=None, max_entries=MAX_ENTRIES):
+        self.expiry = expiry
+        self.clock = clock or (lambda: datetime.now(london_timezone))
+        self.max_entries = max_entries
+        self.counts = Counter()
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader, expiry=None):
+        """
+        Returns the cached value for `key`, calling `loader()` to fill it.
+
+        Misses load synchronously; stale hits return the old value and start a
+        background refresh unless one is already running for the key.
+        `expiry`, if given, replaces the cache's expiry function for the key.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            return self._load(key, loader, expiry or self.expiry)
+
+        if self.clock() < entry.expires:
+            self.counts["hits"] += 1
+        else:
+            self.counts["stale_hits"] += 1
+            with self._lock:
+                start = key not in self._refreshing
+                self._refreshing.add(key)
+            if start:
+                threading.Thread(
+                    target=self._refresh, args=(key, loader, entry.expiry), daemon=True
+                ).start()
+        return entry.value
+
+    def _store(self, key, value, expiry):
+        entry = CacheEntry(value, expiry(value, self.clock()), expiry)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                old, _ = self._entries.popitem(last=False)
+                self._key_locks.pop(old, None)
+
+    def _load(self, key, loader, expiry):
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Concurrent misses for the same key wait for a single load
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.counts["hits"] += 1
+                return entry.value
+
+            self.counts["misses"] += 1
+            value = loader()
+            self._store(key, value, expiry)
+            return value
+
+    def _refresh(self, key, loader, expiry):
+        try:
+            value = loader()
+            self._store(key, value, expiry)
+            self.counts["refreshes"] += 1
+        except Exception as e:
+            self.counts["refresh_errors"] += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires = self.clock() + RETRY_INTERVAL
+            logger.warning("Background refresh of %s failed: %s", key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self):
+        """Returns hit, stale hit, miss, refresh and refresh error counts."""
+        return {
+            name: self.counts[name]
+            for name in ("hits", "stale_hits", "misses", "refreshes", "refresh_errors")
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,175 @@
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from octopus_api import london_timezone
+
+
+def to_seconds(t):
+    """
+    Converts datetimes to UTC epoch seconds.
+
+    Accepts a single datetime or an array-like of datetimes and returns an
+    int or an int64 array respectively. Naive datetimes are taken as London time.
+    """
+    if np.ndim(t) == 0 and not isinstance(t, pd.Index | pd.Series | np.ndarray):
+        timestamp = pd.Timestamp(t)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize(london_timezone)
+        return timestamp.value // 10**9
+
+    index = pd.DatetimeIndex(t)
+    if index.tz is None:
+        index = index.tz_localize(london_timezone)
+    return index.as_unit("s").asi8
+
+
+class PriceCurve:
+    """
+    Time-indexed tariff rates backed by sorted arrays.
+
+    Slot starts and ends are held as int64 UTC epoch seconds alongside a float
+    price array, so slot lookups are binary searches rather than DataFrame scans.
+    Slots need not be contiguous: times that fall in a gap, or outside the data,
+    have no slot.
+
+    Parameters
+    ----------
+    starts, ends : numpy.ndarray
+        Slot start and end times in epoch seconds, sorted by start.
+    prices : numpy.ndarray
+        Price of each slot [p/kWh].
+    rows : numpy.ndarray, optional
+        Positional index of each slot in the source DataFrame.
+    """
+
+    def __init__(self, starts, ends, prices, rows=None):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.rows = np.arange(len(self.starts)) if rows is None else np.asarray(rows)
+
+        # Running totals at each slot start of price x time [p/kWh h] and of
+        # covered time [s], so any interval integrates with two lookups
+        durations = self.ends - self.starts
+        self._energy_price = np.concatenate(
+            ([0.0], np.cumsum(self.prices * durations / 3600))
+        )
+        self._covered = np.concatenate(([0], np.cumsum(durations)))
+
+    @classmethod
+    def from_frame(cls, df, column="value_inc_vat"):
+        """Builds a curve from a rate DataFrame with `valid_from`/`valid_to`."""
+        starts = to_seconds(df["valid_from"])
+        ends = to_seconds(df["valid_to"])
+        order = np.argsort(starts, kind="stable")
+        return cls(starts[order], ends[order], df[column].to_numpy()[order], rows=order)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def slot(self, t):
+        """
+        Returns the index of the slot containing `t`, or -1 if there is none.
+
+        Works element-wise when `t` is an array of datetimes or epoch seconds.
+        """
+        seconds = _seconds(t)
+        i = np.searchsorted(self.starts, seconds, side="right") - 1
+        if len(self) == 0:
+            return -1 if i.ndim == 0 else np.full(i.shape, -1)
+        inside = (i >= 0) & (seconds < self.ends[np.maximum(i, 0)])
+        slots = np.where(inside, i, -1)
+        return int(slots) if slots.ndim == 0 else slots
+
+    def next_slot(self, i):
+        """Returns the index of the slot after slot `i`, or -1 at the end of the data."""
+        return i + 1 if 0 <= i < len(self) - 1 else -1
+
+    def price_at(self, t):
+        """Returns the price at `t`, or NaN where there is no slot."""
+        slots = np.asarray(self.slot(t))
+        prices = np.full(slots.shape, np.nan)
+        prices[slots >= 0] = self.prices[slots[slots >= 0]]
+        return float(prices) if prices.ndim == 0 else prices
+
+    def between(self, t0, t1):
+        """Returns the slice of slots starting in the closed interval [t0, t1]."""
+        lower = np.searchsorted(self.starts, to_seconds(t0), side="left")
+        upper = np.searchsorted(self.starts, to_seconds(t1), side="right")
+        return slice(int(lower), int(upper))
+
+    def integral(self, t):
+        """
+        Returns the running price [p/kWh h] and coverage [s] integrals up to `t`.
+
+        `t` is epoch seconds, a scalar or an array evaluated element-wise.
+        """
+        seconds = np.asarray(t, dtype=np.int64)
+        i = np.searchsorted(self.starts, seconds, side="right") - 1
+        k = np.maximum(i, 0)
+        elapsed = np.clip(seconds - self.starts[k], 0, self.ends[k] - self.starts[k])
+        elapsed = np.where(i >= 0, elapsed, 0)
+        energy_price = self._energy_price[k] + self.prices[k] * elapsed / 3600
+        return energy_price, self._covered[k] + elapsed
+
+    def cost(self, t0, t1, power=1.0):
+        """
+        Returns the cost of running at a constant power between two times.
+
+        Each call is two binary searches into prefix sums, so `t0` and `t1` may
+        be arrays of any length and are evaluated element-wise.
+
+        Parameters
+        ----------
+        t0, t1 : datetime, array-like of datetimes, or epoch seconds
+            Start and end of each interval.
+        power : float or numpy.ndarray
+            Power draw [kW].
+
+        Returns
+        -------
+        cost : float or numpy.ndarray
+            Cost [p], or NaN where the interval is not fully covered by slots.
+        """
+        s0, s1 = np.broadcast_arrays(_seconds(t0), _seconds(t1))
+        if len(self) == 0:
+            cost = np.full(s0.shape, np.nan)
+            return float(cost) if cost.ndim == 0 else cost
+
+        price0, covered0 = self.integral(s0)
+        price1, covered1 = self.integral(s1)
+
+        complete = (covered1 - covered0 == s1 - s0) & (s0 >= self.starts[0])
+        cost = np.where(complete, (price1 - price0) * power, np.nan)
+        return float(cost) if cost.ndim == 0 else cost
+
+
+def _seconds(t):
+    """Returns `t` as epoch seconds, passing integer epochs through."""
+    if np.issubdtype(np.asarray(t).dtype, np.integer):
+        return np.asarray(t, dtype=np.int64)
+    return np.asarray(to_seconds(t), dtype=np.int64)
+
+
+_curves = {}
+
+
+def price_curve(df, curve=None):
+    """
+    Returns the `PriceCurve` for a rate DataFrame, building it on first use.
+
+    Curves are cached for as long as the DataFrame is alive, so rates fetched
+    once are only converted once. DataFrames are assumed not to be modified.
+    A `curve` already built for `df` is cached in place of a new one.
+    """
+    key = id(df)
+    cached = _curves.get(key)
+    if cached is not None and cached[0]() is df:
+        return cached[1]
+
+    if curve is None:
+        curve = PriceCurve.from_frame(df)
+    _curves[key] = (weakref.ref(df, lambda _, key=key: _curves.pop(key, None)), curve)
+    return curve
@@ -0,0 +1,444 @@
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from octopus_api import london_timezone, start_of_day
+from price_cache import PUBLISHED_UNTIL
+from price_store import DATA_DIR, get_store, tariff_key
+from regions import DEFAULT_REGION, REGIONS, tariff_urls
+from tariff_compare import SLOTS, daily_means, rate_days, slot_matrix
+
+logger = logging.getLogger(__name__)
+
+# Days of history a model is trained on, and the fewest it can be trained on
+TRAIN_DAYS = 180
+MIN_TRAIN_DAYS = 28
+
+# Stored models older than this are retrained
+MAX_MODEL_AGE = timedelta(days=7)
+
+# Time before a failed training is retried
+RETRY_INTERVAL = timedelta(hours=1)
+
+# Regularisation of the non-intercept coefficients
+RIDGE = 1.0
+
+# Agile rates include 5% VAT
+VAT = 1.05
+
+FEATURES = ["intercept", "tracker", "previous_agile", "weekend"]
+
+
+def features(days, tracker_means, previous_means):
+    """
+    Returns the day x feature matrix the model predicts from.
+
+    Each day is described by its Tracker electricity rate, the mean Agile
+    price of the day before and whether it falls on a weekend.
+    """
+    return np.column_stack(
+        [
+            np.ones(len(days)),
+            tracker_means,
+            previous_means,
+            np.asarray(days.dayofweek >= 5, dtype=float),
+        ]
+    )
+
+
+def _history(agile, tracker, days):
+    """Returns the features and slot prices of `days`, from complete history."""
+    # Days before the first Agile day give the first day's previous mean
+    padded = pd.date_range(days[0] - timedelta(days=1), days[-1], freq="D")
+    means = daily_means(slot_matrix(agile, padded))
+    # The latest Tracker rate carries over until the next is published
+    trackers = pd.Series(daily_means(slot_matrix(tracker, days))).ffill().to_numpy()
+    return features(days, trackers, means[:-1]), slot_matrix(agile, days)
+
+
+def _solve(x, y, ridge=RIDGE):
+    """Fits per-slot coefficients by ridge regression, skipping incomplete days."""
+    keep = ~(np.isnan(x).any(axis=1) | np.isnan(y).any(axis=1))
+    x, y = x[keep], y[keep]
+    penalty = np.diag([0.0] + [ridge] * (x.shape[1] - 1))
+    return np.linalg.solve(x.T @ x + penalty, x.T @ y), int(keep.sum())
+
+
+@dataclass
+class PriceModel:
+    """
+    Linear day-ahead model of the 48 half-hourly Agile prices of a day.
+
+    Every slot has its own coefficients over the same `FEATURES`, so a day's
+    prices are one (features x 48) product.
+
+    Attributes
+    ----------
+    coefficients : numpy.ndarray
+        Coefficients of shape (features, 48).
+    trained_until : pandas.Timestamp
+        Naive London date of the last training day.
+    n_days : int
+        Number of complete days trained on.
+    """
+
+    coefficients: np.ndarray
+    trained_until: pd.Timestamp
+    n_days: int
+
+    @classmethod
+    def fit(cls, agile, tracker, ridge=RIDGE):
+        """
+        Trains a model on Agile and Tracker electricity rates.
+
+        Returns `None` when fewer than `MIN_TRAIN_DAYS` days are complete.
+        """
+        days = rate_days(agile)
+        if not len(days) or tracker is None or tracker.empty:
+            return None
+        x, y = _history(agile, tracker, days)
+        coefficients, n_days = _solve(x, y, ridge)
+        if n_days < MIN_TRAIN_DAYS:
+            return None
+        complete = ~np.isnan(y).any(axis=1)
+        return cls(coefficients, days[complete][-1], n_days)
+
+    def predict(self, x):
+        """Returns the day x slot prices [p/kWh] of a feature matrix."""
+        return x @ self.coefficients
+
+    def stale(self, now=None):
+        """Returns whether the model is older than `MAX_MODEL_AGE`."""
+        today = pd.Timestamp((now or datetime.now(london_timezone)).date())
+        return today - self.trained_until > MAX_MODEL_AGE
+
+    def to_dict(self):
+        return {
+            "features": FEATURES,
+            "coefficients": self.coefficients.tolist(),
+            "trained_until": self.trained_until.date().isoformat(),
+            "n_days": self.n_days,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data["features"] != FEATURES:
+            raise ValueError("Model was trained on other features")
+        return cls(
+            np.array(data["coefficients"]),
+            pd.Timestamp(data["trained_until"]),
+            data["n_days"],
+        )
+
+
+def model_path(agile_url):
+    """Returns the file a tariff's model is stored in, in the data directory."""
+    return DATA_DIR / f"forecast-{tariff_key(agile_url).replace('/', '_')}.json"
+
+
+_models = {}
+_models_lock = threading.Lock()
+_attempts = {}
+
+
+def _read_model(agile_url, tracker_url):
+    """Returns the stored model of a tariff, or `None` if there is none."""
+    try:
+        stored = json.loads(model_path(agile_url).read_text())
+        if stored["tracker"] == tariff_key(tracker_url):
+            return PriceModel.from_dict(stored["model"])
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def train_model(agile_url, tracker_url):
+    """
+    Trains a tariff's model on the last `TRAIN_DAYS` of prices and stores it.
+
+    Prices missing from the price store are fetched first, so this can take a
+    while on a new store. Returns `None` if there is too little history.
+    """
+    store = get_store()
+    start = start_of_day(days_ago=TRAIN_DAYS)
+    model = PriceModel.fit(
+        store.refresh(agile_url, start), store.refresh(tracker_url, start)
+    )
+    if model is None:
+        return None
+
+    path = model_path(agile_url)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps(
+                {"tracker": tariff_key(tracker_url), "model": model.to_dict()},
+                indent=2,
+            )
+        )
+    except OSError:
+        pass
+    _models[(agile_url, tracker_url)] = model
+    return model
+
+
+def _train(agile_url, tracker_url):
+    try:
+        if train_model(agile_url, tracker_url) is None:
+            logger.info("Too little history to train a model for %s", agile_url)
+    except Exception as e:
+        logger.warning("Could not train a price model for %s: %s", agile_url, e)
+
+
+def _train_in_background(agile_url, tracker_url):
+    """Starts training a model, unless one was started within `RETRY_INTERVAL`."""
+    key = (agile_url, tracker_url)
+    now = time.monotonic()
+    with _models_lock:
+        started = _attempts.get(key)
+        if started is not None and now - started < RETRY_INTERVAL.total_seconds():
+            return
+        _attempts[key] = now
+    threading.Thread(target=_train, args=key, daemon=True).start()
+
+
+def load_model(agile_url, tracker_url, now=None):
+    """
+    Returns the model of an Agile tariff, or `None` if none is trained yet.
+
+    The model is read from memory or the data directory and never trained on
+    the caller's thread. When it is missing or older than `MAX_MODEL_AGE`, it
+    is retrained in the background, at most once per `RETRY_INTERVAL`, and a
+    stale model is returned until the new one is ready. Models can also be
+    trained ahead of time with `agile-train-forecast`.
+    """
+    key = (agile_url, tracker_url)
+    model = _models.get(key)
+    if model is None:
+        model = _read_model(agile_url, tracker_url)
+        if model is not None:
+            _models.setdefault(key, model)
+    if model is None or model.stale(now):
+        _train_in_background(agile_url, tracker_url)
+    return model
+
+
+def forecast_until(now=None):
+    """Returns the end of tomorrow's Agile prices, 23:00 tomorrow London time."""
+    now = (now or datetime.now(london_timezone)).astimezone(london_timezone)
+    return london_timezone.localize(
+        datetime.combine(now.date() + timedelta(days=1), PUBLISHED_UNTIL)
+    )
+
+
+def estimate_prices(agile, tracker, model, until):
+    """
+    Estimates the Agile rates between the last published slot and `until`.
+
+    Each London day is predicted from its Tracker rate, or the latest one
+    published, and the previous day's mean Agile price, which for days not yet
+    published is the estimated mean. Slots are priced by their wall-clock half
+    hour, so the repeated autumn hour gets the same estimate twice.
+
+    Parameters
+    ----------
+    agile, tracker : pandas.DataFrame
+        Agile and Tracker electricity rates in `fetch_data` form.
+    model : PriceModel
+        Trained model.
+    until : datetime
+        End of the last slot to estimate.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        Estimated rates in `fetch_data` form, empty when `agile` reaches
+        `until`.
+    """
+    start = agile["valid_to"].max()
+    slots = pd.date_range(start, until, freq="30min", inclusive="left")
+    if not len(slots):
+        return agile.iloc[:0]
+
+    local = slots.tz_convert(london_timezone)
+    dates = local.tz_localize(None).normalize()
+    days = pd.date_range(dates[0], dates[-1], freq="D")
+    padded = pd.date_range(days[0] - timedelta(days=1), days[-1], freq="D")
+
+    # Only the rates of the previous day onwards are needed
+    first = padded[0].tz_localize(london_timezone)
+    agile = agile[agile["valid_to"] > first]
+    latest = tracker["value_inc_vat"].iloc[-1]
+    tracker = tracker[tracker["valid_to"].isna() | (tracker["valid_to"] > first)]
+    means = daily_means(slot_matrix(agile, padded))
+    trackers = (
+        pd.Series(daily_means(slot_matrix(tracker, padded)))
+        .ffill()
+        .fillna(latest)
+        .to_numpy()
+    )
+
+    prices = np.empty((len(days), SLOTS))
+    for i in range(len(days)):
+        x = features(days[i : i + 1], trackers[i + 1 : i + 2], means[i : i + 1])
+        prices[i] = model.predict(x)[0]
+        # Later days follow on from this day's estimated prices
+        if np.isnan(means[i + 1]):
+            means[i + 1] = prices[i].mean()
+
+    values = prices[
+        days.get_indexer(dates), np.asarray(local.hour * 2 + local.minute // 30)
+    ].round(2)
+    return pd.DataFrame(
+        {
+            "value_exc_vat": (values / VAT).round(2),
+            "value_inc_vat": values,
+            "valid_from": local,
+            "valid_to": local + timedelta(minutes=30),
+        }
+    )
+
+
+_forecasts = {}
+
+
+def forecast_prices(agile_url, tracker_url, agile, tracker, now=None):
+    """
+    Returns Agile rates extended with estimates up to 23:00 tomorrow.
+
+    Published rates have `estimate` False and estimated ones True. The result
+    is cached per loaded dataset, day and model, so once the real prices are
+    loaded or a model is trained the estimates are replaced on the next run.
+
+    Returns
+    -------
+    df : pandas.DataFrame or None
+        The rates with estimates, or `None` when tomorrow is already
+        published or no model has been trained yet.
+    """
+    until = forecast_until(now)
+    if agile is None or agile.empty or agile["valid_to"].max() >= until:
+        return None
+
+    model = load_model(agile_url, tracker_url, now)
+    key = (
+        agile.attrs.get("version", id(agile)),
+        tracker.attrs.get("version"),
+        until,
+        id(model),
+    )
+    cached = _forecasts.get(agile_url)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    df = None
+    if model is not None:
+        estimates = estimate_prices(agile, tracker, model, until)
+        df = pd.concat(
+            [agile.assign(estimate=False), estimates.assign(estimate=True)],
+            ignore_index=True,
+        )
+        df.attrs["version"] = (key[0], "estimate", until.isoformat())
+    _forecasts[agile_url] = (key, df)
+    return df
+
+
+def backtest(agile, tracker, train_days=TRAIN_DAYS, test_days=None):
+    """
+    Scores day-ahead estimates against the published prices.
+
+    Every test day is predicted by a model refitted on the `train_days` before
+    it, as it would have been the afternoon before, and compared with a
+    persistence forecast repeating the previous day's prices.
+
+    Parameters
+    ----------
+    agile, tracker : pandas.DataFrame
+        Agile and Tracker electricity rates.
+    train_days : int
+        Days each model is trained on.
+    test_days : int, optional
+        Number of most recent days to score, defaults to all after the first
+        `train_days`.
+
+    Returns
+    -------
+    scores : pandas.DataFrame
+        Per-day `mae` and `rmse` [p/kWh] of the model and of the
+        `persistence_` baseline, indexed by naive London date.
+    """
+    days = rate_days(agile)
+    x, y = _history(agile, tracker, days)
+    first = train_days if test_days is None else max(train_days, len(days) - test_days)
+
+    rows = []
+    for t in range(first, len(days)):
+        if np.isnan(y[t]).any() or np.isnan(x[t]).any():
+            continue
+        coefficients, n_days = _solve(x[t - train_days : t], y[t - train_days : t])
+        if n_days < MIN_TRAIN_DAYS:
+            continue
+        error = x[t] @ coefficients - y[t]
+        baseline = y[t - 1] - y[t]
+        rows.append(
+            {
+                "day": days[t],
+                "mae": np.abs(error).mean(),
+                "rmse": np.sqrt(np.mean(error**2)),
+                "persistence_mae": np.nanmean(np.abs(baseline)),
+                "persistence_rmse": np.sqrt(np.nanmean(baseline**2)),
+            }
+        )
+    return pd.DataFrame(
+        rows,
+        columns=["day", "mae", "rmse", "persistence_mae", "persistence_rmse"],
+    ).set_index("day")
+
+
+def monthly_scores(scores):
+    """Averages `backtest` scores per month, RMSE over the month's squared errors."""
+    months = scores.index.to_period("M").rename("month")
+    grouped = scores.groupby(months)
+    summary = grouped[["mae", "persistence_mae"]].mean()
+    for column in ("rmse", "persistence_rmse"):
+        summary[column] = np.sqrt(grouped[column].apply(lambda s: np.mean(s**2)))
+    summary["days"] = grouped.size()
+    return summary[
+        ["days", "mae", "rmse", "persistence_mae", "persistence_rmse"]
+    ].round(2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Trains the day-ahead Agile price models used by the dashboard."
+    )
+    parser.add_argument(
+        "--region", nargs="+", default=[DEFAULT_REGION], choices=REGIONS
+    )
+    args = parser.parse_args(argv)
+
+    status = 0
+    for region in args.region:
+        urls = tariff_urls(region)
+        model = train_model(urls["agile"], urls["tracker_e"])
+        if model is None:
+            print(f"{region}: too little history to train on")
+            status = 1
+        else:
+            print(
+                f"{region}: trained on {model.n_days} days "
+                f"until {model.trained_until:%Y-%m-%d}"
+            )
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Agile peak hours, London time
+PEAK_START = 16
+PEAK_END = 19
+
+# Most points drawn for a half-hourly series
+MAX_POINTS = 2000
+
+QUANTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+
+def aggregate(df, column="value_inc_vat"):
+    """
+    Computes summary statistics of a long price history.
+
+    Days and weeks follow London time, so clock change days hold 46 or 50
+    slots. Peak slots start between `PEAK_START` and `PEAK_END`.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Rates with London-time `valid_from`, as returned by `fetch_data`.
+    column : str
+        Price column to summarise.
+
+    Returns
+    -------
+    aggregates : dict
+        `daily` and `weekly` DataFrames of `mean`, `min` and `max` prices, with
+        `peak`, `off_peak` and `spread` (peak minus off-peak mean) for each day,
+        `hourly` price quantiles by hour of day, and `summary` statistics.
+    """
+    prices = df.set_index("valid_from")[column].dropna()
+    hour = prices.index.hour
+    peak = (hour >= PEAK_START) & (hour < PEAK_END)
+
+    daily = prices.resample("D").agg(["mean", "min", "max", "count"])
+    daily["peak"] = prices[peak].resample("D").mean()
+    daily["off_peak"] = prices[~peak].resample("D").mean()
+    daily["spread"] = daily["peak"] - daily["off_peak"]
+    daily = daily[daily["count"] > 0].drop(columns="count")
+
+    weekly = prices.resample("W-MON", label="left", closed="left").agg(
+        ["mean", "min", "max"]
+    )
+    hourly = prices.groupby(hour).quantile(QUANTILES).unstack()
+    hourly.index.name = "hour"
+
+    summary = {
+        "mean": prices.mean(),
+        "min": prices.min(),
+        "max": prices.max(),
+        "negative": (prices < 0).mean(),
+        "spread": daily["spread"].mean(),
+        "slots": len(prices),
+    }
+    return {
+        "daily": daily,
+        "weekly": weekly.dropna(how="all"),
+        "hourly": hourly,
+        "summary": summary,
+    }
+
+
+_aggregates = {}
+
+
+def history_aggregates(df, column="value_inc_vat"):
+    """
+    Returns `aggregate(df, column)`, computing it once per DataFrame.
+
+    Results are cached for as long as the DataFrame is alive, so each cached
+    range of rates is only aggregated once.
+    """
+    key = (id(df), column)
+    cached = _aggregates.get(key)
+    if cached is not None and cached[0]() is df:
+        return cached[1]
+
+    result = aggregate(df, column)
+    _aggregates[key] = (
+        weakref.ref(df, lambda _, key=key: _aggregates.pop(key, None)),
+        result,
+    )
+    return result
+
+
+def downsample(series, max_points=MAX_POINTS):
+    """
+    Reduces a time series to at most `max_points` points for plotting.
+
+    The series is split into equal buckets and the lowest and highest point of
+    each bucket are kept, so short price spikes and negative dips stay visible.
+    """
+    series = series.dropna()
+    if len(series) <= max_points:
+        return series
+
+    bucket = -(-len(series) // (max_points // 2))
+    groups = pd.Series(series.to_numpy()).groupby(np.arange(len(series)) // bucket)
+    keep = np.union1d(groups.idxmin().to_numpy(), groups.idxmax().to_numpy())
+    return series.iloc[keep]
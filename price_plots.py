@@ -0,0 +1,149 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.graph_objects as go
+
+import metrics
+
+# Lower bounds [p/kWh] of each price colour band after the first, which holds
+# negative prices
+PRICE_THRESHOLDS = np.array([0, 5, 7, 10, 15, 20, 25, 30])
+PRICE_COLORS = np.array(
+    [
+        "#e7e1ff",
+        "#fdbbc1",
+        "#ff9a9f",
+        "#666c90",
+        "#aa7515",
+        "#f7c8a2",
+        "#1a2ee8",
+        "#332d58",
+        "#1e1f57",
+    ]
+)
+
+# Maps band indices to colours, for traces coloured by band number
+BAND_COLORSCALE = [
+    [i / (len(PRICE_COLORS) - 1), color] for i, color in enumerate(PRICE_COLORS)
+]
+
+# Ranges with more slots than a single day are drawn with WebGL
+WEBGL_SLOTS = 50
+
+# Opacity of estimated, not yet published, prices
+ESTIMATE_OPACITY = 0.45
+
+# Number of built figures kept
+MAX_FIGURES = 32
+
+_figures = OrderedDict()
+_lock = threading.Lock()
+
+
+def price_bands(values):
+    """Returns the colour band index of each price in one lookup."""
+    return np.digitize(values, PRICE_THRESHOLDS)
+
+
+def price_colors(values):
+    """Returns the colour of each price."""
+    return PRICE_COLORS[price_bands(values)]
+
+
+@metrics.timed("build_figure")
+def build_price_figure(df, title, theme):
+    """
+    Builds the price plot of a range of slots.
+
+    A single day is drawn as coloured bars. Longer ranges are drawn as a WebGL
+    step line with markers coloured by band number, which stays responsive
+    with thousands of slots. Times are passed as London wall-clock times, which
+    is how plotly displays them and much faster to serialise. Rows flagged by
+    an `estimate` column are drawn faded.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Rates to plot.
+    title : str
+        Figure title.
+    theme : tuple
+        Background and font colours.
+    """
+    bg_color, font = theme
+    times = df["valid_from"].dt.tz_localize(None).to_numpy()
+    prices = df["value_inc_vat"].to_numpy()
+    opacity = 1.0
+    if "estimate" in df:
+        opacity = np.where(df["estimate"].to_numpy(), ESTIMATE_OPACITY, 1.0)
+
+    if len(df) > WEBGL_SLOTS:
+        trace = go.Scattergl(
+            x=times,
+            y=prices,
+            mode="lines+markers",
+            line=dict(shape="hv", color="#666c90", width=1),
+            marker=dict(
+                color=price_bands(prices),
+                colorscale=BAND_COLORSCALE,
+                cmin=0,
+                cmax=len(PRICE_COLORS) - 1,
+                opacity=opacity,
+                size=5,
+            ),
+            name="Price [p/kWh]",
+        )
+    else:
+        trace = go.Bar(
+            x=times,
+            y=prices,
+            marker=dict(color=price_colors(prices), opacity=opacity),
+            name="Price [p/kWh]",
+        )
+
+    fig = go.Figure(trace)
+    fig.update_layout(
+        plot_bgcolor=bg_color,
+        font=dict(color=font, size=14),
+        title=dict(text=title, font=dict(color=font)),
+        xaxis=dict(
+            title="Time",
+            title_font=dict(color=font),
+            tickfont=dict(color=font),
+        ),
+        yaxis=dict(
+            title="Price [p/kWh]",
+            title_font=dict(color=font),
+            tickfont=dict(color=font),
+        ),
+    )
+    return fig
+
+
+def price_figure(df, title, theme, key=None):
+    """
+    Returns the price plot of `df`, reusing a figure built earlier for `key`.
+
+    `key` identifies the plotted data, e.g. (dataset version, date), so reruns
+    that do not change it skip building the figure. Without a key the figure
+    is always rebuilt.
+    """
+    if key is None:
+        return build_price_figure(df, title, theme)
+
+    key = (key, title, theme)
+    with _lock:
+        fig = _figures.get(key)
+        if fig is not None:
+            _figures.move_to_end(key)
+            metrics.count("figure_cache_hits")
+            return fig
+
+    metrics.count("figure_cache_misses")
+    fig = build_price_figure(df, title, theme)
+    with _lock:
+        _figures[key] = fig
+        while len(_figures) > MAX_FIGURES:
+            _figures.popitem(last=False)
+    return fig
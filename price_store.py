@@ -0,0 +1,249 @@
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pandas as pd
+import requests
+
+import metrics
+from octopus_api import API_BASE, DEFAULT_API_BASE, fetch_rates, london_timezone
+
+logger = logging.getLogger(__name__)
+
+EPOCH = pd.Timestamp(0, tz="UTC")
+
+DATA_DIR = Path(
+    os.environ.get("AGILE_DATA_DIR", Path.home() / ".cache" / "agile-home-dashboard")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rates (
+    tariff TEXT NOT NULL,
+    valid_from INTEGER NOT NULL,
+    valid_to INTEGER,
+    value_exc_vat REAL,
+    value_inc_vat REAL,
+    PRIMARY KEY (tariff, valid_from)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS coverage (
+    tariff TEXT PRIMARY KEY,
+    period_from INTEGER NOT NULL
+);
+"""
+
+
+def tariff_key(url):
+    """
+    Returns the `product/tariff` key identifying a rates endpoint.
+
+    e.g. `AGILE-24-10-01/E-1R-AGILE-24-10-01-H` for the Southern England Agile
+    `standard-unit-rates/` URL.
+    """
+    parts = [p for p in url.split("?")[0].split("/") if p]
+    product = parts[parts.index("products") + 1]
+    tariff = parts[parts.index("standard-unit-rates") - 1]
+    return f"{product}/{tariff}"
+
+
+def to_epoch(series):
+    """Converts a tz-aware datetime Series to int64 UTC epoch seconds."""
+    return ((series - EPOCH) // pd.Timedelta(seconds=1)).astype("int64")
+
+
+def from_epoch(series):
+    """Converts a Series of epoch seconds to London time, keeping nulls as NaT."""
+    return pd.to_datetime(series, unit="s", utc=True).dt.tz_convert(london_timezone)
+
+
+def default_path(base=API_BASE):
+    """Returns the store file for rates served from `base`."""
+    if base == DEFAULT_API_BASE:
+        return DATA_DIR / "prices.sqlite"
+    # Keep rates from a stand-in API apart from the real ones
+    host = urlsplit(base).netloc.replace(":", "-")
+    return DATA_DIR / f"prices-{host}.sqlite"
+
+
+class PriceStore:
+    """
+    Persistent SQLite store of tariff rates keyed by tariff and `valid_from`.
+
+    `refresh` only asks the API for slots after the newest one held, so repeated
+    loads cost one small delta request, and falls back to the stored rates when
+    the API cannot be reached.
+
+    Parameters
+    ----------
+    path : str or Path, optional
+        Database file, defaults to `prices.sqlite` in `AGILE_DATA_DIR`, or a file
+        named after the host when `OCTOPUS_API_BASE` points elsewhere.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path is not None else default_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def bounds(self, tariff):
+        """Returns the stored (oldest `valid_from`, newest `valid_to`) epochs."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT MIN(valid_from), MAX(COALESCE(valid_to, valid_from + 1)) "
+                "FROM rates WHERE tariff = ?",
+                (tariff,),
+            ).fetchone()
+
+    def covered_from(self, tariff):
+        """Returns the earliest `period_from` already fetched for a tariff."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT period_from FROM coverage WHERE tariff = ?", (tariff,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save(self, tariff, df, period_from=None):
+        """Inserts or replaces rates, recording the fetched `period_from`."""
+        rows = zip(
+            [tariff] * len(df),
+            to_epoch(df["valid_from"]).tolist(),
+            _nullable_epoch(df["valid_to"]),
+            df["value_exc_vat"].tolist(),
+            df["value_inc_vat"].tolist(),
+            strict=True,
+        )
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rates VALUES (?, ?, ?, ?, ?)", rows
+            )
+            if period_from is not None:
+                self._conn.execute(
+                    "INSERT INTO coverage VALUES (?, ?) ON CONFLICT(tariff) "
+                    "DO UPDATE SET period_from = MIN(period_from, excluded.period_from)",
+                    (tariff, period_from),
+                )
+
+    def load(self, tariff, period_from=None, period_to=None):
+        """
+        Loads stored rates overlapping a time window.
+
+        Returns
+        -------
+        df : pandas.DataFrame
+            Rates sorted by `valid_from`, in the same form as `fetch_rates`.
+        """
+        lower = 0 if period_from is None else _epoch(period_from)
+        upper = 2**62 if period_to is None else _epoch(period_to)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value_exc_vat, value_inc_vat, valid_from, valid_to FROM rates "
+                "WHERE tariff = ? AND valid_from < ? "
+                "AND COALESCE(valid_to, valid_from + 1) > ? ORDER BY valid_from",
+                (tariff, upper, lower),
+            ).fetchall()
+
+        df = pd.DataFrame(
+            rows, columns=["value_exc_vat", "value_inc_vat", "valid_from", "valid_to"]
+        )
+        df["valid_from"] = from_epoch(df["valid_from"].astype("int64"))
+        df["valid_to"] = from_epoch(df["valid_to"].astype("float64"))
+        return df
+
+    @metrics.timed("store_refresh")
+    def refresh(self, url, period_from, period_to=None):
+        """
+        Brings the stored rates for `url` up to date and returns the window.
+
+        Only slots after the newest stored one are requested, plus any history
+        before `period_from` that has never been fetched. If the API cannot be
+        reached the stored rates are returned as they are.
+
+        Parameters
+        ----------
+        url : str
+            Tariff `standard-unit-rates/` URL.
+        period_from : datetime
+            Start of the window to return.
+        period_to : datetime, optional
+            End of the window to return, defaults to the newest stored slot.
+        """
+        tariff = tariff_key(url)
+        start = _epoch(period_from)
+        oldest, newest = self.bounds(tariff)
+        covered = self.covered_from(tariff)
+
+        try:
+            if newest is None:
+                self.save(
+                    tariff, fetch_rates(url, period_from=_iso(start)), period_from=start
+                )
+            else:
+                if (covered is None or start < covered) and start < oldest:
+                    # Backfill history that has never been requested
+                    self.save(
+                        tariff,
+                        fetch_rates(
+                            url, period_from=_iso(start), period_to=_iso(oldest)
+                        ),
+                        period_from=start,
+                    )
+                self.save(tariff, fetch_rates(url, period_from=_iso(newest)))
+        except requests.RequestException as e:
+            if newest is None:
+                raise
+            logger.warning("Using stored rates for %s, API unavailable: %s", tariff, e)
+
+        return self.load(tariff, period_from, period_to)
+
+
+def _nullable_epoch(series):
+    """Converts datetimes to a list of epoch seconds with `None` for NaT."""
+    seconds = (series - EPOCH) // pd.Timedelta(seconds=1)
+    return [None if pd.isna(s) else int(s) for s in seconds.tolist()]
+
+
+def _epoch(value):
+    """Converts a datetime, Timestamp or epoch seconds to epoch seconds."""
+    if isinstance(value, int | float):
+        return int(value)
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(london_timezone)
+    return int(timestamp.timestamp())
+
+
+def _iso(epoch):
+    """Formats epoch seconds as an API period bound, passing `None` through."""
+    if epoch is None:
+        return None
+    return pd.Timestamp(epoch, unit="s", tz="UTC").strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Returns the process-wide price store.
+
+    Concurrent first calls, e.g. from `fetch_all` workers, open only one.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PriceStore()
+    return _store
+
+
+def set_store(store):
+    """Replaces the process-wide price store, e.g. with one in a scratch directory."""
+    global _store
+    with _store_lock:
+        _store = store
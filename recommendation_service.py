@@ -0,0 +1,367 @@
+"""
+Small HTTP service answering "when should I run X" polls with JSON.
+
+Run from the root directory with:
+
+    python recommendation_service.py --port 8600
+
+Endpoints:
+
+    /prices/current           current and next price
+    /prices/off-peak          today's and tomorrow's average off-peak price
+    /cheapest/<appliance>     cheapest start times, see `agile_cli.cheapest_start`;
+                              accepts `duration`, `power`, `deadline` and `top`
+    /summary                  all of the above for the built-in appliances
+
+Current prices are computed on each request, and cheapest start times once per
+price data version and five-minute interval. Price responses carry an `ETag`
+and `Last-Modified` per data version and price slot, and cheapest start times
+per data version and interval, so conditional polls are answered with an empty
+`304 Not Modified` until the response would change.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from agile_cli import APPLIANCES, cheapest_start, load_prices, parse_time
+from octopus_api import london_timezone
+from price_cache import PriceCache
+from price_curve import price_curve
+from price_history import PEAK_END, PEAK_START
+from regions import DEFAULT_REGION, REGIONS, tariff_urls
+
+# Cheapest start times are reused for this long, since they are rounded to it
+INTERVAL = timedelta(minutes=5)
+
+# Most distinct cheapest start queries kept per interval
+MAX_RESPONSES = 256
+
+
+def _interval_start(now):
+    minutes = now.minute - now.minute % (INTERVAL.seconds // 60)
+    return now.replace(minute=minutes, second=0, microsecond=0)
+
+
+def current_prices(df, now):
+    """Returns the current and next slot prices at `now`."""
+    curve = price_curve(df)
+    i = curve.slot(now)
+    if i < 0:
+        return {"as_of": now.isoformat(), "price": None, "next_price": None}
+
+    j = curve.next_slot(i)
+    return {
+        "as_of": now.isoformat(),
+        "slot_start": df["valid_from"].iloc[curve.rows[i]].isoformat(),
+        "price": float(curve.prices[i]),
+        "next_price": float(curve.prices[j]) if j >= 0 else None,
+    }
+
+
+def off_peak_averages(df, now):
+    """Returns the mean off-peak price of today and tomorrow, if published."""
+    hours = df["valid_from"].dt.hour
+    dates = df["valid_from"].dt.date
+    off_peak = (hours < PEAK_START) | (hours >= PEAK_END)
+
+    averages = {}
+    for name, day in (("today", now.date()), ("tomorrow", now.date() + timedelta(1))):
+        prices = df["value_inc_vat"][off_peak & (dates == day)].to_numpy()
+        averages[name] = float(np.mean(prices)) if len(prices) else None
+    return averages
+
+
+class Snapshot:
+    """
+    One price data version and the start time searches made on it.
+
+    Cheapest runs are searched from the end of the current interval, so no
+    start time handed out during it lies in the past, and reused until the
+    interval ends.
+
+    Attributes
+    ----------
+    version : int
+        Version of the prices.
+    df : pandas.DataFrame
+        The prices.
+    loaded : datetime
+        When the prices were loaded, to the second.
+    """
+
+    def __init__(self, version, df, loaded):
+        self.version = version
+        self.df = df
+        self.loaded = loaded.replace(microsecond=0)
+        self._interval = None
+        self._searches = {}
+        self._lock = threading.Lock()
+
+    def period(self, changes, now):
+        """
+        Returns the start and end of the period a response holds for.
+
+        Price responses hold for the price slot of `now`, or its interval where
+        there is no slot, and cheapest start times for its interval.
+        """
+        if changes == "slot":
+            curve = price_curve(self.df)
+            i = curve.slot(now)
+            if i >= 0:
+                return (
+                    datetime.fromtimestamp(int(curve.starts[i]), london_timezone),
+                    datetime.fromtimestamp(int(curve.ends[i]), london_timezone),
+                )
+        start = _interval_start(now)
+        return start, start + INTERVAL
+
+    def etag(self, route, since):
+        """Returns the entity tag of `route` for this data version and period."""
+        key = repr((route, since.astimezone(timezone.utc).isoformat()))
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return f'"{self.version}-{digest}"'
+
+    def search(self, key, now, run):
+        """
+        Returns `run(start)` for the interval of `now`, reusing earlier results.
+
+        `start` is the end of the interval.
+        """
+        interval = _interval_start(now)
+        with self._lock:
+            if interval != self._interval:
+                self._interval, self._searches = interval, {}
+            cached = self._searches.get(key)
+        if cached is not None:
+            return cached
+
+        result = run(interval + INTERVAL)
+        with self._lock:
+            if interval == self._interval and len(self._searches) < MAX_RESPONSES:
+                self._searches[key] = result
+        return result
+
+
+class RecommendationService:
+    """
+    Serves price recommendations, caching responses per data version.
+
+    Parameters
+    ----------
+    url : str, optional
+        Tariff `standard-unit-rates/` URL, defaults to the default region's Agile.
+    clock : callable, optional
+        Returns the current tz-aware time.
+    """
+
+    def __init__(self, url=None, clock=None):
+        self.url = url or tariff_urls()["agile"]
+        self.clock = clock or (lambda: datetime.now(london_timezone))
+        self._prices = PriceCache(clock=self.clock)
+        self._versions = itertools.count(1)
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        now = self.clock()
+        df = load_prices(self.url, now)
+        df.attrs["version"] = next(self._versions)
+        df.attrs["loaded"] = now
+        return df
+
+    def snapshot(self):
+        """Returns the snapshot of the current data version."""
+        df = self._prices.get(self.url, self._load)
+        version = df.attrs["version"]
+
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            with self._lock:
+                if self._snapshot is None or self._snapshot.version != version:
+                    self._snapshot = Snapshot(version, df, df.attrs["loaded"])
+                snapshot = self._snapshot
+        return snapshot
+
+    def route(self, path, query):
+        """
+        Returns the builder for a request, or None for an unknown path.
+
+        Builders take a `Snapshot` and the request time and return the
+        JSON-serialisable response. Their `changes` attribute says whether the
+        response changes with each price `slot` or `interval`.
+        """
+        params = {key: values[0] for key, values in parse_qs(query).items()}
+        parts = path.strip("/").split("/")
+
+        if parts == ["prices", "current"]:
+            return _changes("slot", lambda s, now: current_prices(s.df, now))
+        if parts == ["prices", "off-peak"]:
+            return _changes("slot", lambda s, now: off_peak_averages(s.df, now))
+        if parts == ["summary"]:
+
+            def summary(s, now):
+                return {
+                    "current": current_prices(s.df, now),
+                    "off_peak": off_peak_averages(s.df, now),
+                    "cheapest": s.search(
+                        "summary",
+                        now,
+                        lambda start: {
+                            name: cheapest_start(s.df, name, start=start)["best"]
+                            for name in APPLIANCES
+                        },
+                    ),
+                }
+
+            return _changes("interval", summary)
+        if len(parts) == 2 and parts[0] == "cheapest":
+            appliance = parts[1]
+            if appliance not in (*APPLIANCES, "kettle", "custom"):
+                return None
+
+            def build(s, now):
+                return s.search(
+                    (path, query),
+                    now,
+                    lambda start: cheapest_start(
+                        s.df,
+                        appliance,
+                        _float(params.get("duration")),
+                        _float(params.get("power")),
+                        start,
+                        parse_time(params.get("deadline"), start),
+                        top=int(params.get("top", 3)),
+                    ),
+                )
+
+            return _changes("interval", build)
+        return None
+
+    def handle(self, path, query, if_none_match=None, if_modified_since=None):
+        """
+        Answers a GET request.
+
+        Returns
+        -------
+        status : int
+        body : bytes
+        headers : dict
+        """
+        build = self.route(path, query)
+        if build is None:
+            return 404, b'{"error": "not found"}', {}
+
+        snapshot = self.snapshot()
+        now = self.clock()
+        since, until = snapshot.period(build.changes, now)
+        modified = max(snapshot.loaded, since)
+        etag = snapshot.etag((path, query), since)
+        headers = {
+            "ETag": etag,
+            "Last-Modified": format_datetime(
+                modified.astimezone(timezone.utc), usegmt=True
+            ),
+            "Cache-Control": f"max-age={max(0, int((until - now).total_seconds()))}",
+        }
+        if _not_modified(etag, modified, if_none_match, if_modified_since):
+            return 304, b"", headers
+
+        try:
+            body = json.dumps(build(snapshot, now), indent=2).encode()
+        except ValueError as e:
+            return 400, json.dumps({"error": str(e)}).encode(), {}
+        return 200, body, headers
+
+
+def _changes(period, build):
+    build.changes = period
+    return build
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def _not_modified(etag, modified, if_none_match, if_modified_since):
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")]
+    if if_modified_since is not None:
+        try:
+            return modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def make_server(service, host="127.0.0.1", port=8600):
+    """Returns an HTTP server answering requests with `service`."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self, send_body=True):
+            parts = urlsplit(self.path)
+            try:
+                status, body, headers = service.handle(
+                    parts.path,
+                    parts.query,
+                    self.headers.get("If-None-Match"),
+                    self.headers.get("If-Modified-Since"),
+                )
+            except Exception as e:
+                status, body, headers = 503, json.dumps({"error": str(e)}).encode(), {}
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+        def do_HEAD(self):
+            self.do_GET(send_body=False)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--region", default=DEFAULT_REGION, choices=REGIONS)
+    parser.add_argument("--url", help="tariff rates URL, overrides --region")
+    args = parser.parse_args()
+
+    server = make_server(
+        RecommendationService(args.url or tariff_urls(args.region)["agile"]),
+        args.host,
+        args.port,
+    )
+    print(f"Serving recommendations on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
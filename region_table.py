@@ -0,0 +1,166 @@
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from price_curve import PriceCurve, price_curve
+from price_store import from_epoch, to_epoch
+from regions import REGIONS
+
+
+def _empty():
+    return pd.DataFrame(
+        {
+            "region": pd.Categorical([], categories=list(REGIONS)),
+            "valid_from": np.empty(0, np.int64),
+            "valid_to": np.empty(0, np.int64),
+            "value_inc_vat": np.empty(0, np.float32),
+            "value_exc_vat": np.empty(0, np.float32),
+        }
+    )
+
+
+def _block(region, df):
+    """Returns a region's rates as table rows."""
+    return pd.DataFrame(
+        {
+            "region": pd.Categorical(
+                np.repeat(region, len(df)), categories=list(REGIONS)
+            ),
+            "valid_from": to_epoch(df["valid_from"]).to_numpy(np.int64),
+            "valid_to": to_epoch(df["valid_to"]).to_numpy(np.int64),
+            "value_inc_vat": df["value_inc_vat"].to_numpy(np.float32),
+            "value_exc_vat": df["value_exc_vat"].to_numpy(np.float32),
+        }
+    )
+
+
+def _sorted(blocks):
+    """Concatenates table rows, sorted by region code then `valid_from`."""
+    if not blocks:
+        return _empty()
+    data = pd.concat(blocks, ignore_index=True)
+    order = np.lexsort(
+        (data["valid_from"].to_numpy(), data["region"].cat.codes.to_numpy())
+    )
+    return data.iloc[order].reset_index(drop=True)
+
+
+class RegionTable:
+    """
+    Rates of the loaded regions in one compact table.
+
+    Rows are held sorted by region then `valid_from`, with a categorical
+    `region`, int64 epoch-second times and float32 prices, so each region is a
+    contiguous block found by an offset lookup.
+
+    The table holds the rates of every loaded region. Region frames, and their
+    price curves, are derived from it when asked for and kept only while in
+    use. Tables are never modified: `replace` returns a new table, so a reader
+    never sees a partial update.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        `region`, `valid_from`, `valid_to`, `value_inc_vat` and `value_exc_vat`
+        columns, sorted by region code then `valid_from`.
+    versions : dict, optional
+        Version of each region's rates, copied to the `attrs` of its frame.
+    frames : dict, optional
+        Region frames already derived from the same rates, reused.
+    """
+
+    def __init__(self, data, versions=None, frames=None):
+        self.data = data
+        self.versions = dict(versions or {})
+        codes = data["region"].cat.codes.to_numpy()
+        self._offsets = np.searchsorted(codes, np.arange(len(REGIONS) + 1))
+        self._index = {region: i for i, region in enumerate(REGIONS)}
+        self._frames = weakref.WeakValueDictionary(frames or {})
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        Builds the table from per-region rate DataFrames.
+
+        Parameters
+        ----------
+        frames : dict
+            Rates in `fetch_data` form keyed by region code. `None` or empty
+            frames are left out.
+        """
+        frames = {r: df for r, df in frames.items() if df is not None and len(df)}
+        return cls(
+            _sorted([_block(region, df) for region, df in frames.items()]),
+            {region: df.attrs.get("version", id(df)) for region, df in frames.items()},
+        )
+
+    def replace(self, region, df, version=None):
+        """
+        Returns a table with a region's rates replaced by those of `df`.
+
+        A `None` or empty `df` removes the region. Frames of the other regions
+        are carried over.
+        """
+        rows = self.data["region"].cat.codes.to_numpy() != self._index[region]
+        blocks = [self.data[rows]]
+        versions = {r: v for r, v in self.versions.items() if r != region}
+        if df is not None and len(df):
+            blocks.append(_block(region, df))
+            versions[region] = version
+        frames = {r: f for r, f in self._frames.items() if r != region}
+        return RegionTable(_sorted(blocks), versions, frames)
+
+    def __contains__(self, region):
+        rows = self._rows(region)
+        return rows.stop > rows.start
+
+    def __len__(self):
+        return len(self.data)
+
+    def regions(self):
+        """Returns the codes of the regions holding rates."""
+        return [region for region in REGIONS if region in self]
+
+    def _rows(self, region):
+        i = self._index.get(region)
+        if i is None:
+            return slice(0, 0)
+        return slice(self._offsets[i], self._offsets[i + 1])
+
+    def frame(self, region):
+        """
+        Returns a region's rates in `fetch_data` form.
+
+        The frame is built on first use and shared until no longer referenced.
+        Prices are rounded back to four decimal places, undoing the float32
+        storage error, and its `price_curve` is built from the table's arrays.
+        """
+        df = self._frames.get(region)
+        if df is not None:
+            return df
+
+        block = self.data.iloc[self._rows(region)]
+        df = pd.DataFrame(
+            {
+                "value_exc_vat": block["value_exc_vat"].astype("float64").round(4),
+                "value_inc_vat": block["value_inc_vat"].astype("float64").round(4),
+                "valid_from": from_epoch(block["valid_from"]),
+                "valid_to": from_epoch(block["valid_to"]),
+            }
+        ).reset_index(drop=True)
+        df.attrs["version"] = self.versions.get(region)
+        price_curve(
+            df,
+            PriceCurve(
+                block["valid_from"].to_numpy(),
+                block["valid_to"].to_numpy(),
+                df["value_inc_vat"].to_numpy(),
+            ),
+        )
+        self._frames[region] = df
+        return df
+
+    def memory_usage(self):
+        """Returns the table's memory use [bytes]."""
+        return int(self.data.memory_usage(deep=True).sum())
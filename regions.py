@@ -0,0 +1,48 @@
+from octopus_api import rates_url
+
+# Grid supply point (GSP) region codes used as tariff code suffixes. There are
+# no I or O regions.
+REGIONS = {
+    "A": "Eastern England",
+    "B": "East Midlands",
+    "C": "London",
+    "D": "Merseyside and Northern Wales",
+    "E": "West Midlands",
+    "F": "North Eastern England",
+    "G": "North Western England",
+    "H": "Southern England",
+    "J": "South Eastern England",
+    "K": "Southern Wales",
+    "L": "South Western England",
+    "M": "Yorkshire",
+    "N": "Southern Scotland",
+    "P": "Northern Scotland",
+}
+
+DEFAULT_REGION = "H"
+
+AGILE_PRODUCT = "AGILE-24-10-01"
+TRACKER_PRODUCT = "SILVER-24-10-01"
+
+
+def region_label(region):
+    """Returns e.g. `H - Southern England` for a region code."""
+    return f"{region} - {REGIONS[region]}"
+
+
+def tariff_code(product, region, fuel="E"):
+    """Returns a single-rate tariff code, e.g. `E-1R-AGILE-24-10-01-H`."""
+    if region not in REGIONS:
+        raise ValueError(f"Unknown region {region!r}, expected one of {list(REGIONS)}.")
+    return f"{fuel}-1R-{product}-{region}"
+
+
+def tariff_urls(region=DEFAULT_REGION):
+    """Returns the Agile and Tracker electricity and gas rate URLs of a region."""
+    return {
+        "agile": rates_url(AGILE_PRODUCT, tariff_code(AGILE_PRODUCT, region)),
+        "tracker_e": rates_url(TRACKER_PRODUCT, tariff_code(TRACKER_PRODUCT, region)),
+        "tracker_g": rates_url(
+            TRACKER_PRODUCT, tariff_code(TRACKER_PRODUCT, region, "G")
+        ),
+    }
@@ -0,0 +1,234 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from optimise import to_datetimes
+from price_curve import price_curve, to_seconds
+
+# Number of remove-and-reinsert passes used to improve the greedy schedule
+MAX_PASSES = 10
+
+# Schedules of at most this many jobs are checked by an exhaustive search
+EXACT_JOBS = 4
+
+# Placements tried by the exhaustive search before it gives up
+MAX_NODES = 50_000
+
+
+@dataclass
+class Job:
+    """
+    An appliance run to be scheduled.
+
+    Attributes
+    ----------
+    name : str
+        Label shown in the schedule.
+    power : float
+        Power draw [kW].
+    duration : timedelta
+        Run length.
+    earliest : datetime
+        Earliest allowed start.
+    deadline : datetime
+        Time the run must finish by.
+    """
+
+    name: str
+    power: float
+    duration: timedelta
+    earliest: datetime
+    deadline: datetime
+
+
+def _candidates(curve, job):
+    """
+    Returns the candidate start slots of a job, their costs and the number of
+    price slots each run overlaps.
+    """
+    run = round(job.duration.total_seconds())
+    first, last = to_seconds(job.earliest), to_seconds(job.deadline) - run
+    slots = np.flatnonzero((curve.starts >= first) & (curve.starts <= last))
+    costs = curve.cost(curve.starts[slots], curve.starts[slots] + run, job.power)
+
+    # Slots drawing the job's power, for the power cap check
+    widths = np.maximum(
+        np.searchsorted(curve.starts, curve.starts[slots] + run, side="left") - slots,
+        1,
+    )
+    keep = ~np.isnan(costs)
+    return slots[keep], costs[keep], widths[keep]
+
+
+def _place(load, job, slots, costs, widths, cap):
+    """Returns the cheapest start slot that keeps `load` within `cap`, or None."""
+    if len(slots) == 0:
+        return None
+    peak = np.empty(len(slots))
+    for width in np.unique(widths):
+        padded = np.concatenate((load, np.zeros(width - 1)))
+        runs = widths == width
+        peak[runs] = sliding_window_view(padded, width).max(axis=1)[slots[runs]]
+    feasible = np.flatnonzero(peak + job.power <= cap + 1e-9)
+    if len(feasible) == 0:
+        return None
+    return feasible[np.argmin(costs[feasible])]
+
+
+def _occupy(load, job, option, k, sign):
+    slots, _, widths = option
+    load[slots[k] : slots[k] + widths[k]] += sign * job.power
+
+
+def _greedy(load, jobs, options, order, cap):
+    """
+    Places jobs in `order`, each in its cheapest feasible start, then moves
+    them while that lowers their cost. Returns the start of each job, or None
+    if one cannot be placed.
+    """
+    chosen = {}
+    for j in order:
+        k = _place(load, jobs[j], *options[j], cap)
+        if k is None:
+            return None
+        chosen[j] = k
+        _occupy(load, jobs[j], options[j], k, 1)
+
+    for _ in range(MAX_PASSES):
+        improved = False
+        for j in order:
+            _occupy(load, jobs[j], options[j], chosen[j], -1)
+            k = _place(load, jobs[j], *options[j], cap)
+            if options[j][1][k] < options[j][1][chosen[j]] - 1e-9:
+                chosen[j] = k
+                improved = True
+            _occupy(load, jobs[j], options[j], chosen[j], 1)
+        if not improved:
+            break
+    return chosen
+
+
+def _search(load, jobs, options, order, cap, bound=np.inf):
+    """
+    Depth-first search for the cheapest feasible starts of every job.
+
+    Jobs are placed in `order`, trying each one's starts cheapest first, and
+    partial schedules that cannot cost less than `bound` or the best found so
+    far are pruned. Returns the start of each job, or None if no schedule
+    cheaper than `bound` is found within `MAX_NODES` placements. The result is
+    optimal unless the search runs out of placements.
+    """
+    ranked = [np.argsort(option[1], kind="stable") for option in options]
+    # Lowest possible cost of the jobs still to place at each depth
+    floor = np.concatenate(
+        (np.cumsum([options[j][1].min() for j in order][::-1])[::-1], [0.0])
+    )
+    best = None
+    chosen = {}
+    nodes = 0
+
+    def visit(depth, cost):
+        nonlocal best, bound, nodes
+        if depth == len(order):
+            best, bound = dict(chosen), cost
+            return
+        j = order[depth]
+        slots, costs, widths = options[j]
+        for k in ranked[j]:
+            if cost + costs[k] + floor[depth + 1] >= bound - 1e-9 or nodes >= MAX_NODES:
+                return
+            nodes += 1
+            window = slice(slots[k], slots[k] + widths[k])
+            if load[window].max() + jobs[j].power > cap + 1e-9:
+                continue
+            load[window] += jobs[j].power
+            chosen[j] = k
+            visit(depth + 1, cost + costs[k])
+            load[window] -= jobs[j].power
+
+    visit(0, 0.0)
+    return best
+
+
+def schedule_jobs(df, jobs, power_cap):
+    """
+    Schedules appliance runs cheaply under a household power cap.
+
+    This is a heuristic. Runs start on price slot boundaries. Jobs are first
+    placed greedily, least flexible and largest first, in their cheapest start
+    that keeps every slot's total draw within the cap. Each job is then
+    repeatedly removed and re-placed in its cheapest feasible start until no
+    move lowers the total cost. With at most `EXACT_JOBS` jobs, or when the
+    greedy pass cannot place every job, a depth-first search over every
+    combination of starts, limited to `MAX_NODES` placements, looks for a
+    cheaper or feasible schedule, so small schedules are optimal.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Rates as returned by `fetch_data`.
+    jobs : list of Job
+        Runs to schedule.
+    power_cap : float
+        Maximum total power draw [kW].
+
+    Returns
+    -------
+    schedule : pandas.DataFrame
+        `name`, `start`, `end`, `power` and `cost` [p] of each job, by start.
+
+    Raises
+    ------
+    ValueError
+        If a job does not fit within its window, or no schedule keeping every
+        job within its window and the power cap is found.
+    """
+    curve = price_curve(df)
+    options = [_candidates(curve, job) for job in jobs]
+    for job, (slots, _, _) in zip(jobs, options, strict=True):
+        if not len(slots) or job.power > power_cap + 1e-9:
+            raise ValueError(
+                f"Job '{job.name}' cannot be scheduled within its window and the power cap."
+            )
+
+    order = sorted(
+        range(len(jobs)),
+        key=lambda j: (
+            len(options[j][0]),
+            -jobs[j].power * jobs[j].duration.total_seconds(),
+        ),
+    )
+    chosen = _greedy(np.zeros(len(curve)), jobs, options, order, power_cap)
+    if chosen is None or len(jobs) <= EXACT_JOBS:
+        bound = np.inf
+        if chosen is not None:
+            bound = sum(options[j][1][k] for j, k in chosen.items())
+        chosen = (
+            _search(np.zeros(len(curve)), jobs, options, order, power_cap, bound)
+            or chosen
+        )
+    if chosen is None:
+        raise ValueError(
+            "No schedule keeps every job within its window and the power cap."
+        )
+
+    starts = np.array(
+        [curve.starts[options[j][0][chosen[j]]] for j in range(len(jobs))],
+        dtype=np.int64,
+    )
+    runs = np.array(
+        [round(job.duration.total_seconds()) for job in jobs], dtype=np.int64
+    )
+    schedule = pd.DataFrame(
+        {
+            "name": [job.name for job in jobs],
+            "start": to_datetimes(starts),
+            "end": to_datetimes(starts + runs),
+            "power": [job.power for job in jobs],
+            "cost": [options[j][1][chosen[j]] for j in range(len(jobs))],
+        }
+    )
+    return schedule.sort_values("start", ignore_index=True)
@@ -0,0 +1,97 @@
+"""
+Startup profile of the Streamlit entry point.
+
+Run from the root directory with:
+
+    python startup_profile.py
+
+to print an `-X importtime` breakdown of the imports made before the first
+render, followed by the time spent in each startup stage. The stage timings are
+also printed by `streamlit run Home.py` when `AGILE_STARTUP_PROFILE=1` is set.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ENABLED = os.environ.get("AGILE_STARTUP_PROFILE") == "1"
+
+_stages = []
+_last = time.perf_counter()
+_reported = False
+
+
+def mark(name):
+    """Records the time since the previous mark as startup stage `name`."""
+    global _last
+    if not ENABLED or _reported:
+        return
+    now = time.perf_counter()
+    _stages.append((name, now - _last))
+    _last = now
+
+
+def report():
+    """Prints the recorded stages once, after the first render."""
+    global _reported
+    if not ENABLED or _reported:
+        return
+    _reported = True
+    total = sum(elapsed for _, elapsed in _stages)
+    print("Startup stages:")
+    for name, elapsed in _stages:
+        print(f"  {name:<28} {elapsed * 1000:8.1f} ms")
+    print(f"  {'total':<28} {total * 1000:8.1f} ms", flush=True)
+
+
+def parse_importtime(stderr):
+    """
+    Parses `-X importtime` output into cumulative times per top-level package.
+
+    Returns
+    -------
+    packages : dict
+        Cumulative import time [us] of each top-level package imported directly
+        by the script, largest first.
+    """
+    packages = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # Direct imports of the script are indented by a single space
+        if name.startswith("  "):
+            continue
+        packages[name.strip().split(".")[0]] += int(cumulative)
+    return dict(sorted(packages.items(), key=lambda item: -item[1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--top", type=int, default=15, help="packages to show")
+    args = parser.parse_args()
+
+    root = Path(__file__).parent
+    script = "import runpy; runpy.run_path('Home.py', run_name='__main__')"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=root,
+        env={**os.environ, "AGILE_STARTUP_PROFILE": "1"},
+        capture_output=True,
+        text=True,
+    )
+
+    packages = parse_importtime(result.stderr)
+    print("Imports before first render:")
+    for name, cumulative in list(packages.items())[: args.top]:
+        print(f"  {name:<28} {cumulative / 1000:8.1f} ms")
+    print(f"  {'total':<28} {sum(packages.values()) / 1000:8.1f} ms\n")
+    print(result.stdout, end="")
+
+
+if __name__ == "__main__":
+    main()
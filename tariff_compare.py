@@ -0,0 +1,218 @@
+from dataclasses import dataclass
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from octopus_api import london_timezone
+from price_curve import PriceCurve, to_seconds
+
+# Half-hour slots in a day
+SLOTS = 48
+
+# Relative half-hourly electricity use of built-in household shapes, each
+# normalised to sum to one over a day
+_TYPICAL = np.repeat(
+    [0.5, 0.4, 0.35, 0.35, 0.35, 0.4, 0.6, 0.9, 1.0, 0.9, 0.85, 0.85]
+    + [0.9, 0.85, 0.85, 0.9, 1.1, 1.5, 1.7, 1.6, 1.4, 1.2, 0.9, 0.7],
+    2,
+)
+_OVERNIGHT = np.zeros(SLOTS)
+_OVERNIGHT[1:9] = 1.0  # 00:30 to 04:30
+SHAPES = {
+    "Flat": np.full(SLOTS, 1 / SLOTS),
+    "Typical home": _TYPICAL / _TYPICAL.sum(),
+    "Overnight EV charging": 0.5 * _TYPICAL / _TYPICAL.sum() + 0.5 * _OVERNIGHT / 8,
+}
+
+
+def household_profile(daily_kwh, shape="Typical home"):
+    """Returns half-hourly use [kWh] of a `SHAPES` day using `daily_kwh`."""
+    return daily_kwh * SHAPES[shape]
+
+
+def _slot_times(days):
+    """Returns the start of each day's wall-clock slots, NaT where skipped."""
+    offsets = pd.to_timedelta(np.arange(SLOTS) * 30, unit="min")
+    wall_clock = pd.DatetimeIndex((days.values[:, None] + offsets.values).ravel())
+    return wall_clock.tz_localize(
+        london_timezone, ambiguous=np.ones(len(wall_clock), bool), nonexistent="NaT"
+    )
+
+
+def slot_matrix(df, days):
+    """
+    Returns a day x slot matrix of prices [p/kWh].
+
+    Days are priced as 48 London wall-clock half hours, so on clock change
+    days the skipped spring hour has no price and the repeated autumn hour is
+    priced once. Rates without a `valid_to`, such as the latest Tracker rate,
+    are taken to last a day. Slots without a rate are NaN.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Rates with `valid_from`, `valid_to` and `value_inc_vat`, of any length.
+    days : pandas.DatetimeIndex
+        Naive London dates to price.
+    """
+    times = _slot_times(days)
+    prices = np.full(len(times), np.nan)
+    if len(df):
+        ends = df["valid_to"].fillna(df["valid_from"] + timedelta(days=1))
+        order = np.argsort(to_seconds(df["valid_from"]), kind="stable")
+        curve = PriceCurve(
+            to_seconds(df["valid_from"])[order],
+            to_seconds(ends)[order],
+            df["value_inc_vat"].to_numpy()[order],
+        )
+        exists = ~times.isna()
+        prices[exists] = curve.price_at(to_seconds(times[exists]))
+    return prices.reshape(len(days), SLOTS)
+
+
+def rate_days(df):
+    """Returns the naive London dates spanned by a rate DataFrame."""
+    if df.empty:
+        return pd.DatetimeIndex([])
+    first = df["valid_from"].min().tz_convert(london_timezone).date()
+    last = (df["valid_to"].max() - timedelta(seconds=1)).tz_convert(london_timezone)
+    return pd.date_range(first, last.date(), freq="D")
+
+
+def daily_means(matrix):
+    """Returns the mean price of each day of a `slot_matrix`, NaN if unpriced."""
+    counts = np.sum(~np.isnan(matrix), axis=1)
+    return np.nansum(matrix, axis=1) / np.where(counts, counts, np.nan)
+
+
+@dataclass
+class TariffComparison:
+    """
+    What each household would have paid on Agile and on Tracker, per day.
+
+    Cost arrays are [p] with shape (profiles, days).
+    """
+
+    days: pd.DatetimeIndex
+    agile_electricity: np.ndarray
+    agile_gas: np.ndarray
+    tracker_electricity: np.ndarray
+    tracker_gas: np.ndarray
+
+    @property
+    def agile(self):
+        return self.agile_electricity + self.agile_gas
+
+    @property
+    def tracker(self):
+        return self.tracker_electricity + self.tracker_gas
+
+    @property
+    def difference(self):
+        """Agile minus Tracker cost of each day, negative where Agile is cheaper."""
+        return self.agile - self.tracker
+
+    @property
+    def cumulative(self):
+        """Running total of `difference` over the days."""
+        return np.cumsum(self.difference, axis=1)
+
+    def summary(self):
+        """Returns each profile's totals [p] and the share of days Agile won."""
+        return pd.DataFrame(
+            {
+                "agile": self.agile.sum(axis=1),
+                "tracker": self.tracker.sum(axis=1),
+                "difference": self.difference.sum(axis=1),
+                "agile_cheaper_days": np.sum(self.difference < 0, axis=1)
+                / (len(self.days) or np.nan),
+            }
+        )
+
+    def daily(self, profile=0):
+        """Returns one profile's per-day costs, difference and running total [p]."""
+        return pd.DataFrame(
+            {
+                "agile_electricity": self.agile_electricity[profile],
+                "agile_gas": self.agile_gas[profile],
+                "tracker_electricity": self.tracker_electricity[profile],
+                "tracker_gas": self.tracker_gas[profile],
+                "agile": self.agile[profile],
+                "tracker": self.tracker[profile],
+                "difference": self.difference[profile],
+                "cumulative": self.cumulative[profile],
+            },
+            index=self.days,
+        )
+
+
+def compare_tariffs(agile, tracker_e, tracker_g, electricity, gas=0.0, gas_rate=None):
+    """
+    Costs household consumption on Agile and on Tracker over the same days.
+
+    Every profile is priced in one pass: half-hourly use is multiplied against
+    day x slot price matrices, so a year of history for thousands of profiles
+    is a single matrix product. Only days with a price for every existing slot
+    on both tariffs are compared. Standing charges are not included.
+
+    Parameters
+    ----------
+    agile, tracker_e, tracker_g : pandas.DataFrame
+        Agile electricity and Tracker electricity and gas rates.
+    electricity : array-like
+        Half-hourly electricity use [kWh], of shape (48,) or (profiles, 48)
+        for the same use every day, or (profiles, days, 48) per day of
+        `rate_days(agile)`.
+    gas : float or array-like
+        Daily gas use [kWh], a scalar or of shape (profiles,), or
+        (profiles, days) per day of `rate_days(agile)`.
+    gas_rate : float, optional
+        Gas unit rate [p/kWh] paid alongside Agile, which has no gas tariff.
+        Defaults to Tracker gas, in which case gas costs the same on both.
+
+    Returns
+    -------
+    comparison : TariffComparison
+    """
+    days = rate_days(agile)
+
+    prices = {
+        name: slot_matrix(df, days)
+        for name, df in (("agile", agile), ("tracker_e", tracker_e))
+    }
+    gas_prices = daily_means(slot_matrix(tracker_g, days))
+
+    # Compare only days fully priced on both tariffs, with a gas rate
+    skipped = _slot_times(days).isna().reshape(len(days), SLOTS)
+    complete = ~np.isnan(gas_prices)
+    for matrix in prices.values():
+        complete &= np.all(~np.isnan(matrix) | skipped, axis=1)
+    keep = np.flatnonzero(complete)
+
+    use = np.asarray(electricity, dtype=float)
+    if use.ndim == 1:
+        use = use[None, :]
+    if use.ndim == 3:
+        use = use[:, keep, :]
+    gas = np.asarray(gas, dtype=float)
+    if gas.ndim == 1:
+        gas = gas[:, None]
+    profiles = max(len(use), len(gas) if gas.ndim else 1)
+    use = np.broadcast_to(use, (profiles, *use.shape[1:]))
+    gas = np.broadcast_to(gas, (profiles, len(days)))[:, keep]
+
+    def cost(matrix):
+        matrix = np.nan_to_num(matrix[keep])
+        if use.ndim == 2:
+            return use @ matrix.T
+        return np.einsum("pds,ds->pd", use, matrix)
+
+    tracker_gas = gas * gas_prices[keep]
+    return TariffComparison(
+        days=days[keep],
+        agile_electricity=cost(prices["agile"]),
+        agile_gas=tracker_gas if gas_rate is None else gas * gas_rate,
+        tracker_electricity=cost(prices["tracker_e"]),
+        tracker_gas=tracker_gas,
+    )
@@ -0,0 +1,22 @@
+import io
+
+import pandas as pd
+import pytest
+
+from consumption import iter_csv_consumption, load_consumption
+
+
+@pytest.mark.parametrize("chunksize", [3, 4, 5, 100])
+def test_clock_change_split_across_chunks(chunksize):
+    # The autumn change repeats 01:00-02:00 London time
+    utc = pd.date_range(
+        "2024-10-26 22:00", "2024-10-27 04:00", freq="30min", tz="UTC", inclusive="left"
+    )
+    local = utc.tz_convert("Europe/London").strftime("%Y-%m-%dT%H:%M:%S")
+    csv = "Consumption (kWh), Start\n" + "".join(f"0.5,{t}\n" for t in local)
+
+    df = load_consumption(iter_csv_consumption(io.StringIO(csv), chunksize))
+
+    pd.testing.assert_index_equal(
+        pd.DatetimeIndex(df["interval_start"]), utc.as_unit("ns"), check_names=False
+    )
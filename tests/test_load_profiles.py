@@ -0,0 +1,39 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generators import agile_prices
+from load_profiles import load_profile_csv, profile_costs
+from price_curve import PriceCurve
+
+
+@pytest.fixture
+def curve():
+    return PriceCurve.from_frame(agile_prices("2024-03-30 00:00", 48, seed=1))
+
+
+def test_load_profile_csv_holds_listed_minutes():
+    profile = load_profile_csv(io.StringIO("minute,power_kw\n3,0.5\n0,2.0\n"))
+
+    np.testing.assert_array_equal(profile, [2.0, 2.0, 2.0, 0.5])
+
+
+@pytest.mark.parametrize("text", ["power_kw\n", "minute,power_kw\n"])
+def test_load_profile_csv_rejects_empty_files(text):
+    with pytest.raises(ValueError, match="no power readings"):
+        load_profile_csv(io.StringIO(text))
+
+
+def test_profile_costs_match_price_curve(curve):
+    start = pd.Timestamp("2024-03-30 06:00", tz="UTC")
+    costs = profile_costs(curve, np.full(90, 2.0), start, step=15)
+
+    expected = [curve.cost(t, t + pd.Timedelta(minutes=90), 2.0) for t in costs["time"]]
+    np.testing.assert_allclose(costs["cost"], expected)
+
+
+def test_profile_costs_rejects_empty_profiles(curve):
+    with pytest.raises(ValueError, match="load profile is empty"):
+        profile_costs(curve, np.empty(0), pd.Timestamp("2024-03-30 06:00", tz="UTC"))
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generators import agile_prices
+from octopus_api import london_timezone
+from price_curve import PriceCurve, to_seconds
+
+
+def rates(start, prices):
+    valid_from = pd.date_range(start, periods=len(prices), freq="30min")
+    return pd.DataFrame(
+        {
+            "value_inc_vat": prices,
+            "valid_from": valid_from,
+            "valid_to": valid_from + pd.Timedelta(minutes=30),
+        }
+    )
+
+
+@pytest.fixture
+def curve():
+    start = pd.Timestamp("2024-06-01 00:00", tz=london_timezone)
+    return PriceCurve.from_frame(rates(start, [10.0, 20.0, 30.0, 40.0]))
+
+
+def at(minutes):
+    return pd.Timestamp("2024-06-01 00:00", tz=london_timezone) + pd.Timedelta(
+        minutes=minutes
+    )
+
+
+def test_cost_of_partial_slots(curve):
+    # 20 minutes at 10p, then 30 at 20p and 5 at 30p
+    expected = (20 * 10 + 30 * 20 + 5 * 30) / 60
+    assert curve.cost(at(10), at(65)) == pytest.approx(expected)
+    assert curve.cost(at(10), at(65), power=2.5) == pytest.approx(2.5 * expected)
+    # Within one slot
+    assert curve.cost(at(35), at(40)) == pytest.approx(5 * 20 / 60)
+    assert curve.cost(at(40), at(40)) == 0
+
+
+def test_cost_is_element_wise(curve):
+    starts = np.array([at(0), at(15), at(90)])
+    costs = curve.cost(starts, starts + pd.Timedelta(minutes=30))
+
+    np.testing.assert_allclose(costs, [5.0, (15 * 10 + 15 * 20) / 60, 20.0])
+
+
+def test_cost_crossing_the_end_of_the_data(curve):
+    assert curve.cost(at(110), at(120)) == pytest.approx(10 * 40 / 60)
+    assert np.isnan(curve.cost(at(110), at(125)))
+    assert np.isnan(curve.cost(at(-5), at(10)))
+    assert np.isnan(curve.cost(at(130), at(140)))
+
+
+def test_cost_across_a_gap():
+    start = pd.Timestamp("2024-06-01 00:00", tz=london_timezone)
+    df = rates(start, [10.0, 20.0, 30.0]).drop(index=1)
+    curve = PriceCurve.from_frame(df)
+
+    assert np.isnan(curve.cost(at(20), at(70)))
+    assert curve.cost(at(60), at(90)) == pytest.approx(15.0)
+    assert np.isnan(curve.price_at(at(45)))
+
+
+def test_between(curve):
+    window = curve.between(at(0), at(60))
+    assert (window.start, window.stop) == (0, 3)
+    window = curve.between(at(1), at(59))
+    assert (window.start, window.stop) == (1, 2)
+    window = curve.between(at(200), at(300))
+    assert window.start == window.stop
+
+
+@pytest.mark.parametrize(
+    "day, hours", [("2024-03-31", 23), ("2024-10-27", 25), ("2024-06-01", 24)]
+)
+def test_clock_change_days(day, hours):
+    df = agile_prices(pd.Timestamp(day, tz=london_timezone) - pd.Timedelta(days=1), 144)
+    curve = PriceCurve.from_frame(df)
+    midnight = pd.Timestamp(day, tz=london_timezone)
+    next_midnight = pd.Timestamp(day, tz=london_timezone) + pd.DateOffset(days=1)
+
+    window = curve.between(midnight, next_midnight - pd.Timedelta(seconds=1))
+    assert window.stop - window.start == 2 * hours
+    assert to_seconds(next_midnight) - to_seconds(midnight) == hours * 3600
+
+    # The day's cost is the sum of its slots, whatever its length
+    assert curve.cost(midnight, next_midnight) == pytest.approx(
+        curve.prices[window].sum() / 2
+    )
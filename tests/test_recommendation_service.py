@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+import recommendation_service
+from benchmarks.generators import agile_prices
+from octopus_api import london_timezone
+from recommendation_service import RecommendationService
+
+START = pd.Timestamp("2024-06-01 00:00", tz=london_timezone)
+
+
+@pytest.fixture
+def clock():
+    return [(START + timedelta(hours=10, minutes=2)).to_pydatetime()]
+
+
+@pytest.fixture
+def service(monkeypatch, clock):
+    df = agile_prices(START, 96, seed=1)
+    df["valid_from"] = df["valid_from"].dt.tz_convert(london_timezone)
+    df["valid_to"] = df["valid_to"].dt.tz_convert(london_timezone)
+    monkeypatch.setattr(recommendation_service, "load_prices", lambda url, now: df)
+    return RecommendationService("http://test/", clock=lambda: clock[0])
+
+
+@pytest.mark.parametrize(
+    "path, query, later",
+    [
+        ("/prices/current", "", timedelta(minutes=30)),
+        ("/summary", "", timedelta(minutes=5)),
+        ("/cheapest/custom", "duration=60&power=2", timedelta(minutes=5)),
+    ],
+)
+def test_conditional_polls_see_the_next_period(service, clock, path, query, later):
+    status, body, headers = service.handle(path, query)
+    assert status == 200
+
+    # Unchanged within the period
+    clock[0] += timedelta(minutes=1)
+    status, _, same = service.handle(path, query, if_none_match=headers["ETag"])
+    assert status == 304
+    assert same["ETag"] == headers["ETag"]
+
+    clock[0] += later
+    status, _, after = service.handle(path, query, if_none_match=headers["ETag"])
+    assert status == 200
+    assert after["ETag"] != headers["ETag"]
+    status, _, _ = service.handle(
+        path, query, if_modified_since=headers["Last-Modified"]
+    )
+    assert status == 200
+
+
+def test_current_price_follows_the_slot(service, clock):
+    _, body, _ = service.handle("/prices/current", "")
+    clock[0] += timedelta(hours=2)
+    _, later, _ = service.handle("/prices/current", "")
+
+    assert body != later
@@ -0,0 +1,125 @@
+import itertools
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generators import agile_prices
+from price_curve import price_curve, to_seconds
+from scheduler import Job, schedule_jobs
+
+START = pd.Timestamp("2024-06-01 00:00", tz="UTC")
+
+
+@pytest.fixture
+def df():
+    return agile_prices(START, 96, seed=7)
+
+
+def job(name, power, hours, earliest=0.0, within=24.0):
+    return Job(
+        name,
+        power,
+        timedelta(hours=hours),
+        START + timedelta(hours=earliest),
+        START + timedelta(hours=within),
+    )
+
+
+def slot_loads(df, schedule):
+    """Returns the total power drawn in each price slot by a schedule."""
+    curve = price_curve(df)
+    load = np.zeros(len(curve))
+    for row in schedule.itertuples():
+        overlaps = (curve.starts < to_seconds(row.end)) & (
+            curve.ends > to_seconds(row.start)
+        )
+        load[overlaps] += row.power
+    return load
+
+
+def brute_force(df, jobs, cap):
+    """Returns the lowest total cost over every feasible combination of starts."""
+    curve = price_curve(df)
+    options = []
+    for j in jobs:
+        run = round(j.duration.total_seconds())
+        starts = curve.starts[
+            (curve.starts >= to_seconds(j.earliest))
+            & (curve.starts + run <= to_seconds(j.deadline))
+        ]
+        costs = curve.cost(starts, starts + run, j.power)
+        options.append(
+            [
+                (s, s + run, c)
+                for s, c in zip(starts, costs, strict=True)
+                if not np.isnan(c)
+            ]
+        )
+
+    best = np.inf
+    for runs in itertools.product(*options):
+        load = np.zeros(len(curve))
+        for j, (start, end, _) in zip(jobs, runs, strict=True):
+            load[(curve.starts < end) & (curve.ends > start)] += j.power
+        if load.max() <= cap + 1e-9:
+            best = min(best, sum(cost for _, _, cost in runs))
+    return best
+
+
+def test_schedule_keeps_jobs_in_their_windows_and_under_the_cap(df):
+    jobs = [
+        job("dishwasher", 2.0, 3.75),
+        job("washer", 2.0, 2.5),
+        job("dryer", 2.5, 3.0, earliest=2.5),
+        job("oven", 2.5, 1.0, within=12.0),
+        job("heater", 1.5, 4.0, earliest=6.0, within=20.0),
+        job("car", 3.0, 5.0),
+    ]
+    schedule = schedule_jobs(df, jobs, 4.5).set_index("name")
+
+    for j in jobs:
+        assert schedule.loc[j.name, "start"] >= j.earliest
+        assert schedule.loc[j.name, "end"] <= j.deadline
+    assert slot_loads(df, schedule.reset_index()).max() <= 4.5 + 1e-9
+
+
+@pytest.mark.parametrize(
+    "jobs, cap",
+    [
+        ([job("a", 2.0, 1.0), job("b", 2.0, 2.0)], 3.0),
+        ([job("a", 2.0, 1.5, within=6.0), job("b", 1.0, 0.5, within=6.0)], 2.5),
+        (
+            [
+                job("a", 2.0, 1.0, within=8.0),
+                job("b", 2.0, 1.5, within=8.0),
+                job("c", 2.0, 0.5, earliest=2.0, within=8.0),
+            ],
+            2.0,
+        ),
+    ],
+)
+def test_small_schedules_are_optimal(df, jobs, cap):
+    schedule = schedule_jobs(df, jobs, cap)
+
+    assert schedule["cost"].sum() == pytest.approx(brute_force(df, jobs, cap))
+    assert slot_loads(df, schedule).max() <= cap + 1e-9
+
+
+def test_short_jobs_reserve_only_their_own_slots(df):
+    # Two hours only hold a half-hour and a 90 minute run back to back if
+    # each reserves just the slots it overlaps
+    jobs = [job("short", 2.0, 0.5, 1.0, 3.0), job("long", 2.0, 1.5, 1.0, 3.0)]
+    schedule = schedule_jobs(df, jobs, 2.0)
+
+    assert schedule["start"].iloc[1] == schedule["end"].iloc[0]
+
+
+def test_infeasible_schedules_raise(df):
+    with pytest.raises(ValueError, match="power cap"):
+        schedule_jobs(
+            df, [job("a", 2.0, 1.0, 1.0, 2.0), job("b", 2.0, 1.0, 1.0, 2.0)], 3.0
+        )
+    with pytest.raises(ValueError, match="'late'"):
+        schedule_jobs(df, [job("late", 1.0, 2.0, 47.0, 49.0)], 3.0)
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generators import agile_prices
+from price_curve import PriceCurve, to_seconds
+from window_table import WindowTable, _suffix_argmin
+
+
+def brute_force_argmin(costs):
+    best = np.full(costs.shape, -1)
+    for d, row in enumerate(costs):
+        for i in range(len(row)):
+            rest = row[i:]
+            if not np.isnan(rest).all():
+                best[d, i] = i + np.nanargmin(rest)
+    return best
+
+
+@pytest.fixture
+def curve():
+    return PriceCurve.from_frame(agile_prices("2024-03-30 00:00", 144, seed=3))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_suffix_argmin_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    # Few distinct values, so ties are common
+    costs = rng.integers(0, 4, (6, 40)).astype(float)
+    costs[rng.random(costs.shape) < 0.3] = np.nan
+    costs[2] = np.nan
+    costs[3, 25:] = np.nan
+
+    np.testing.assert_array_equal(_suffix_argmin(costs), brute_force_argmin(costs))
+
+
+@pytest.mark.parametrize("duration", [30, 95, 227, 720])
+def test_costs_match_price_curve(curve, duration):
+    table = WindowTable(curve)
+    after = pd.Timestamp("2024-03-30 07:00", tz="UTC")
+    costs = table.costs_from(duration, after, step=5, power=2.0)
+
+    starts = np.array([to_seconds(t) for t in costs["time"]])
+    expected = curve.cost(starts, starts + duration * 60, 2.0)
+    np.testing.assert_allclose(costs["cost"], expected)
+    # Only runs finishing within the prices are offered
+    assert (
+        starts[-1] + duration * 60 <= curve.ends[-1] < starts[-1] + 300 + duration * 60
+    )
+
+
+@pytest.mark.parametrize("step", [5, 10, 15, 30])
+@pytest.mark.parametrize("duration", [30, 60, 227, 300])
+def test_cheapest_agrees_with_costs_from(curve, duration, step):
+    table = WindowTable(curve)
+    after = pd.Timestamp("2024-03-30 09:07", tz="UTC")
+    costs = table.costs_from(duration, after, step=step)
+    time, cost = table.cheapest(duration, after, step=step)
+
+    assert time == after or to_seconds(time) % (step * 60) == 0
+    assert cost == costs["cost"].min()
+    # Ties go to the earliest start
+    assert time == costs.loc[costs["cost"] == cost, "time"].iloc[0]
+
+
+@pytest.mark.parametrize("step", [5, 30])
+def test_starting_now_off_the_grid(step):
+    df = agile_prices("2024-03-30 00:00", 144, seed=3)
+    # Much the cheapest slot is the one already under way
+    df.loc[
+        df["valid_from"] == pd.Timestamp("2024-03-30 09:00", tz="UTC"), "value_inc_vat"
+    ] = -50.0
+    curve = PriceCurve.from_frame(df)
+    table = WindowTable(curve)
+    after = pd.Timestamp("2024-03-30 09:07", tz="UTC")
+    costs = table.costs_from(30, after, step=step)
+    time, cost = table.cheapest(30, after, step=step)
+
+    assert costs["time"].iloc[0] == after
+    assert time == after
+    assert cost == pytest.approx(curve.cost(after, after + pd.Timedelta(minutes=30)))
+    assert cost == costs["cost"].min()
+
+
+def test_cheapest_past_the_end_of_the_data(curve):
+    table = WindowTable(curve)
+    late = pd.Timestamp(curve.ends[-1] - 3600, unit="s", tz="UTC")
+
+    assert table.cheapest(120, late) is None
+    assert table.costs_from(120, late).empty
+
+
+def test_covers(curve):
+    table = WindowTable(curve, pd.Timestamp("2024-03-30 06:00", tz="UTC"))
+
+    assert table.covers(227, pd.Timestamp("2024-03-30 06:00", tz="UTC"))
+    assert not table.covers(227, pd.Timestamp("2024-03-30 05:55", tz="UTC"))
+    assert not table.covers(0.5, pd.Timestamp("2024-03-30 06:00", tz="UTC"))
@@ -1,10 +1,15 @@
+import functools
+import hashlib
+import json
+
 import numpy as np
 import pandas as pd
-import streamlit as st
-from scipy.optimize import minimize
+
+from price_store import DATA_DIR
 
 # Defaults
 cp = 4.19298  # mean value between 0C - 100C
+kettle_power = 2.1  # rated kettle power [kW]
 
 # Kettle observations
 kettle_timing = pd.DataFrame(
@@ -15,13 +20,110 @@ kettle_timing = pd.DataFrame(
     }
 )
 
+KETTLE_FIT_PATH = DATA_DIR / "kettle_fit.json"
+
 
 def kettle_energy(init_temp, cp, m, kappa):
     """First-principles kettle model"""
     return (100.0 - init_temp) * cp * m * kappa
 
 
-@st.cache_data
+def fit_kettle_model(observations=kettle_timing, rated_power=kettle_power):
+    """
+    Fits the kettle model to boil time observations by linear least squares.
+
+    Each observation heats `m` kg of water from its own starting temperature,
+    so its boil time is `t = (100 - T) * cp * m * kappa / P`. This is linear in
+    `kappa / P` and solved in closed form. Boil times only identify that ratio,
+    so the fitted heater power is the effective power reaching the water, and
+    `kappa` is the electrical energy used per unit of heat at `rated_power`.
+
+    Returns
+    -------
+    fit : dict
+        `kappa` and `power` [kW] with their standard errors `kappa_std` and
+        `power_std`, the residual `rmse` [s] and the number of observations `n`.
+    """
+    heat = kettle_energy(
+        observations["Starting Temp [C]"].to_numpy(dtype=float),
+        cp,
+        observations["Volume [mL]"].to_numpy(dtype=float) / 1000,
+        1.0,
+    )
+    time_s = observations["Time [s]"].to_numpy(dtype=float)
+
+    # Seconds per kJ of heat, i.e. kappa / P
+    slope = heat @ time_s / (heat @ heat)
+    residuals = time_s - slope * heat
+    dof = max(len(time_s) - 1, 1)
+    slope_std = np.sqrt(residuals @ residuals / dof / (heat @ heat))
+
+    return {
+        "kappa": float(rated_power * slope),
+        "kappa_std": float(rated_power * slope_std),
+        "power": float(1 / slope),
+        "power_std": float(slope_std / slope**2),
+        "rmse": float(np.sqrt(np.mean(residuals**2))),
+        "n": len(time_s),
+    }
+
+
+def _observations_hash(observations, rated_power):
+    payload = json.dumps(
+        {"observations": observations.to_dict(orient="list"), "power": rated_power},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@functools.cache
+def load_kettle_model(rated_power=kettle_power):
+    """
+    Returns the kettle fit, reading it from disk when the observations match.
+
+    The fit is stored in `kettle_fit.json` in the data directory, keyed by a
+    hash of the observations, so it is only recomputed when they change.
+    """
+    key = _observations_hash(kettle_timing, rated_power)
+    try:
+        stored = json.loads(KETTLE_FIT_PATH.read_text())
+        if stored["key"] == key:
+            return stored["fit"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    fit = fit_kettle_model(kettle_timing, rated_power)
+    try:
+        KETTLE_FIT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        KETTLE_FIT_PATH.write_text(json.dumps({"key": key, "fit": fit}, indent=2))
+    except OSError:
+        pass
+    return fit
+
+
+def kettle_boil_time(init_temp, volume, fit=None):
+    """
+    Estimates the time to boil water from the fitted heater power.
+
+    Parameters
+    ----------
+    init_temp : float
+        Starting temperature [C].
+    volume : float
+        Amount of water [mL].
+    fit : dict, optional
+        Kettle fit, defaults to `load_kettle_model()`.
+
+    Returns
+    -------
+    seconds, seconds_std : float
+        Boil time [s] and its standard error from that of the power.
+    """
+    fit = fit or load_kettle_model()
+    seconds = kettle_energy(init_temp, cp, volume / 1000, 1.0) / fit["power"]
+    return seconds, seconds * fit["power_std"] / fit["power"]
+
+
 def fit_kettle_efficiency():
     """
     Identifies kettle efficiency parameter `kappa`
@@ -30,14 +132,4 @@ def fit_kettle_efficiency():
     -------
     kappa : float
     """
-    temperature = kettle_timing["Starting Temp [C]"].mean()
-    volume_ml = kettle_timing["Volume [mL]"].to_numpy() / 1000
-    time_s = kettle_timing["Time [s]"].to_numpy()
-
-    def kettle_fit(kappa):
-        W = kettle_energy(temperature, cp, volume_ml, kappa)
-        residuals = W / 2.1 - time_s
-        return np.sum(residuals**2)
-
-    result = minimize(kettle_fit, x0=np.array([1.0]))
-    return result.x[0]
+    return load_kettle_model()["kappa"]
@@ -0,0 +1,226 @@
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from octopus_api import london_timezone, start_of_day
+from optimise import _seconds, to_datetimes
+from price_curve import price_curve, to_seconds
+
+# Spacing of the tabulated start times and durations [min]
+STEP = 5
+
+# Shortest and longest tabulated runs [min]
+MIN_DURATION = 30
+MAX_DURATION = 12 * 60
+
+
+def _suffix_argmin(costs):
+    """
+    Returns, for each row and column, the column of the row's smallest value at
+    or after it, taking the earliest on ties, or -1 where only NaNs remain.
+    """
+    n = costs.shape[1]
+    values = np.where(np.isnan(costs), np.inf, costs)[:, ::-1]
+    minima = np.minimum.accumulate(values, axis=1)
+    records = np.where(values == minima, np.arange(n), -1)
+    best = n - 1 - np.maximum.accumulate(records, axis=1)
+    return np.where(np.isinf(minima), -1, best)[:, ::-1]
+
+
+class WindowTable:
+    """
+    Cheapest constant-power run of every tabulated duration from every start.
+
+    Start times lie on a `STEP`-minute clock grid from `start` to the end of
+    the curve, and durations run from `MIN_DURATION` to `MAX_DURATION` in
+    `STEP` minute increments. Each duration's costs are differences of the
+    curve's running integral at grid points `k` apart, and suffix minima over
+    them give the cheapest start no earlier than each grid point, so a query
+    is an index lookup rather than a scan. Other whole-minute durations are
+    costed from the same grid integral on demand.
+
+    Parameters
+    ----------
+    curve : PriceCurve
+        Prices to run against.
+    start : datetime, optional
+        Earliest tabulated start, defaults to the start of the curve.
+    """
+
+    def __init__(self, curve, start=None):
+        step = STEP * 60
+        self.curve = curve
+        if len(curve):
+            first = curve.starts[0]
+            if start is not None:
+                first = max(first, to_seconds(start))
+            self.starts = np.arange(-(-first // step) * step, curve.ends[-1] + 1, step)
+        else:
+            self.starts = np.empty(0, dtype=np.int64)
+        self.durations = np.arange(MIN_DURATION, MAX_DURATION + 1, STEP)
+
+        n = len(self.starts)
+        self.costs = np.full((len(self.durations), n), np.nan)
+        self.energy_price, self.covered = np.empty(0), np.empty(0, dtype=np.int64)
+        if n:
+            self.energy_price, self.covered = curve.integral(self.starts)
+            for d, minutes in enumerate(self.durations):
+                k = minutes // STEP
+                if k >= n:
+                    break
+                complete = self.covered[k:] - self.covered[:-k] == k * step
+                self.costs[d, : n - k] = np.where(
+                    complete, self.energy_price[k:] - self.energy_price[:-k], np.nan
+                )
+        self.best = _suffix_argmin(self.costs)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def covers(self, duration, after=None):
+        """
+        Returns whether runs of `duration`, starting from `after`, can be
+        looked up: whole-minute runs starting within the table.
+        """
+        seconds = _seconds(duration)
+        if after is not None and (not len(self) or to_seconds(after) < self.starts[0]):
+            return False
+        return seconds > 0 and seconds % 60 == 0
+
+    def _tabulated(self, seconds):
+        """Returns the row of a tabulated duration [s], or -1."""
+        if seconds % (STEP * 60) or not (
+            MIN_DURATION * 60 <= seconds <= MAX_DURATION * 60
+        ):
+            return -1
+        return (seconds // 60 - MIN_DURATION) // STEP
+
+    def _grid(self, after, step):
+        """
+        Returns the positions of the starts from `after`, `step` apart on the
+        clock, and the stride between them.
+        """
+        stride = max(1, round(_seconds(step) / (STEP * 60)))
+        i = int(np.searchsorted(self.starts, to_seconds(after), side="left"))
+        if i < len(self):
+            # Align to the step, e.g. :00 and :30 for half-hourly starts
+            i += int(-self.starts[i] % (stride * STEP * 60)) // (STEP * 60)
+        return np.arange(i, len(self), stride), stride
+
+    def _costs(self, seconds, positions):
+        """Returns the cost [p/kW] of runs of `seconds` from grid positions."""
+        d = self._tabulated(seconds)
+        if d >= 0:
+            return self.costs[d, positions]
+        starts = self.starts[positions]
+        energy_price, covered = self.curve.integral(starts + seconds)
+        complete = covered - self.covered[positions] == seconds
+        return np.where(complete, energy_price - self.energy_price[positions], np.nan)
+
+    def _immediate(self, seconds, after, positions):
+        """
+        Returns `after` [s] and the cost [p/kW] of a run starting then, or
+        `None` when `after` is already the first grid start.
+        """
+        first = to_seconds(after)
+        if len(positions) and self.starts[positions[0]] == first:
+            return None
+        return first, self.curve.cost(first, first + seconds)
+
+    def cheapest(self, duration, after, power=1.0, step=STEP):
+        """
+        Returns the cheapest start no earlier than `after` and its cost.
+
+        Candidates are those of `costs_from` with the same `step`, and ties go
+        to the earliest. With the default step and a tabulated duration the
+        best grid start is a lookup in the precomputed suffix minima, compared
+        against starting at `after` itself when that is off the grid.
+
+        Parameters
+        ----------
+        duration : timedelta or float
+            Run length, as a timedelta or in minutes. Must be `covers`ed.
+        after : datetime
+            Earliest start time.
+        power : float
+            Power draw [kW].
+        step : timedelta or float
+            Spacing of candidate starts, rounded to a multiple of `STEP`.
+
+        Returns
+        -------
+        best : tuple or None
+            The start time and cost [p], or `None` if no run fits in the data.
+        """
+        seconds = _seconds(duration)
+        positions, stride = self._grid(after, step)
+        best = None
+        d = self._tabulated(seconds)
+        if not len(positions):
+            j = -1
+        elif d >= 0 and stride == 1:
+            j = self.best[d, positions[0]]
+        else:
+            costs = self._costs(seconds, positions)
+            j = -1 if np.isnan(costs).all() else positions[np.nanargmin(costs)]
+        if j >= 0:
+            best = self.starts[j], self._costs(seconds, [j])[0]
+
+        immediate = self._immediate(seconds, after, positions)
+        if immediate is not None and not np.isnan(immediate[1]):
+            # Starting straight away wins ties, being earliest
+            if best is None or immediate[1] <= best[1]:
+                best = immediate
+        if best is None:
+            return None
+        time = pd.Timestamp(best[0], unit="s", tz="UTC").tz_convert(london_timezone)
+        return time, float(best[1] * power)
+
+    def costs_from(self, duration, after, step=STEP, power=1.0):
+        """
+        Returns the cost of every start from `after`, `step` apart.
+
+        `step` is a timedelta or minutes, rounded to a multiple of `STEP`, and
+        starts are aligned to it on the clock, following `after` itself when
+        that is off the grid. Only starts whose run finishes within the prices
+        are included.
+
+        Returns
+        -------
+        costs : pandas.DataFrame
+            `time` and `cost` [p], as from `optimise.scan_start_times`.
+        """
+        seconds = _seconds(duration)
+        positions, _ = self._grid(after, step)
+        starts = self.starts[positions]
+        costs = self._costs(seconds, positions)
+        immediate = self._immediate(seconds, after, positions)
+        if immediate is not None:
+            starts = np.concatenate([[immediate[0]], starts])
+            costs = np.concatenate([[immediate[1]], costs])
+        fits = starts + seconds <= (self.curve.ends[-1] if len(self.curve) else 0)
+        return pd.DataFrame(
+            {"time": to_datetimes(starts[fits]), "cost": costs[fits] * power}
+        )
+
+
+_tables = {}
+
+
+def window_table(df):
+    """
+    Returns the `WindowTable` of a rate DataFrame, building it on first use.
+
+    The table covers starts from the beginning of today. Like
+    `price_curve`, it is kept for as long as the DataFrame is alive, so it is
+    built once per loaded price dataset.
+    """
+    key = id(df)
+    cached = _tables.get(key)
+    if cached is not None and cached[0]() is df:
+        return cached[1]
+
+    table = WindowTable(price_curve(df), start_of_day())
+    _tables[key] = (weakref.ref(df, lambda _, key=key: _tables.pop(key, None)), table)
+    return table